@@ -0,0 +1,175 @@
+"""
+Adaptive number of retrieved chunks sent to the LLM, per field type.
+
+Instead of a fixed top k, `select_k` walks the ranked chunks and stops at the first of:
+
+- `max_k` of the field type (a single number needs a few chunks, a narrative many more),
+- the token budget of the field type (chunk text, tiktoken or chars / 4),
+- the marginal chunk scoring below `min_relative_score` of the best one,
+- the largest drop in the score distribution, when it is a clear gap (`gap_share` of the
+  total drop across the candidates),
+
+always keeping `min_k` chunks when the budget allows. `KSelection` records the chosen k and the
+reason, to be stored per field (tracing span, result store provenance).
+
+    df_ranked, selection = select_frame(df_retrieved, "Numeric")
+    system_prompt, user_prompt = get_extract_prompt_with_context(prompt, df_ranked, selection.k)
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from evidence_index import TEXT_COLUMNS
+
+# Candidate score columns of the retrieved-chunks frame, first match wins
+SCORE_COLUMNS = ("score", "similarity", "similarity_score", "relevance_score")   # Higher is better
+DISTANCE_COLUMNS = ("distance", "l2_distance")                                   # Lower is better
+
+
+@dataclass(frozen = True)
+class KPolicy:
+    min_k: int
+    max_k: int
+    token_budget: int                  # Max chunk tokens sent to the LLM
+    min_relative_score: float          # Stop once a chunk scores below this share of the best one
+    gap_share: float = 0.5             # Min share of the total score drop for a gap to cut there
+
+
+POLICIES: Dict[str, KPolicy] = {
+    "numeric": KPolicy(min_k = 2, max_k = 6, token_budget = 2500, min_relative_score = 0.85),
+    "table": KPolicy(min_k = 3, max_k = 10, token_budget = 5000, min_relative_score = 0.8),
+    "string": KPolicy(min_k = 5, max_k = 20, token_budget = 9000, min_relative_score = 0.7),
+}
+
+_ALIASES = {"quantitative": "numeric", "qualitative": "string", "text": "string"}
+
+
+def policy_for(field_type: Optional[str]) -> KPolicy:
+    """
+    Policy of a field type ("Numeric", "Table", "String", "qualitative"...); string by default.
+    """
+    key = (field_type or "").strip().lower()
+    return POLICIES.get(_ALIASES.get(key, key), POLICIES["string"])
+
+
+@dataclass
+class KSelection:
+    field_type: Optional[str]
+    k: int
+    candidates: int
+    reason: str                        # max_k | available | token_budget | marginal_score | score_gap
+    tokens: int                        # Chunk tokens of the k selected chunks
+    last_score: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def span_attrs(self) -> Dict[str, Any]:
+        return {"k": self.k, "k_candidates": self.candidates, "k_reason": self.reason, "k_tokens": self.tokens}
+
+
+def _count_tokens(text: str) -> int:
+    try:
+        from prompts.prompts_profiler import estimate_tokens
+    except ImportError:
+        return len(text) // 4  # Rough estimate
+    return estimate_tokens(text)
+
+
+def similarity_from_distance(distance: float) -> float:
+    """
+    Map an L2 distance (FAISS `similarity_search_with_score`) to a score in (0, 1], higher is better.
+    """
+    return 1.0 / (1.0 + max(float(distance), 0.0))
+
+
+def select_k(
+    texts      : Sequence[str],
+    scores     : Optional[Sequence[float]] = None,
+    field_type : Optional[str] = None,
+    policy     : Optional[KPolicy] = None,
+) -> KSelection:
+    """
+    Number of chunks to keep of `texts`, ranked best first. `scores` (higher is better, same
+    order) enable the marginal-score and gap rules; without them only max_k and the budget apply.
+    """
+    policy = policy or policy_for(field_type)
+    n = min(len(texts), policy.max_k)
+    k, reason = n, "max_k" if len(texts) > policy.max_k else "available"
+
+    # Token budget (hard limit, but at least one chunk)
+    tokens = 0
+    for i in range(n):
+        cost = _count_tokens(texts[i] or "")
+        if i > 0 and tokens + cost > policy.token_budget:
+            k, reason = i, "token_budget"
+            break
+        tokens += cost
+
+    if scores is not None and k > policy.min_k:
+        ranked = [float(s) for s in scores[:k]]
+        best = ranked[0]
+
+        # Marginal chunk below the threshold
+        if best > 0:
+            for i in range(policy.min_k, k):
+                if ranked[i] < policy.min_relative_score * best:
+                    k, reason = i, "marginal_score"
+                    break
+
+        # Largest gap of the score distribution, when it stands out
+        drop = ranked[0] - ranked[k - 1]
+        if drop > 0 and k - policy.min_k > 1:
+            gaps = [(ranked[i - 1] - ranked[i], i) for i in range(policy.min_k, k)]
+            gap, at = max(gaps)
+            if gap >= policy.gap_share * drop:
+                k, reason = at, "score_gap"
+
+        if k < len(ranked):
+            tokens = sum(_count_tokens(t or "") for t in texts[:k])
+
+    return KSelection(
+        field_type = field_type,
+        k          = k,
+        candidates = len(texts),
+        reason     = reason,
+        tokens     = tokens,
+        last_score = round(float(scores[k - 1]), 4) if scores is not None and k else None,
+    )
+
+
+def _column(columns: Sequence[str], candidates: Sequence[str]) -> Optional[str]:
+    return next((c for c in candidates if c in columns), None)
+
+
+def select_frame(df_retrieved, field_type: Optional[str] = None, policy: Optional[KPolicy] = None) -> Tuple[Any, KSelection]:
+    """
+    Rank the retrieved-chunks frame by its score column (when it has one) and select k.
+    Returns the ranked frame (all rows, so grounding still sees every chunk) and the selection.
+    """
+    columns = list(df_retrieved.columns)
+    text_col = _column(columns, TEXT_COLUMNS)
+    texts = df_retrieved[text_col].fillna("").astype(str).tolist() if text_col else [""] * len(df_retrieved)
+
+    scores = None
+    score_col = _column(columns, SCORE_COLUMNS)
+    distance_col = None if score_col else _column(columns, DISTANCE_COLUMNS)
+    if score_col or distance_col:
+        df_retrieved = df_retrieved.sort_values(score_col or distance_col, ascending = not score_col, kind = "stable")
+        df_retrieved = df_retrieved.reset_index(drop = True)
+        texts = df_retrieved[text_col].fillna("").astype(str).tolist() if text_col else texts
+        values = df_retrieved[score_col or distance_col].astype(float).tolist()
+        scores = values if score_col else [similarity_from_distance(d) for d in values]
+
+    return df_retrieved, select_k(texts, scores, field_type, policy)
+
+
+def select_documents(docs_and_scores: Sequence[Tuple[Any, float]], field_type: Optional[str] = None, distance: bool = True) -> Tuple[List[Any], KSelection]:
+    """
+    Select k of LangChain `(Document, score)` pairs (FAISS returns L2 distances: `distance=True`).
+    """
+    docs = [doc for doc, _ in docs_and_scores]
+    scores = [similarity_from_distance(s) if distance else float(s) for _, s in docs_and_scores]
+    selection = select_k([doc.page_content for doc in docs], scores, field_type)
+    return docs[:selection.k], selection
@@ -0,0 +1,447 @@
+"""
+Semantic cache of validated LLM answers, keyed on the field and the retrieved chunk set.
+
+Reports filed year after year (or as several variants of the same "memoria anual") often yield
+the same chunks for a field. When the chunks sent to the LLM for a (field_id, kind, prompt) were
+already answered, the stored validated output is returned with its provenance instead of calling
+the LLM again:
+
+- exact hit: same set of chunks (sorted hashes of the normalised chunk texts, order-insensitive),
+- near hit: same company and the same figures quoted in the chunks, and a cosine similarity of
+  the chunk-set embeddings >= `threshold` (hashed bag of words by default, no API call; any
+  `embed(text) -> vector` function can be given instead).
+
+Requiring the same figures keeps near hits from returning last year's number for a field whose
+wording did not change. The cache lives in a local SQLite file (`.cache/answers.sqlite`).
+
+A hit may come from another company, report or index, so the `text_source` citations of the
+stored answer are re-pointed at the current chunks before it is returned: each cited chunk is
+found again by the hash of its text (stored with the answer) or, failing that, by its quote. The
+current `chunk_id`, `chunk_document` and `chunk_page` replace the stored ones; a hit whose
+citations cannot all be found among the current chunks is a miss.
+
+    cache = AnswerCache()
+    chunks = ChunkSet.from_frame(df_retrieved.head(top_k))
+    version = answer_version(system_prompt, schema.__name__)
+    hit = cache.lookup("017", "extract", chunks, version, company = "repsol")
+    if hit is None:
+        output = validate_output(llm.llm_response(system_prompt, user_prompt), schema)
+        cache.store("017", "extract", chunks, version, output, company = "repsol")
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
+import tracing
+from evidence_index import DOCUMENT_COLUMNS, ID_COLUMNS, PAGE_COLUMNS, TEXT_COLUMNS, normalize_text
+from result_store import prompt_hash
+
+ANSWERS_PATH = Path(".cache/answers.sqlite")
+NEAR_THRESHOLD = 0.97   # Min cosine similarity of the chunk-set embeddings for a near hit
+EMBEDDING_DIM = 512     # Hashed bag-of-words size
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    field_id        TEXT NOT NULL,
+    kind            TEXT NOT NULL,
+    prompt_version  TEXT NOT NULL,
+    chunk_set       TEXT NOT NULL,
+    numbers         TEXT NOT NULL,
+    company         TEXT,
+    run_id          TEXT,
+    embedding       BLOB NOT NULL,
+    schema          TEXT,
+    payload         TEXT NOT NULL,
+    provenance      TEXT,
+    created_at      REAL NOT NULL,
+    PRIMARY KEY (field_id, kind, prompt_version, chunk_set)
+);
+CREATE INDEX IF NOT EXISTS answers_near ON answers (field_id, kind, prompt_version, numbers, company);
+"""
+
+_COLUMNS = "field_id, kind, prompt_version, chunk_set, numbers, company, run_id, embedding, schema, payload, provenance, created_at"
+
+
+def hashed_embedding(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Signed hashed bag of words of the (normalised) text, L2-normalised. Deterministic.
+    """
+    vector = np.zeros(dim, dtype = np.float32)
+    for word in text.split():
+        h = zlib.crc32(word.encode("utf-8"))
+        vector[h % dim] += 1.0 if (h >> 16) & 1 else -1.0
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def _dump(output: Any) -> Dict[str, Any]:
+    if hasattr(output, "model_dump"):
+        return output.model_dump(mode = "json")
+    if isinstance(output, str):
+        return json.loads(output)
+    return dict(output)
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _page_list(value: Any) -> Tuple[int, ...]:
+    values = value if isinstance(value, (list, tuple, set, np.ndarray)) else [value]
+    pages = []
+    for v in values:
+        try:
+            pages.append(int(v))
+        except (TypeError, ValueError):
+            continue
+    return tuple(pages)
+
+
+@dataclass(frozen = True)
+class ChunkSet:
+    """
+    Fingerprint of the chunks sent to the LLM.
+    """
+    texts: Tuple[str, ...]          # Normalised chunk texts, in prompt order
+    chunk_ids: Tuple[str, ...] = ()
+    documents: Tuple[str, ...] = ()
+    pages: Tuple[Tuple[int, ...], ...] = ()
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts     : Iterable[Any],
+        chunk_ids : Iterable[Any] = (),
+        documents : Iterable[Any] = (),
+        pages     : Iterable[Any] = (),
+    ) -> "ChunkSet":
+        return cls(
+            tuple(normalize_text(t) for t in texts),
+            tuple(str(i) for i in chunk_ids),
+            tuple("" if d is None else str(d) for d in documents),
+            tuple(_page_list(p) for p in pages),
+        )
+
+    @classmethod
+    def from_frame(cls, df_chunks) -> "ChunkSet":
+        """
+        From the retrieved-chunks frame (only the rows sent to the LLM, e.g. `df.head(top_k)`).
+        """
+        columns = list(df_chunks.columns)
+        text_col, id_col, page_col, document_col = (
+            next((c for c in candidates if c in columns), None)
+            for candidates in (TEXT_COLUMNS, ID_COLUMNS, PAGE_COLUMNS, DOCUMENT_COLUMNS)
+        )
+        if text_col is None:
+            raise ValueError(f"Cannot find a chunk text column in {columns}")
+        return cls.from_texts(
+            df_chunks[text_col].tolist(),
+            df_chunks[id_col].tolist() if id_col else (),
+            df_chunks[document_col].tolist() if document_col else (),
+            df_chunks[page_col].tolist() if page_col else (),
+        )
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[Any]) -> "ChunkSet":
+        docs = list(docs)
+        metadata = [doc.metadata or {} for doc in docs]
+        return cls.from_texts(
+            (doc.page_content for doc in docs),
+            (md.get("chunk_id") or getattr(doc, "id", None) or "" for md, doc in zip(metadata, docs)),
+            (md.get("chunk_document") or md.get("source") or "" for md in metadata),
+            (md.get("chunk_page", md.get("page_label", md.get("page"))) for md in metadata),
+        )
+
+    @property
+    def key(self) -> str:
+        # Order-insensitive: the same chunks ranked differently are the same evidence
+        return _sha("\n".join(sorted(_sha(t) for t in set(self.texts))))
+
+    @property
+    def numbers(self) -> str:
+        return _sha(" ".join(sorted({n for t in self.texts for n in _NUMBER_RE.findall(t)})))
+
+    @property
+    def text_keys(self) -> Tuple[str, ...]:
+        return tuple(_sha(t) for t in self.texts)
+
+    def text(self) -> str:
+        return "\n".join(sorted(set(self.texts)))
+
+    def locate(self, chunk_id: Any, provenance: Mapping[str, Any], quote: Any = "") -> Optional[int]:
+        """
+        Position of a chunk cited by a stored answer among these chunks: by the text hash stored
+        for `chunk_id` in the answer's provenance, else by the chunk containing the quote.
+        """
+        stored = dict(zip(provenance.get("chunk_ids") or (), provenance.get("chunk_keys") or ()))
+        keys = self.text_keys
+        if str(chunk_id) in stored and stored[str(chunk_id)] in keys:
+            return keys.index(stored[str(chunk_id)])
+        quote = normalize_text(str(quote or "").replace("...", " ").replace("…", " "))
+        if quote:
+            return next((i for i, text in enumerate(self.texts) if quote in text), None)
+        return None
+
+    def rebase(self, payload: Dict[str, Any], provenance: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        `payload` with its `text_source` citations pointing at these chunks (`chunk_id`,
+        `chunk_document`, `chunk_page` of the located chunk); None if a citation is not found.
+        """
+        sources = payload.get("text_source") if isinstance(payload, dict) else None
+        if not isinstance(sources, list):
+            return payload
+        rebased = []
+        for source in sources:
+            if not isinstance(source, dict):
+                return None
+            i = self.locate(source.get("chunk_id"), provenance, source.get("text"))
+            if i is None:
+                return None
+            source = dict(source)
+            if i < len(self.chunk_ids):
+                source["chunk_id"] = self.chunk_ids[i]
+            if i < len(self.documents) and self.documents[i]:
+                source["chunk_document"] = self.documents[i]
+            if i < len(self.pages) and self.pages[i]:
+                source["chunk_page"] = list(self.pages[i])
+            rebased.append(source)
+        return {**payload, "text_source": rebased}
+
+
+@dataclass(frozen = True)
+class CachedAnswer:
+    field_id: str
+    kind: str
+    match: str                     # exact | near
+    similarity: float
+    company: Optional[str]
+    run_id: Optional[str]
+    schema: Optional[str]
+    payload: Dict[str, Any]
+    provenance: Dict[str, Any] = field(default_factory = dict)
+    created_at: float = 0.0
+
+    def output(self, schema: Optional[Type[Any]] = None, mode: str = "fast") -> Any:
+        """
+        The cached output as a `schema` model (it was validated before being stored), or the raw dict.
+        """
+        if schema is None:
+            return self.payload
+        from schema_validation import validate_output
+
+        return validate_output(self.payload, schema, mode = mode)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Provenance of a hit, to store with the reused result.
+        """
+        return {
+            "match": self.match,
+            "similarity": round(self.similarity, 4),
+            "company": self.company,
+            "run_id": self.run_id,
+            "created_at": self.created_at,
+        }
+
+
+class AnswerCache:
+    """
+    Args:
+        path: SQLite file (created on first use). ":memory:" for a throwaway cache.
+        threshold: Min cosine similarity for a near hit (None: exact hits only).
+        embed: `embed(text) -> vector` of a chunk set (default: `hashed_embedding`).
+    """
+
+    def __init__(
+        self,
+        path      : Path = ANSWERS_PATH,
+        threshold : Optional[float] = NEAR_THRESHOLD,
+        embed     : Optional[Callable[[str], Sequence[float]]] = None,
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.embed = embed or hashed_embedding
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents = True, exist_ok = True)
+
+        self._conn = sqlite3.connect(str(path), check_same_thread = False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        self.hits = {"exact": 0, "near": 0}
+        self.misses = 0
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _vector(self, chunks: ChunkSet) -> np.ndarray:
+        vector = np.asarray(self.embed(chunks.text()), dtype = np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def lookup(
+        self,
+        field_id       : str,
+        kind           : str,
+        chunks         : ChunkSet,
+        prompt_version : str,
+        company        : Optional[str] = None,
+    ) -> Optional[CachedAnswer]:
+        """
+        Stored answer for the same field, kind and prompt version and the same (or, within the
+        company, a near-identical) chunk set, its citations re-pointed at `chunks`; None on a miss
+        (or when a cited chunk is not among `chunks`).
+        """
+        if not chunks.texts:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM answers WHERE field_id = ? AND kind = ? AND prompt_version = ? AND chunk_set = ?",
+                (field_id, kind, prompt_version, chunks.key),
+            ).fetchone()
+        if row is not None:
+            hit = _row_to_answer(row, "exact", 1.0, chunks)
+            if hit is not None:
+                self.hits["exact"] += 1
+                return hit
+
+        if self.threshold is not None and company is not None:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {_COLUMNS} FROM answers WHERE field_id = ? AND kind = ? AND prompt_version = ? "
+                    "AND numbers = ? AND company = ?",
+                    (field_id, kind, prompt_version, chunks.numbers, company),
+                ).fetchall()
+            if rows:
+                vector = self._vector(chunks)
+                scored = [(float(np.frombuffer(r["embedding"], dtype = np.float32) @ vector), r) for r in rows]
+                for similarity, best in sorted(scored, key = lambda s: -s[0]):
+                    if similarity < self.threshold:
+                        break
+                    hit = _row_to_answer(best, "near", similarity, chunks)
+                    if hit is not None:
+                        self.hits["near"] += 1
+                        return hit
+
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        field_id       : str,
+        kind           : str,
+        chunks         : ChunkSet,
+        prompt_version : str,
+        output         : Any,
+        company        : Optional[str] = None,
+        run_id         : Optional[str] = None,
+        provenance     : Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        """
+        Cache a validated output (pydantic model, dict or JSON string). Same key -> overwritten.
+        """
+        if not chunks.texts:
+            return
+        row = (
+            field_id, kind, prompt_version, chunks.key, chunks.numbers, company, run_id,
+            self._vector(chunks).tobytes(),
+            type(output).__name__ if hasattr(output, "model_dump") else None,
+            json.dumps(_dump(output), ensure_ascii = False),
+            json.dumps(
+                {"chunk_ids": list(chunks.chunk_ids), "chunk_keys": list(chunks.text_keys), **(provenance or {})},
+                ensure_ascii = False, default = str,
+            ),
+            time.time(),
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO answers ({_COLUMNS}) VALUES ({', '.join('?' * 12)})", row
+            )
+
+    def get_or_answer(
+        self,
+        field_id       : str,
+        kind           : str,
+        chunks         : ChunkSet,
+        prompt_version : str,
+        answer         : Callable[[], Any],
+        schema         : Optional[Type[Any]] = None,
+        company        : Optional[str] = None,
+        run_id         : Optional[str] = None,
+        provenance     : Optional[Mapping[str, Any]] = None,
+    ) -> Tuple[Any, Optional[CachedAnswer]]:
+        """
+        The cached output (as `schema`), or `answer()` (a validated output) stored for next time.
+        Returns (output, CachedAnswer or None on a miss).
+        """
+        with tracing.span("answer_cache", kind = kind) as sp:
+            hit = self.lookup(field_id, kind, chunks, prompt_version, company = company)
+            sp.set(cache_hit = hit is not None, match = hit.match if hit else None)
+        if hit is not None:
+            return hit.output(schema), hit
+
+        output = answer()
+        self.store(field_id, kind, chunks, prompt_version, output, company = company, run_id = run_id, provenance = provenance)
+        return output, None
+
+    def invalidate(self, field_id: Optional[str] = None, company: Optional[str] = None) -> int:
+        """
+        Drop cached answers (of a field and/or company; everything without arguments).
+        """
+        sql, params = "DELETE FROM answers WHERE 1 = 1", []
+        for column, value in (("field_id", field_id), ("company", company)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(value)
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return {"entries": entries, "exact_hits": self.hits["exact"], "near_hits": self.hits["near"], "misses": self.misses}
+
+
+def _row_to_answer(row: sqlite3.Row, match: str, similarity: float, chunks: ChunkSet) -> Optional[CachedAnswer]:
+    provenance = json.loads(row["provenance"] or "{}")
+    payload = chunks.rebase(json.loads(row["payload"]), provenance)
+    if payload is None:
+        return None
+    return CachedAnswer(
+        field_id   = row["field_id"],
+        kind       = row["kind"],
+        match      = match,
+        similarity = similarity,
+        company    = row["company"],
+        run_id     = row["run_id"],
+        schema     = row["schema"],
+        payload    = payload,
+        provenance = provenance,
+        created_at = row["created_at"],
+    )
+
+
+def answer_version(*parts: Any) -> str:
+    """
+    Version of what an answer depends on besides the chunks (system prompt, schema name, the
+    extraction being critiqued...): strings, dicts or pydantic models.
+    """
+    return prompt_hash(*(
+        p if isinstance(p, str) else json.dumps(_dump(p) if hasattr(p, "model_dump") else p, sort_keys = True, default = str)
+        for p in parts
+    ))
@@ -0,0 +1,254 @@
+"""
+Batch extraction of every field for one or more companies, resumable.
+
+- Runs `generate.main` for each (company, field_id) in a thread pool.
+- Every step is saved in the result store under the batch id (see result_store.py), and each
+  finished field is appended to a JSONL checkpoint (`.cache/batches/<batch_id>.jsonl`, fsync'ed).
+  `--resume <batch_id>` skips the fields already done, so an interrupted run continues where it
+  stopped.
+- At the end all results of the batch are written to one file (.parquet, .csv or .jsonl).
+
+Usage:
+    python batch_extract.py --companies repsol dia --workers 4 --output results/batch.parquet
+    python batch_extract.py --resume 20260101T120000-1a2b3c4d --output results/batch.parquet
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+CHECKPOINT_DIR = Path(".cache/batches")
+DEFAULT_WORKERS = 4
+
+Task = Tuple[str, str]  # (company, field_id)
+
+
+class Checkpoint:
+    """
+    Append-only JSONL log of finished fields. The first line holds the batch parameters.
+    """
+
+    def __init__(self, batch_id: str, directory: Path = CHECKPOINT_DIR):
+        self.batch_id = batch_id
+        self.path = Path(directory) / f"{batch_id}.jsonl"
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii = False, default = str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents = True, exist_ok = True)
+            with self.path.open("a", encoding = "utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def start(self, companies: List[str], field_ids: Optional[List[str]]) -> None:
+        self._append({"batch_id": self.batch_id, "companies": companies, "field_ids": field_ids, "started_at": time.time()})
+
+    def record(self, company: str, field_id: str, status: str, seconds: float, error: Optional[str] = None) -> None:
+        self._append({"company": company, "field_id": field_id, "status": status, "seconds": round(seconds, 3), "error": error})
+
+    def read(self) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        header, records = {}, []
+        if not self.path.exists():
+            return header, records
+        for line in self.path.read_text(encoding = "utf-8").splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Last line cut by a crash
+            if "batch_id" in record:
+                header = record
+            else:
+                records.append(record)
+        return header, records
+
+    def done(self) -> Set[Task]:
+        _, records = self.read()
+        return {(r["company"], r["field_id"]) for r in records if r.get("status") == "ok"}
+
+
+class Progress:
+    """
+    tqdm bar when installed, otherwise one status line on stderr.
+    """
+
+    def __init__(self, total: int, initial: int = 0):
+        self.total, self.count, self.failed = total, initial, 0
+        self.start = time.perf_counter()
+        try:
+            from tqdm import tqdm
+            self._bar = tqdm(total = total, initial = initial, unit = "field")
+        except ImportError:
+            self._bar = None
+            self._print()
+
+    def update(self, ok: bool, label: str = "") -> None:
+        self.count += 1
+        self.failed += not ok
+        if self._bar is not None:
+            self._bar.set_postfix_str(f"failed={self.failed} {label}")
+            self._bar.update(1)
+        else:
+            self._print(label)
+
+    def _print(self, label: str = "") -> None:
+        elapsed = time.perf_counter() - self.start
+        print(f"\r[{self.count}/{self.total}] failed={self.failed} {elapsed:,.0f}s {label[:60]:<60}", end = "", file = sys.stderr, flush = True)
+
+    def close(self) -> None:
+        if self._bar is not None:
+            self._bar.close()
+        else:
+            print(file = sys.stderr)
+
+
+def build_tasks(companies: Iterable[str], field_ids: Optional[Iterable[str]] = None) -> List[Task]:
+    import generate
+
+    registry = generate.get_field_registry()
+    all_field_ids = [f["field_id"] for f in registry.fields_info()]
+    selected = list(field_ids) if field_ids else all_field_ids
+
+    unknown = sorted(set(selected) - set(all_field_ids))
+    if unknown:
+        raise ValueError(f"Unknown field_id(s): {unknown}")
+
+    return [(company, field_id) for company in companies for field_id in selected]
+
+
+def run_task(task: Task, batch_id: str, skip_grounded_critique: bool) -> Tuple[float, Optional[str]]:
+    """
+    Run one field. Returns (seconds, error); errors are returned so the batch keeps going.
+    """
+    import generate
+
+    company, field_id = task
+    start = time.perf_counter()
+    try:
+        generate.main(
+            company                = company,
+            field_id               = field_id,
+            run_id                 = batch_id,
+            skip_grounded_critique = skip_grounded_critique,
+        )
+    except Exception as e:
+        return time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    return time.perf_counter() - start, None
+
+
+def export_results(batch_id: str, output: Path) -> Path:
+    """
+    Write every stored result of the batch to `output` (.parquet, .csv or .jsonl).
+    """
+    import generate
+
+    frame = generate.get_result_store().to_frame(run_id = batch_id)
+    output = Path(output)
+    output.parent.mkdir(parents = True, exist_ok = True)
+
+    if output.suffix == ".parquet":
+        frame.to_parquet(output, index = False)
+    elif output.suffix == ".csv":
+        frame.to_csv(output, index = False)
+    else:
+        frame.to_json(output, orient = "records", lines = True, force_ascii = False)
+    return output
+
+
+def run_batch(
+    companies              : List[str],
+    field_ids              : Optional[List[str]] = None,
+    workers                : int = DEFAULT_WORKERS,
+    batch_id               : Optional[str] = None,
+    output                 : Optional[Path] = None,
+    skip_grounded_critique : bool = False,
+) -> Dict[str, Any]:
+    from result_store import new_run_id
+
+    checkpoint = Checkpoint(batch_id or new_run_id())
+    if checkpoint.exists():
+        header, _ = checkpoint.read()
+        companies = header.get("companies") or companies
+        field_ids = header.get("field_ids") if field_ids is None else field_ids
+    else:
+        checkpoint.start(companies, field_ids)
+
+    tasks = build_tasks(companies, field_ids)
+    done = checkpoint.done()
+    pending = [t for t in tasks if t not in done]
+
+    print(f"Batch {checkpoint.batch_id}: {len(tasks)} fields, {len(tasks) - len(pending)} already done", file = sys.stderr)
+
+    progress = Progress(total = len(tasks), initial = len(tasks) - len(pending))
+    failed: List[Dict[str, Any]] = []
+    pool = ThreadPoolExecutor(max_workers = max(1, workers))
+    try:
+        futures = {pool.submit(run_task, task, checkpoint.batch_id, skip_grounded_critique): task for task in pending}
+        for future in as_completed(futures):
+            company, field_id = futures[future]
+            seconds, error = future.result()
+            if error:
+                failed.append({"company": company, "field_id": field_id, "error": error})
+            checkpoint.record(company, field_id, "error" if error else "ok", seconds, error)
+            progress.update(error is None, f"{company}/{field_id}")
+    except KeyboardInterrupt:
+        pool.shutdown(wait = False, cancel_futures = True)
+        progress.close()
+        print(f"Interrupted. Resume with: python batch_extract.py --resume {checkpoint.batch_id}", file = sys.stderr)
+        raise
+    pool.shutdown(wait = True)
+    progress.close()
+
+    summary = {
+        "batch_id": checkpoint.batch_id,
+        "fields": len(tasks),
+        "done": len(checkpoint.done()),
+        "failed": failed,
+        "checkpoint": str(checkpoint.path),
+    }
+    if output is not None:
+        summary["output"] = str(export_results(checkpoint.batch_id, output))
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Extract every field for one or more companies (resumable).")
+    parser.add_argument("--companies", nargs = "+", default = None, help = "Companies from generate.all_indexes (default: all).")
+    parser.add_argument("--fields", nargs = "+", default = None, help = "Only these field_ids (default: all).")
+    parser.add_argument("--workers", type = int, default = DEFAULT_WORKERS)
+    parser.add_argument("--resume", default = None, help = "Batch id to resume (its checkpoint keeps companies/fields).")
+    parser.add_argument("--output", type = Path, default = None, help = "Consolidated results file (.parquet, .csv, .jsonl).")
+    parser.add_argument("--skip-grounded-critique", action = "store_true")
+    args = parser.parse_args()
+
+    if args.resume and not Checkpoint(args.resume).exists():
+        parser.error(f"No checkpoint for batch {args.resume} in {CHECKPOINT_DIR}")
+
+    import generate
+
+    companies = args.companies or list(generate.all_indexes)
+    unknown = sorted(set(companies) - set(generate.all_indexes))
+    if unknown:
+        parser.error(f"Unknown companies: {unknown}")
+
+    summary = run_batch(
+        companies              = companies,
+        field_ids              = args.fields,
+        workers                = args.workers,
+        batch_id               = args.resume,
+        output                 = args.output,
+        skip_grounded_critique = args.skip_grounded_critique,
+    )
+    print(json.dumps(summary, indent = 2, ensure_ascii = False))
+    sys.exit(1 if summary["failed"] else 0)
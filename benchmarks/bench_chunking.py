@@ -0,0 +1,378 @@
+"""
+Chunking strategy benchmark: retrieval quality and cost of several ways of splitting the corpus.
+
+Every strategy re-splits the same parsed pages (`parsed_cache`, so PDFs are parsed once), builds a
+FAISS index and runs the `retrieval_keywords` of every `prompts/fields/*.yaml` as a query. The
+gold labels of a field are the (`chunk_document`, `chunk_page`) pairs of its
+`expected_output_found.text_source` (1-based pages, as in the YAMLs); a retrieved chunk covers the
+pages of its `source` it was cut from. Documents match on the file name without ".pdf", and fields
+whose gold documents are not in the corpus are skipped (with a warning) rather than scored.
+
+The YAML labels cite the reports the prompts were written against, not the bundled one:
+`gold_pages.json` (the default `--gold`) holds the pages of annual_reports/cuentas-anuales-
+consolidadas.pdf (Repsol 2024) for the fields it discloses (FX risk, interest rate sensitivity,
+maturities of financial liabilities); there is no EBITDA or currency split of it to label.
+
+Strategies:
+    tokens-<size>-<overlap>   recursive character splitter measured in tokens (ingestion.py today:
+                              tokens-1000-120), over the `--sizes` x `--overlaps` grid
+    sentences-<size>          whole sentences packed up to <size> tokens, never cut mid-sentence
+    section-<size>            `pdf_layout` chunks: tables as header + rows, prose per section
+    page                      one chunk per page
+
+Reported per strategy: chunks, mean tokens per chunk, build time (split + embed + index), index
+size on disk, p50 query latency, and recall@k / hit@k of the gold pages (plus quote@k: share
+of gold quotes found verbatim in the top k chunks).
+
+Embeddings are `fakes.FakeEmbeddings` by default (offline, lexical); `--embeddings openai` uses
+text-embedding-3-small for numbers that reflect the production index (and its API latency).
+
+Usage:
+    python benchmarks/bench_chunking.py                                   # annual_reports/*.pdf
+    python benchmarks/bench_chunking.py --sizes 300 600 1000 --overlaps 0 120 --k 5 10 15
+    python benchmarks/bench_chunking.py --embeddings openai --json chunking.json
+    python benchmarks/bench_chunking.py other.pdf --gold other_pages.json   # {"017": {"other.pdf": [14, 15]}}
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_suite import percentile  # noqa: E402
+from fakes import FakeEmbeddings  # noqa: E402
+
+DEFAULT_SIZES = (250, 500, 1000, 1500)
+DEFAULT_OVERLAPS = (0, 120)
+DEFAULT_K = (5, 10, 15)
+CORPUS = REPO_ROOT / "annual_reports"
+GOLD = Path(__file__).resolve().parent / "gold_pages.json"    # Gold pages of the CORPUS report
+
+_SENTENCE_RE = re.compile(r"(?<=[.;:!?])\s+(?=[A-ZÁÉÍÓÚÑ0-9(\"“])")
+
+
+@dataclass
+class GoldQuery:
+    field: str
+    query: str
+    pages: Set[Tuple[str, int]] = field(default_factory = set)    # (document_key, 1-based page)
+    quotes: List[str] = field(default_factory = list)
+
+
+@dataclass
+class Strategy:
+    name: str
+    parser: str                                   # parsed_cache parser: "pypdf" | "layout"
+    split: Callable[[Path, Any], List[Any]]       # (pdf, parsed pages) -> LangChain documents
+
+
+@dataclass
+class StrategyResult:
+    strategy: str
+    chunks: int = 0
+    mean_tokens: float = 0.0
+    build_s: float = 0.0
+    index_mb: float = 0.0
+    query_p50_ms: float = 0.0
+    queries: int = 0
+    recall: Dict[int, float] = field(default_factory = dict)
+    hit: Dict[int, float] = field(default_factory = dict)
+    quote: Dict[int, float] = field(default_factory = dict)
+    skipped: Optional[str] = None
+
+
+# ======================================================================================
+# Gold labels
+# ======================================================================================
+def _quote_key(text: str) -> str:
+    from evidence_index import normalize_text
+
+    return normalize_text(text.replace("...", " ").replace("…", " "))
+
+
+def document_key(name: Any) -> str:
+    """
+    File name of a document without folder and ".pdf", case-folded ("Annual Report 2023.pdf" and
+    "data/annual report 2023" are the same document).
+    """
+    name = Path(str(name).replace("\\", "/")).name.casefold()
+    return name[:-4] if name.endswith(".pdf") else name
+
+
+def load_gold(
+    fields_dir : Path,
+    overrides  : Optional[Dict[str, Dict[str, List[int]]]] = None,
+    documents  : Optional[Iterable[Any]] = None,
+) -> List[GoldQuery]:
+    """
+    One query per field YAML: its retrieval keywords, and gold (document, page) pairs / quotes
+    from `expected_output_found` (`overrides[field_id or file stem]` = {document: pages} when given).
+
+    With `documents` (the corpus), gold labels of other documents are dropped and fields left
+    without any are skipped with a warning: their pages would be matched against another report.
+    """
+    import yaml
+
+    corpus = {document_key(d) for d in documents} if documents is not None else None
+    queries = []
+    for path in sorted(Path(fields_dir).glob("*.yaml")):
+        info = yaml.safe_load(path.read_text(encoding = "utf-8")) or {}
+        sources = (info.get("expected_output_found") or {}).get("text_source") or []
+        labels = [
+            (document_key(s.get("chunk_document") or ""), [int(p) for p in (s.get("chunk_page") or [])], s.get("text") or "")
+            for s in sources
+        ]
+        for key in (str(info.get("field_id")), path.stem):
+            if overrides and key in overrides:
+                labels = [(document_key(doc), [int(p) for p in pages], "") for doc, pages in overrides[key].items()]
+        if not any(pages for _, pages, _ in labels):
+            continue
+        if corpus is not None:
+            outside = sorted({doc for doc, _, _ in labels if doc not in corpus})
+            labels = [label for label in labels if label[0] in corpus]
+            if not labels:
+                print(f"[warn] {path.stem}: gold documents {outside} not in the corpus, skipped", file = sys.stderr)
+                continue
+        queries.append(GoldQuery(
+            field  = path.stem,
+            query  = " ".join(str(info.get("retrieval_keywords") or info.get("field_name") or "").split()),
+            pages  = {(doc, page) for doc, pages, _ in labels for page in pages},
+            quotes = [q for q in (_quote_key(text) for _, _, text in labels) if q],
+        ))
+    return [q for q in queries if q.query and q.pages]
+
+
+def read_overrides(path: Optional[Path]) -> Optional[Dict[str, Dict[str, List[int]]]]:
+    """
+    `--gold` file for `load_gold`; None when not given or missing.
+    """
+    if not path or not Path(path).is_file():
+        return None
+    return json.loads(Path(path).read_text(encoding = "utf-8"))
+
+
+# ======================================================================================
+# Strategies
+# ======================================================================================
+def _tokens(text: str) -> int:
+    from prompts.prompts_profiler import estimate_tokens
+
+    return estimate_tokens(text)
+
+
+def _token_splitter(size: int, overlap: int) -> Callable[[Path, Any], List[Any]]:
+    def split(pdf: Path, pages: List[Any]) -> List[Any]:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        # Same separators as ingestion.py; length in tokens (tiktoken, or chars / 4 offline)
+        splitter = RecursiveCharacterTextSplitter(
+            separators = ["\n\n", "\n", ". ", " ", ""], chunk_size = size, chunk_overlap = overlap, length_function = _tokens,
+        )
+        return splitter.split_documents(pages)
+
+    return split
+
+
+def _sentence_splitter(size: int) -> Callable[[Path, Any], List[Any]]:
+    def split(pdf: Path, pages: List[Any]) -> List[Any]:
+        from langchain_core.documents import Document
+
+        chunks = []
+        for page in pages:
+            current, used = [], 0
+            for sentence in _SENTENCE_RE.split(" ".join(page.page_content.split())):
+                cost = _tokens(sentence)
+                if current and used + cost > size:
+                    chunks.append(Document(page_content = " ".join(current), metadata = dict(page.metadata)))
+                    current, used = [], 0
+                current.append(sentence)
+                used += cost
+            if current:
+                chunks.append(Document(page_content = " ".join(current), metadata = dict(page.metadata)))
+        return chunks
+
+    return split
+
+
+def _section_splitter(size: int) -> Callable[[Path, Any], List[Any]]:
+    def split(pdf: Path, pages: List[Any]) -> List[Any]:
+        from pdf_layout import load_layout_documents
+
+        return load_layout_documents(pdf, chunk_tokens = size, pages = pages)
+
+    return split
+
+
+def _page_splitter(pdf: Path, pages: List[Any]) -> List[Any]:
+    return list(pages)
+
+
+def build_strategies(sizes: Sequence[int], overlaps: Sequence[int], include: Optional[Sequence[str]] = None) -> List[Strategy]:
+    strategies = [
+        Strategy(f"tokens-{size}-{overlap}", "pypdf", _token_splitter(size, overlap))
+        for size in sizes for overlap in overlaps if overlap < size
+    ]
+    strategies += [Strategy(f"sentences-{size}", "pypdf", _sentence_splitter(size)) for size in sizes]
+    strategies += [Strategy(f"section-{size}", "layout", _section_splitter(size)) for size in sizes]
+    strategies.append(Strategy("page", "pypdf", _page_splitter))
+    if include:
+        strategies = [s for s in strategies if any(s.name.startswith(prefix) for prefix in include)]
+    return strategies
+
+
+# ======================================================================================
+# Evaluation
+# ======================================================================================
+def chunk_pages(doc: Any) -> Set[Tuple[str, int]]:
+    """
+    (document_key, 1-based page) pairs a chunk was cut from (`pages` of layout chunks, else the
+    loader's 0-based `page`).
+    """
+    md = doc.metadata or {}
+    source = document_key(md.get("source") or "")
+    if md.get("pages"):
+        return {(source, int(p) + 1) for p in md["pages"]}
+    page = md.get("page")
+    return {(source, int(page) + 1)} if page is not None else set()
+
+
+def _folder_bytes(folder: Path) -> int:
+    return sum(f.stat().st_size for f in folder.rglob("*") if f.is_file())
+
+
+def evaluate(
+    strategy   : Strategy,
+    corpus     : Dict[Path, Dict[str, Any]],
+    queries    : Sequence[GoldQuery],
+    embeddings : Any,
+    ks         : Sequence[int],
+) -> StrategyResult:
+    from langchain_community.vectorstores import FAISS
+
+    result = StrategyResult(strategy.name)
+
+    start = time.perf_counter()
+    chunks = [c for pdf, parsed in corpus.items() for c in strategy.split(pdf, parsed[strategy.parser])]
+    if not chunks:
+        result.skipped = "no chunks"
+        return result
+    store = FAISS.from_documents(chunks, embeddings)
+    result.build_s = round(time.perf_counter() - start, 3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store.save_local(tmp)
+        result.index_mb = round(_folder_bytes(Path(tmp)) / 2**20, 3)
+
+    result.chunks = len(chunks)
+    result.mean_tokens = round(sum(_tokens(c.page_content) for c in chunks) / len(chunks), 1)
+
+    latencies = []
+    recall = {k: [] for k in ks}
+    hit = {k: [] for k in ks}
+    quote = {k: [] for k in ks}
+    for q in queries:
+        start = time.perf_counter()
+        docs = store.similarity_search(q.query, k = max(ks))
+        latencies.append(time.perf_counter() - start)
+        for k in ks:
+            top = docs[:k]
+            found = set().union(*(chunk_pages(d) for d in top)) & q.pages
+            recall[k].append(len(found) / len(q.pages))
+            hit[k].append(float(bool(found)))
+            if q.quotes:
+                from evidence_index import normalize_text
+
+                text = " ".join(normalize_text(d.page_content) for d in top)
+                quote[k].append(sum(quote_text in text for quote_text in q.quotes) / len(q.quotes))
+
+    result.queries = len(queries)
+    result.query_p50_ms = round(percentile(latencies, 50) * 1000, 3) if latencies else 0.0
+    mean = lambda values: round(sum(values) / len(values), 3) if values else 0.0  # noqa: E731
+    result.recall = {k: mean(v) for k, v in recall.items()}
+    result.hit = {k: mean(v) for k, v in hit.items()}
+    result.quote = {k: mean(v) for k, v in quote.items()}
+    return result
+
+
+def load_corpus(pdfs: Sequence[Path], parsers: Set[str], cache_root: Optional[Path] = None) -> Dict[Path, Dict[str, Any]]:
+    """
+    Parsed pages of every PDF and parser, through the parsed-document cache.
+    """
+    from parsed_cache import PARSED_DIR, ParsedDocumentCache
+
+    cache = ParsedDocumentCache(cache_root or REPO_ROOT / PARSED_DIR)
+    corpus: Dict[Path, Dict[str, Any]] = {}
+    for pdf in pdfs:
+        corpus[pdf] = {}
+        for parser in sorted(parsers):
+            corpus[pdf][parser] = cache.documents(pdf) if parser == "pypdf" else cache.layout(pdf)
+    return corpus
+
+
+def print_results(results: List[StrategyResult], ks: Sequence[int]) -> None:
+    quality = "".join(f"{f'R@{k}':>7}{f'H@{k}':>7}" for k in ks) + f"{f'Q@{max(ks)}':>7}"
+    print(f"{'strategy':<22}{'chunks':>8}{'tok/chunk':>10}{'build s':>9}{'index MB':>10}{'query ms':>10}{quality}")
+    for r in sorted(results, key = lambda r: (r.skipped is not None, -r.recall.get(max(ks), 0.0), r.build_s)):
+        if r.skipped:
+            print(f"{r.strategy:<22}  skipped ({r.skipped})")
+            continue
+        quality = "".join(f"{r.recall[k]:>7.2f}{r.hit[k]:>7.2f}" for k in ks) + f"{r.quote[max(ks)]:>7.2f}"
+        print(f"{r.strategy:<22}{r.chunks:>8}{r.mean_tokens:>10.0f}{r.build_s:>9.2f}{r.index_mb:>10.2f}{r.query_p50_ms:>10.2f}{quality}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Chunking strategy benchmark (retrieval quality vs cost).")
+    parser.add_argument("pdfs", nargs = "*", type = Path, default = None, help = f"PDFs to index (default: {CORPUS}/*.pdf).")
+    parser.add_argument("--sizes", nargs = "+", type = int, default = list(DEFAULT_SIZES), help = "Chunk sizes in tokens.")
+    parser.add_argument("--overlaps", nargs = "+", type = int, default = list(DEFAULT_OVERLAPS), help = "Token overlaps of the tokens-* grid.")
+    parser.add_argument("--k", nargs = "+", type = int, default = list(DEFAULT_K), help = "Cut-offs of recall@k / hit@k.")
+    parser.add_argument("--strategies", nargs = "+", default = None, help = "Strategy name prefixes to run (default: all).")
+    parser.add_argument("--fields", type = Path, default = REPO_ROOT / "prompts" / "fields")
+    parser.add_argument("--gold", type = Path, default = GOLD, help = "JSON {field_id or YAML stem: {document: [1-based pages]}} overriding the YAML labels (default: %(default)s).")
+    parser.add_argument("--embeddings", choices = ("fake", "openai"), default = "fake")
+    parser.add_argument("--cache-root", type = Path, default = None, help = "Parsed-document cache folder.")
+    parser.add_argument("--json", type = Path, default = None, help = "Also write the results to this file.")
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or sorted(CORPUS.glob("*.pdf"))
+    queries = load_gold(args.fields, read_overrides(args.gold), documents = pdfs)
+    if not pdfs or not queries:
+        sys.exit(f"Nothing to evaluate: {len(pdfs)} PDFs, {len(queries)} fields with gold pages in them.")
+
+    if args.embeddings == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        from simple_rag import load_env
+
+        load_env()
+        embeddings = OpenAIEmbeddings(model = "text-embedding-3-small")
+    else:
+        embeddings = FakeEmbeddings()
+
+    strategies = build_strategies(args.sizes, args.overlaps, args.strategies)
+    print(f"{len(pdfs)} PDFs, {len(queries)} queries with gold pages, {len(strategies)} strategies\n")
+
+    results = []
+    try:
+        corpus = load_corpus(pdfs, {s.parser for s in strategies}, args.cache_root)
+    except ImportError as e:
+        sys.exit(f"Missing dependency: {e.name or e}")
+    for strategy in strategies:
+        try:
+            results.append(evaluate(strategy, corpus, queries, embeddings, args.k))
+        except ImportError as e:
+            results.append(StrategyResult(strategy.name, skipped = f"missing dependency: {e.name or e}"))
+
+    print_results(results, args.k)
+    if args.json:
+        args.json.write_text(json.dumps([asdict(r) for r in results], indent = 2), encoding = "utf-8")
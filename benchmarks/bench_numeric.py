@@ -0,0 +1,77 @@
+"""
+Benchmark of numeric result normalisation: per-object pydantic validation + Python loop
+(`normalize_numeric_loop`) vs the vectorised batch (`normalize_numeric_batch`).
+
+Usage:
+    python benchmarks/bench_numeric.py --sizes 100 5000 50000 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+from numeric_normalization import normalize_numeric_batch, normalize_numeric_loop  # noqa: E402
+
+
+def synthetic_outputs(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "text_source": [{"text": "...", "chunk_id": f"chunk_{i}", "chunk_document": f"doc_{i % 7}.pdf", "chunk_page": [rng.randint(1, 300)]}],
+            "justification": "Synthetic.",
+            "synonyms_found": [],
+            "result_field": {
+                "value": rng.choice([rng.uniform(-1e9, 1e9), None, str(rng.randint(0, 100))]),
+                "unit": rng.choice([None, 1, 7, 8, 9, 4]),
+                "currency": rng.choice([None, "", "eur", "EUR", "€", "$", "usd", "euros", "n/a"]),
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def timeit(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Numeric normalisation benchmark.")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [100, 5000, 50000])
+    parser.add_argument("--repeat", type = int, default = 5)
+    args = parser.parse_args()
+
+    # Malformed units / values (pydantic rejects them, so only the batch path is checked): the
+    # coercion fallback must flag them invalid with <NA> unit, not default them to 1
+    malformed = normalize_numeric_batch([
+        {"value": 1, "unit": "pct"}, {"value": 2, "unit": "x"}, {"value": "abc", "unit": 1}, {"value": 3, "unit": "7"},
+    ])
+    assert malformed["valid"].tolist() == [False, False, False, True]
+    assert malformed["unit"].isna().tolist() == [True, True, False, False]
+
+    for n in args.sizes:
+        outputs = synthetic_outputs(n)
+
+        # Both implementations must agree before timing them
+        batch = normalize_numeric_batch(outputs)
+        loop = pd.DataFrame(normalize_numeric_loop(outputs))
+        assert batch["valid"].tolist() == loop["valid"].tolist()
+        assert batch["currency"].tolist() == loop["currency"].tolist()
+        assert (batch["value_scaled"].fillna(0).to_numpy(float) - loop["value_scaled"].fillna(0).to_numpy(float)).__abs__().max() < 1e-6
+
+        loop_ms = timeit(lambda: pd.DataFrame(normalize_numeric_loop(outputs)), args.repeat)
+        batch_ms = timeit(lambda: normalize_numeric_batch(outputs), args.repeat)
+        print(f"{n:>7} results  loop {loop_ms:>9.1f} ms  batch {batch_ms:>8.1f} ms  ({loop_ms / max(batch_ms, 1e-9):.1f}x)")
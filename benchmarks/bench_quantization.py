@@ -0,0 +1,184 @@
+"""
+Quantised / truncated vector index benchmark: memory, search latency and recall loss.
+
+Chunks the corpus as `ingestion.py` does (through `parsed_cache`), embeds the chunks and the
+`retrieval_keywords` of every field YAML (the gold queries of bench_chunking.py, with its `--gold`
+pages), and compares each `vector_quantization.QuantizationConfig` of the `--dims` x `--dtypes` x
+`--rescore` grid with the exact full-precision search:
+
+    index MB      serialized FAISS index (what a search keeps in memory; the re-score vectors
+                  are memory-mapped and only the candidate rows are read)
+    B/vector      bytes per chunk
+    query ms      p50 search latency (query embedding excluded), `--repeat` passes over the queries
+    speedup       full-precision p50 / p50
+    NN@k          share of the exact top-k chunks also returned (recall loss of the quantisation)
+    R@k           recall of the gold pages of the fields, as in bench_chunking.py
+
+`--distractors N` adds N random unit vectors to every index, to measure memory and latency at
+the size of the multi-company index (they never appear in the exact top k of a real query).
+
+Embeddings are `fakes.FakeEmbeddings` at `--dim` by default (offline; hashed bag-of-words is not
+Matryoshka-trained, so truncation recall is pessimistic); `--embeddings openai` uses
+text-embedding-3-small for the recall numbers that matter.
+
+Usage:
+    python benchmarks/bench_quantization.py --distractors 200000
+    python benchmarks/bench_quantization.py --embeddings openai --dims 256 512 1024 --k 5 10
+    python benchmarks/bench_quantization.py --json quantization.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_chunking import CORPUS, GOLD, GoldQuery, build_strategies, chunk_pages, load_corpus, load_gold, read_overrides  # noqa: E402
+from bench_suite import percentile  # noqa: E402
+from fakes import FakeEmbeddings  # noqa: E402
+
+DEFAULT_DIMS = (1024, 512, 256)
+DEFAULT_K = (5, 10)
+STRATEGY = "tokens-1000-120"  # ingestion.py defaults
+
+
+@dataclass
+class QuantResult:
+    config: str
+    index_mb: float = 0.0
+    bytes_per_vector: int = 0
+    build_s: float = 0.0
+    query_p50_ms: float = 0.0
+    speedup: float = 1.0
+    nn_recall: Dict[int, float] = field(default_factory = dict)
+    page_recall: Dict[int, float] = field(default_factory = dict)
+
+
+def embed_corpus(chunks: Sequence, queries: Sequence[GoldQuery], embeddings, batch: int = 256):
+    texts = [c.page_content for c in chunks]
+    vectors = [v for i in range(0, len(texts), batch) for v in embeddings.embed_documents(texts[i:i + batch])]
+    return (
+        np.asarray(vectors, dtype = np.float32),
+        np.asarray([embeddings.embed_query(q.query) for q in queries], dtype = np.float32),
+    )
+
+
+def distractors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((n, dim), dtype = np.float32)
+    return vectors / np.linalg.norm(vectors, axis = 1, keepdims = True)
+
+
+def run_config(config, vectors: np.ndarray, query_vectors: np.ndarray, exact_ids: List[np.ndarray], pages: List[set], queries: Sequence[GoldQuery], ks: Sequence[int], repeat: int) -> QuantResult:
+    from vector_quantization import build_index, index_bytes, search
+
+    start = time.perf_counter()
+    index = build_index(vectors, config)
+    result = QuantResult(config.label, build_s = round(time.perf_counter() - start, 3))
+    result.index_mb = round(index_bytes(index) / 2**20, 3)
+    result.bytes_per_vector = config.bytes_per_vector(vectors.shape[1])
+
+    k_max = max(ks)
+    latencies, found = [], []
+    for r in range(repeat):
+        for q in query_vectors:
+            start = time.perf_counter()
+            ids, _ = search(index, q, k_max, config, vectors if config.rescore else None)
+            latencies.append(time.perf_counter() - start)
+            if r == 0:
+                found.append(ids)
+    result.query_p50_ms = round(percentile(latencies, 50) * 1000, 4)
+
+    for k in ks:
+        result.nn_recall[k] = round(float(np.mean([
+            len(set(ids[:k].tolist()) & set(exact[:k].tolist())) / max(min(k, len(exact)), 1)
+            for ids, exact in zip(found, exact_ids)
+        ])), 3)
+        result.page_recall[k] = round(float(np.mean([
+            len(set().union(*(pages[i] for i in ids[:k] if i < len(pages))) & q.pages) / len(q.pages)
+            for ids, q in zip(found, queries)
+        ])), 3)
+    return result
+
+
+def print_results(results: List[QuantResult], ks: Sequence[int]) -> None:
+    quality = "".join(f"{f'NN@{k}':>8}{f'R@{k}':>7}" for k in ks)
+    print(f"{'config':<26}{'index MB':>10}{'B/vector':>10}{'build s':>9}{'query ms':>10}{'speedup':>9}{quality}")
+    for r in results:
+        quality = "".join(f"{r.nn_recall[k]:>8.3f}{r.page_recall[k]:>7.2f}" for k in ks)
+        print(f"{r.config:<26}{r.index_mb:>10.2f}{r.bytes_per_vector:>10}{r.build_s:>9.2f}{r.query_p50_ms:>10.3f}{r.speedup:>8.1f}x{quality}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Quantised / truncated vector index benchmark.")
+    parser.add_argument("pdfs", nargs = "*", type = Path, default = None, help = f"PDFs to index (default: {CORPUS}/*.pdf).")
+    parser.add_argument("--dims", nargs = "+", type = int, default = None, help = "Truncated dimensions (full precision is always run).")
+    parser.add_argument("--dtypes", nargs = "+", default = ["float32", "float16", "int8"])
+    parser.add_argument("--rescore", nargs = "+", type = int, default = [0, 4], help = "Re-score factors (0: off).")
+    parser.add_argument("--k", nargs = "+", type = int, default = list(DEFAULT_K))
+    parser.add_argument("--repeat", type = int, default = 5, help = "Timed passes over the queries.")
+    parser.add_argument("--distractors", type = int, default = 0, help = "Random vectors added to every index.")
+    parser.add_argument("--embeddings", choices = ("fake", "openai"), default = "fake")
+    parser.add_argument("--dim", type = int, default = 1536, help = "Fake embedding size.")
+    parser.add_argument("--fields", type = Path, default = REPO_ROOT / "prompts" / "fields")
+    parser.add_argument("--gold", type = Path, default = GOLD, help = "Gold pages overriding the YAML labels, as in bench_chunking.py.")
+    parser.add_argument("--json", type = Path, default = None, help = "Also write the results to this file.")
+    args = parser.parse_args()
+
+    from vector_quantization import QuantizationConfig, build_index, search
+
+    pdfs = args.pdfs or sorted(CORPUS.glob("*.pdf"))
+    queries = load_gold(args.fields, read_overrides(args.gold), documents = pdfs)
+    if not pdfs or not queries:
+        sys.exit(f"Nothing to evaluate: {len(pdfs)} PDFs, {len(queries)} fields with gold pages in them.")
+
+    if args.embeddings == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        from simple_rag import load_env
+
+        load_env()
+        embeddings = OpenAIEmbeddings(model = "text-embedding-3-small")
+    else:
+        embeddings = FakeEmbeddings(dim = args.dim)
+
+    try:
+        strategy = build_strategies([1000], [120], [STRATEGY])[0]
+        corpus = load_corpus(pdfs, {strategy.parser})
+        chunks = [c for pdf, parsed in corpus.items() for c in strategy.split(pdf, parsed[strategy.parser])]
+        vectors, query_vectors = embed_corpus(chunks, queries, embeddings)
+    except ImportError as e:
+        sys.exit(f"Missing dependency: {e.name or e}")
+    pages = [chunk_pages(c) for c in chunks]
+    if args.distractors:
+        vectors = np.vstack([vectors, distractors(args.distractors, vectors.shape[1])])
+    dim = vectors.shape[1]
+    print(f"{len(chunks)} chunks + {args.distractors} distractors, {dim} dims, {len(queries)} queries\n")
+
+    # Reference: exact full-precision search
+    full = QuantizationConfig(rescore = 0)
+    exact_index = build_index(vectors, full)
+    exact_ids = [search(exact_index, q, max(args.k), full)[0] for q in query_vectors]
+
+    dims = [None] + [d for d in (args.dims or DEFAULT_DIMS) if d and d < dim]
+    configs = [full] + [
+        QuantizationConfig(dims = d, dtype = dtype, rescore = rescore)
+        for d in dims for dtype in args.dtypes for rescore in args.rescore
+        if not (d is None and dtype == "float32")  # The reference itself, or re-scoring it
+    ]
+    results = [run_config(c, vectors, query_vectors, exact_ids, pages, queries, args.k, args.repeat) for c in configs]
+    baseline = results[0].query_p50_ms
+    for r in results:
+        r.speedup = round(baseline / r.query_p50_ms, 2) if r.query_p50_ms else 0.0
+
+    print_results(results, args.k)
+    if args.json:
+        args.json.write_text(json.dumps([asdict(r) for r in results], indent = 2), encoding = "utf-8")
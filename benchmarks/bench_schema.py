@@ -0,0 +1,118 @@
+"""
+Microbenchmark of the schema.py output validation on large synthetic tables.
+
+Compares the previous per-response path (`model_validate_json` + `model_dump_json(indent=4)`)
+with `schema_validation.validate_output` in every mode, plus the compact dump used off-terminal.
+For tables it also compares `pd.DataFrame(rows)` with the columnar form (`table_columns`).
+
+Usage:
+    python benchmarks/bench_schema.py --rows 10 1000 20000 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from schema import OutputNumericField, OutputTableField  # noqa: E402
+from schema_validation import dump_output, validate_output  # noqa: E402
+from table_columns import ColumnarTable  # noqa: E402
+
+
+def synthetic_table_payload(n_rows: int, n_columns: int = 6, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    columns = ["metric", "value", "unit", "currency", "period", "scope"][:n_columns]
+    rows = [
+        [f"metric_{i}", f"{rng.uniform(-1e9, 1e9):.2f}", rng.choice(["", "pct", "x"]), rng.choice(["EUR", "USD", ""]),
+         str(2020 + i % 5), rng.choice(["consolidated", "standalone"])][:n_columns]
+        for i in range(n_rows)
+    ]
+    return json.dumps({
+        "text_source": [
+            {"text": f"Source snippet {i} ...", "chunk_id": f"chunk_{i}", "chunk_document": "Annual Report.pdf", "chunk_page": [i + 1]}
+            for i in range(5)
+        ],
+        "justification": "Synthetic benchmark payload.",
+        "synonyms_found": ["a", "b", "c"],
+        "result_field": {"columns": columns, "rows": rows},
+    })
+
+
+def numeric_payload() -> str:
+    return json.dumps({
+        "text_source": [{"text": "Unhedged debt EUR 54.0 million", "chunk_id": "chunk_12", "chunk_document": "AR.pdf", "chunk_page": [14]}],
+        "justification": "Synthetic.",
+        "synonyms_found": ["unhedged"],
+        "result_field": {"value": 54000000, "unit": None, "currency": "EUR"},
+    })
+
+
+def timeit(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"median_ms": statistics.median(samples) * 1000, "min_ms": min(samples) * 1000}
+
+
+def run(rows: List[int], repeat: int) -> List[Dict[str, object]]:
+    results = []
+    cases = [("numeric", OutputNumericField, numeric_payload())]
+    cases += [(f"table_{n}", OutputTableField, synthetic_table_payload(n)) for n in rows]
+
+    for name, schema, raw in cases:
+        validated = validate_output(raw, schema)
+        parsed = json.loads(raw)
+
+        benchmarks = {
+            "previous (validate + dump indent=4)": lambda: schema.model_validate_json(raw).model_dump_json(indent = 4),
+            "model_validate_json": lambda: schema.model_validate_json(raw),
+            "validate_output lax": lambda: validate_output(raw, schema),
+            "validate_output strict": lambda: validate_output(raw, schema, mode = "strict"),
+            "validate_output fast (dict)": lambda: validate_output(parsed, schema, mode = "fast"),
+            "dump compact (off-tty)": lambda: dump_output(validated),
+            "dump pretty (tty)": lambda: dump_output(validated, pretty = True),
+        }
+        if schema is OutputTableField:
+            import pandas as pd
+
+            table = validated.result_field
+            columnar = ColumnarTable.from_field(table)
+            benchmarks.update({
+                "pd.DataFrame(rows)": lambda: pd.DataFrame(table.rows, columns = table.columns),
+                "columnar from_field (parse numbers)": lambda: ColumnarTable.from_field(table),
+                "columnar from_field (raw only)": lambda: ColumnarTable.from_field(table, parse_numbers = False),
+                "columnar to_dataframe": lambda: columnar.to_dataframe(),
+                "columnar to_field": lambda: columnar.to_field(),
+            })
+            results.append({"case": name, "bench": "memory rows (list of str)", "bytes": rows_nbytes(table.rows)})
+            results.append({"case": name, "bench": "memory columnar (arrow)", "bytes": columnar.nbytes})
+
+        for label, fn in benchmarks.items():
+            results.append({"case": name, "bench": label, **timeit(fn, repeat)})
+    return results
+
+
+def rows_nbytes(rows: List[List[str]]) -> int:
+    return sys.getsizeof(rows) + sum(sys.getsizeof(row) + sum(map(sys.getsizeof, row)) for row in rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Schema validation microbenchmark.")
+    parser.add_argument("--rows", type = int, nargs = "+", default = [10, 1000, 20000])
+    parser.add_argument("--repeat", type = int, default = 5)
+    args = parser.parse_args()
+
+    for row in run(args.rows, args.repeat):
+        if "bytes" in row:
+            print(f"{row['case']:<12} {row['bench']:<38} {row['bytes'] / 1e6:>10.3f} MB")
+            continue
+        print(f"{row['case']:<12} {row['bench']:<38} {row['median_ms']:>10.3f} ms (min {row['min_ms']:.3f})")
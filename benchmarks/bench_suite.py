@@ -0,0 +1,449 @@
+"""
+End-to-end offline benchmark suite for the hot paths, with a stored baseline to catch regressions.
+
+Stages (each reports throughput, p50/p95 latency and peak traced memory):
+    pdf.ingest[synthetic|real]  `ingestion.ingestion_workflow_pdf` (load, split, embed, FAISS build)
+    pdf.parse[pypdf|layout:...] parsing + chunking only: PyPDFLoader + tiktoken splitter vs
+                                `pdf_layout.load_layout_documents`, on a synthetic PDF with tables
+    pdf.parse[...+cache:...]    the same, reading the pages from `parsed_cache` (re-split only)
+    faiss.search                similarity search over the ingested chunks, one sample per query
+    prompt.render               `load_prompts("extraction", ...)` for every field YAML
+    prompt.user                 `common/user` template with the retrieved chunks
+    schema.validate[table|numeric]  `schema_validation.validate_output`
+    rag.flow                    retrieval + prompts + chat model + validation, as in simple_rag
+    rag.retrieval_with_answer   `simple_rag.retrieval_with_answer` itself
+
+Everything runs offline: embeddings are `fakes.FakeEmbeddings` (deterministic) and the chat model is
+`fakes.FakeChatModel` with `--llm-latency`. Stages whose dependencies are not installed are
+reported as skipped. Peak memory comes from a separate tracemalloc pass, so timings are not
+slowed down by tracing.
+
+Usage:
+    python benchmarks/bench_suite.py                              # run + compare with the baseline
+    python benchmarks/bench_suite.py --save-baseline              # store the current numbers
+    python benchmarks/bench_suite.py --stages prompt schema --repeat 20 --json results.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+os.chdir(REPO_ROOT)  # Prompt and field paths are relative to the repository root
+
+from fakes import FakeChatModel, FakeEmbeddings, offline_backends, synthetic_pdf  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+REAL_PDF = Path("annual_reports/cuentas-anuales-consolidadas.pdf")
+DEFAULT_TOLERANCE = 0.25  # Allowed slowdown / memory growth over the baseline
+
+
+@dataclass
+class StageResult:
+    stage: str
+    unit: str
+    samples: int = 0
+    throughput: Optional[float] = None   # units per second
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    peak_mb: Optional[float] = None
+    skipped: Optional[str] = None
+
+
+class Stage:
+    """
+    A benchmarked operation. `setup()` returns the list of inputs; `run(item)` is one sample and
+    returns the number of units it processed (pages, queries, prompts...).
+    """
+
+    def __init__(self, name: str, unit: str, setup: Callable[[], List[Any]], run: Callable[[Any], float]):
+        self.name, self.unit, self.setup, self.run = name, unit, setup, run
+
+    def measure(self, repeat: int, warmup: int = 1) -> StageResult:
+        try:
+            items = self.setup()
+        except ImportError as e:
+            return StageResult(self.name, self.unit, skipped = f"missing dependency: {e.name or e}")
+
+        for item in items[:warmup]:
+            self.run(item)
+
+        latencies, units = [], 0.0
+        for _ in range(repeat):
+            for item in items:
+                start = time.perf_counter()
+                units += self.run(item)
+                latencies.append(time.perf_counter() - start)
+
+        # Separate pass for memory: tracemalloc slows allocations down
+        tracemalloc.start()
+        for item in items:
+            self.run(item)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return StageResult(
+            stage      = self.name,
+            unit       = self.unit,
+            samples    = len(latencies),
+            throughput = round(units / sum(latencies), 3) if sum(latencies) else None,
+            p50_ms     = round(percentile(latencies, 50) * 1000, 3),
+            p95_ms     = round(percentile(latencies, 95) * 1000, 3),
+            peak_mb    = round(peak / 2**20, 3),
+        )
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    pos = (len(ordered) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+# ======================================================================================
+# Shared fixtures
+# ======================================================================================
+class Fixtures:
+    def __init__(self, workdir: Path, pages: int, llm_latency: float, k: int):
+        self.workdir = workdir
+        self.pages = pages
+        self.llm_latency = llm_latency
+        self.k = k
+        self._store = None
+
+    @property
+    def synthetic_pdf(self) -> Path:
+        path = self.workdir / "synthetic.pdf"
+        if not path.exists():
+            synthetic_pdf(path, pages = self.pages)
+        return path
+
+    @property
+    def tables_pdf(self) -> Path:
+        path = self.workdir / "synthetic_tables.pdf"
+        if not path.exists():
+            synthetic_pdf(path, pages = self.pages, tables_per_page = 2)
+        return path
+
+    def field_names(self) -> List[str]:
+        from prompts.prompts_loader import BASE_FIELDS
+
+        return sorted(p.stem for p in BASE_FIELDS.glob("*.yaml"))
+
+    def field_info(self, name: str) -> Dict[str, Any]:
+        from prompts.prompts_loader import BASE_FIELDS, load_yaml
+
+        return load_yaml(BASE_FIELDS / f"{name}.yaml")
+
+    def vector_store(self):
+        """
+        FAISS index over the synthetic PDF chunks (built once, fake embeddings).
+        """
+        if self._store is None:
+            from langchain_community.document_loaders import PyPDFLoader
+            from langchain_community.vectorstores import FAISS
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+            splitter = RecursiveCharacterTextSplitter(chunk_size = 1000, chunk_overlap = 120)
+            chunks = splitter.split_documents(PyPDFLoader(str(self.synthetic_pdf)).load())
+            self._store = FAISS.from_documents(chunks, FakeEmbeddings())
+        return self._store
+
+
+# ======================================================================================
+# Stages
+# ======================================================================================
+def ingest_stage(fx: Fixtures, label: str, pdf: Callable[[], Path]) -> Stage:
+    def setup() -> List[Path]:
+        os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")  # ingestion reads it at import
+        import ingestion  # noqa: F401
+        path = pdf()
+        if not path.exists():
+            raise FileNotFoundError(path)
+        return [path]
+
+    def run(path: Path) -> float:
+        from unittest import mock
+
+        import ingestion
+
+        with mock.patch.object(ingestion, "OpenAIEmbeddings", lambda *a, **k: FakeEmbeddings()):
+            with tempfile.TemporaryDirectory(dir = fx.workdir) as index_dir:
+                store = ingestion.ingestion_workflow_pdf(
+                    [str(path)], index_dir = str(Path(index_dir) / "index"), parsed_cache = False
+                )
+        return len({d.metadata.get("page") for d in store.docstore._dict.values()})
+
+    return Stage(f"pdf.ingest[{label}]", "pages", setup, run)
+
+
+def parse_stage(fx: Fixtures, label: str, loader: str, pdf: Callable[[], Path], cached: bool = False) -> Stage:
+    """
+    Parse + chunk a PDF with the current loader ("pypdf") or the layout-aware one ("layout").
+    `cached`: pages come from a ParsedDocumentCache (filled by the warmup run), so only chunking
+    is timed.
+    """
+    cache = None
+    def setup() -> List[Path]:
+        if loader == "layout":
+            from pdf_layout import parse_pdf  # noqa: F401
+            try:
+                import pymupdf  # noqa: F401
+            except ImportError:
+                import fitz  # noqa: F401
+        else:
+            from langchain_community.document_loaders import PyPDFLoader  # noqa: F401
+        path = pdf()
+        if not path.exists():
+            raise FileNotFoundError(path)
+        if cached:
+            from parsed_cache import ParsedDocumentCache
+
+            nonlocal cache
+            cache = ParsedDocumentCache(fx.workdir / "parsed")
+        return [path]
+
+    def run(path: Path) -> float:
+        if loader == "layout":
+            from pdf_layout import load_layout_documents
+
+            docs = load_layout_documents(path, pages = cache.layout(path) if cache else None)
+        else:
+            from langchain_community.document_loaders import PyPDFLoader
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+            splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+                separators = ["\n\n", "\n", ". ", " ", ""], chunk_size = 1000, chunk_overlap = 120,
+            )
+            pages = cache.documents(path) if cache else PyPDFLoader(str(path)).load()
+            docs = splitter.split_documents(pages)
+        return len({d.metadata.get("page") for d in docs})
+
+    return Stage(f"pdf.parse[{loader}{'+cache' if cached else ''}:{label}]", "pages", setup, run)
+
+
+def faiss_stage(fx: Fixtures) -> Stage:
+    def setup() -> List[str]:
+        fx.vector_store()
+        return [fx.field_info(name)["retrieval_keywords"] for name in fx.field_names()]
+
+    def run(query: str) -> float:
+        fx.vector_store().similarity_search(query, k = fx.k)
+        return 1
+
+    return Stage("faiss.search", "queries", setup, run)
+
+
+def prompt_render_stage(fx: Fixtures) -> Stage:
+    def setup() -> List[str]:
+        from prompts.prompts_loader import load_prompts  # noqa: F401
+        return fx.field_names()
+
+    def run(name: str) -> float:
+        from prompts.prompts_loader import load_prompts
+
+        return len(load_prompts("extraction", field_name = name))
+
+    return Stage("prompt.render", "prompts", setup, run)
+
+
+def prompt_user_stage(fx: Fixtures) -> Stage:
+    def setup() -> List[str]:
+        from simple_rag import chunk_line
+
+        docs = fx.vector_store().similarity_search(fx.field_info(fx.field_names()[0])["retrieval_keywords"], k = fx.k)
+        return ["\n".join(chunk_line(doc, i) for i, doc in enumerate(docs))]
+
+    def run(chunks: str) -> float:
+        from prompts.prompts_engine import PromptOrchestrator
+
+        PromptOrchestrator.get_prompt("common/user", user_type = "extract", chunks = chunks)
+        return 1
+
+    return Stage("prompt.user", "prompts", setup, run)
+
+
+def schema_stage(kind: str) -> Stage:
+    def setup() -> List[Any]:
+        from bench_schema import numeric_payload, synthetic_table_payload
+        from schema import OutputNumericField, OutputTableField
+
+        if kind == "table":
+            return [(synthetic_table_payload(1000), OutputTableField)]
+        return [(numeric_payload(), OutputNumericField)] * 50
+
+    def run(item: Any) -> float:
+        from schema_validation import validate_output
+
+        payload, schema = item
+        validate_output(payload, schema)
+        return 1
+
+    return Stage(f"schema.validate[{kind}]", "payloads", setup, run)
+
+
+def rag_flow_stage(fx: Fixtures) -> Stage:
+    """
+    The steps of `simple_rag.retrieval_with_answer` with the current prompt catalog.
+    """
+    chat = FakeChatModel(latency = fx.llm_latency)
+
+    def setup() -> List[str]:
+        fx.vector_store()
+        return fx.field_names()
+
+    def run(name: str) -> float:
+        from prompts.prompts_engine import PromptOrchestrator
+        from prompts.prompts_loader import load_prompts
+        from schema import OutputStringField
+        from schema_validation import validate_output
+        from simple_rag import chunk_line
+
+        prompts = load_prompts("extraction", field_name = name)
+        system_prompt = prompts.get("extract_quantitative") or prompts["extract_qualitative"]
+        docs = fx.vector_store().similarity_search(fx.field_info(name)["retrieval_keywords"], k = fx.k)
+        chunks = "\n".join(chunk_line(doc, i) for i, doc in enumerate(docs))
+        user_prompt = PromptOrchestrator.get_prompt("common/user", user_type = "extract", chunks = chunks)
+        response = chat.invoke([{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}])
+        validate_output(response.content, OutputStringField)
+        return 1
+
+    return Stage("rag.flow", "fields", setup, run)
+
+
+def rag_function_stage(fx: Fixtures) -> Stage:
+    chat = FakeChatModel(latency = fx.llm_latency)
+
+    def setup() -> List[Dict[str, Any]]:
+        import simple_rag  # noqa: F401
+        fx.vector_store()
+        return [fx.field_info(name) for name in fx.field_names()]
+
+    def run(field_info: Dict[str, Any]) -> float:
+        from simple_rag import retrieval_with_answer
+
+        with offline_backends(vector_store = fx.vector_store(), chat = chat):
+            retrieval_with_answer(field_info = field_info, field_type = "qualitative", k_docs = fx.k)
+        return 1
+
+    return Stage("rag.retrieval_with_answer", "fields", setup, run)
+
+
+def build_stages(fx: Fixtures, real_pdf: bool) -> List[Stage]:
+    stages = [ingest_stage(fx, "synthetic", lambda: fx.synthetic_pdf)]
+    if real_pdf:
+        stages.append(ingest_stage(fx, "real", lambda: REAL_PDF))
+    for loader in ("pypdf", "layout"):
+        for cached in (False, True):
+            stages.append(parse_stage(fx, "tables", loader, lambda: fx.tables_pdf, cached))
+            if real_pdf:
+                stages.append(parse_stage(fx, "real", loader, lambda: REAL_PDF, cached))
+    return stages + [
+        faiss_stage(fx),
+        prompt_render_stage(fx),
+        prompt_user_stage(fx),
+        schema_stage("table"),
+        schema_stage("numeric"),
+        rag_flow_stage(fx),
+        rag_function_stage(fx),
+    ]
+
+
+# ======================================================================================
+# Baseline
+# ======================================================================================
+def load_baseline(path: Path) -> Dict[str, Dict[str, Any]]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding = "utf-8")).get("stages", {})
+
+
+def save_baseline(path: Path, results: Iterable[StageResult], meta: Dict[str, Any]) -> None:
+    stages = {r.stage: asdict(r) for r in results if r.skipped is None}
+    path.write_text(json.dumps({"meta": meta, "stages": stages}, indent = 2), encoding = "utf-8")
+
+
+def compare(result: StageResult, baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Regressions of `result` against its baseline entry (p50, p95 and peak memory).
+    """
+    problems = []
+    for metric in ("p50_ms", "p95_ms", "peak_mb"):
+        before, after = baseline.get(metric), getattr(result, metric)
+        if before and after is not None and after > before * (1 + tolerance):
+            problems.append(f"{metric} {before:.2f} -> {after:.2f} (+{(after / before - 1) * 100:.0f}%)")
+    return problems
+
+
+def print_results(results: List[StageResult], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> int:
+    print(f"{'stage':<30}{'samples':>8}{'throughput':>24}{'p50 ms':>11}{'p95 ms':>11}{'peak MB':>10}  vs baseline")
+    regressions = 0
+    for r in results:
+        if r.skipped:
+            print(f"{r.stage:<30}  skipped ({r.skipped})")
+            continue
+        status = "n/a"
+        if r.stage in baseline:
+            problems = compare(r, baseline[r.stage], tolerance)
+            regressions += bool(problems)
+            status = "REGRESSION " + "; ".join(problems) if problems else f"ok (p50 {baseline[r.stage]['p50_ms']:.2f} ms)"
+        throughput = f"{r.throughput:,.1f} {r.unit}/s" if r.throughput is not None else "-"
+        print(f"{r.stage:<30}{r.samples:>8}{throughput:>24}{r.p50_ms:>11.2f}{r.p95_ms:>11.2f}{r.peak_mb:>10.2f}  {status}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Offline end-to-end benchmark suite.")
+    parser.add_argument("--stages", nargs = "+", default = None, help = "Stage name prefixes to run (default: all).")
+    parser.add_argument("--repeat", type = int, default = 5, help = "Passes over the inputs of each stage.")
+    parser.add_argument("--pages", type = int, default = 40, help = "Pages of the synthetic PDF.")
+    parser.add_argument("--k", type = int, default = 15, help = "Chunks retrieved per query.")
+    parser.add_argument("--llm-latency", type = float, default = 0.05, help = "FakeChatModel latency per call (s).")
+    parser.add_argument("--no-real-pdf", action = "store_true", help = f"Skip ingestion of {REAL_PDF}.")
+    parser.add_argument("--baseline", type = Path, default = BASELINE_PATH)
+    parser.add_argument("--save-baseline", action = "store_true")
+    parser.add_argument("--tolerance", type = float, default = DEFAULT_TOLERANCE)
+    parser.add_argument("--json", type = Path, default = None, help = "Also write the results to this file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fx = Fixtures(Path(tmp), pages = args.pages, llm_latency = args.llm_latency, k = args.k)
+        stages = [
+            s for s in build_stages(fx, real_pdf = not args.no_real_pdf)
+            if not args.stages or any(s.name.startswith(prefix) for prefix in args.stages)
+        ]
+        results = []
+        for stage in stages:
+            try:
+                results.append(stage.measure(args.repeat))
+            except ImportError as e:
+                results.append(StageResult(stage.name, stage.unit, skipped = f"missing dependency: {e.name or e}"))
+            except Exception as e:
+                results.append(StageResult(stage.name, stage.unit, skipped = f"{type(e).__name__}: {e}"))
+
+    meta = {"python": platform.python_version(), "machine": platform.machine(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    if args.json:
+        args.json.write_text(json.dumps({"meta": meta, "stages": [asdict(r) for r in results]}, indent = 2), encoding = "utf-8")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, meta)
+        print_results(results, {}, args.tolerance)
+        print(f"\nBaseline saved to {args.baseline}")
+        sys.exit(0)
+
+    regressions = print_results(results, load_baseline(args.baseline), args.tolerance)
+    sys.exit(1 if regressions else 0)
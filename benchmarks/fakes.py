@@ -0,0 +1,204 @@
+"""
+Offline stand-ins for the external services used by the pipelines, for reproducible benchmarks.
+
+- `FakeEmbeddings`: deterministic hashed bag-of-words vectors (same text -> same vector in every
+  process), optional latency per call. A LangChain `Embeddings` when langchain_core is installed.
+- `FakeChatModel`: `invoke` / `stream` with a fixed structured answer and configurable latency,
+  as returned by `init_chat_model`.
+- `synthetic_pdf`: writes a text PDF with the given number of pages, optionally with borderless
+  financial tables (aligned columns of figures), without any PDF library.
+- `offline_backends`: patches OpenAI embeddings, the chat model factory and `FAISS.load_local` so
+  `simple_rag.retrieval_with_answer` runs without network or a `vector_index` folder.
+"""
+from __future__ import annotations
+
+import json
+import random
+import re
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    from langchain_core.embeddings import Embeddings as _EmbeddingsBase
+except ImportError:
+    _EmbeddingsBase = object
+
+EMBEDDING_DIM = 256
+
+_TOKEN_RE = re.compile(r"\w+")
+
+VOCABULARY = (
+    "deuda financiera neta ebitda flujo caja operativo tipos interés sensibilidad inflación divisa "
+    "cobertura derivados vencimientos bonos préstamos sindicados liquidez capital circulante ingresos "
+    "regulados tarifa coste medio ejercicio consolidado sociedad dominante riesgo mercado crédito "
+    "rating apalancamiento dividendos inversiones amortización provisiones patrimonio neto resultado"
+).split()
+
+
+class FakeEmbeddings(_EmbeddingsBase):
+    """
+    Args:
+        dim: Vector size.
+        latency: Seconds slept per call (simulates the embeddings API round trip).
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, latency: float = 0.0, **_: Any):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype = np.float32)
+        for token in _TOKEN_RE.findall(text.lower()):
+            h = zlib.crc32(token.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+FAKE_ANSWER = {
+    "text_source": [
+        {"text": "Los ingresos regulados se actualizan con el IPC ...", "chunk_id": "chunk_1", "chunk_document": "synthetic.pdf", "chunk_page": [3]},
+        {"text": "La deuda financiera neta asciende a 54 millones de euros ...", "chunk_id": "chunk_2", "chunk_document": "synthetic.pdf", "chunk_page": [7]},
+    ],
+    "justification": "Respuesta sintética del modelo de benchmark.",
+    "synonyms_found": ["sensibilidad a tipos", "IPC"],
+    "result_field": {"text": "Sensibilidad moderada del flujo de caja operativo a los tipos de interés."},
+}
+
+
+class FakeChatModel:
+    """
+    Args:
+        latency: Seconds until the full answer (split evenly across chunks when streaming).
+        answer: Structured answer returned as JSON content.
+        chunk_size: Characters per streamed chunk.
+    """
+
+    def __init__(self, latency: float = 0.05, answer: Optional[dict] = None, chunk_size: int = 16, **_: Any):
+        self.latency = latency
+        self.content = json.dumps(answer or FAKE_ANSWER, ensure_ascii = False)
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def _usage(self, messages: List[dict]) -> dict:
+        input_chars = sum(len(m.get("content") or "") for m in messages)
+        return {"input_tokens": input_chars // 4, "output_tokens": len(self.content) // 4}
+
+    def invoke(self, messages: List[dict]) -> Any:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(content = self.content, usage_metadata = self._usage(messages))
+
+    def stream(self, messages: List[dict]) -> Iterator[Any]:
+        self.calls += 1
+        pieces = [self.content[i:i + self.chunk_size] for i in range(0, len(self.content), self.chunk_size)]
+        for piece in pieces:
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            yield SimpleNamespace(content = piece)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+TABLE_ROWS = 8
+
+
+def _table_ops(rng: random.Random, top: float) -> str:
+    # Header + rows at absolute positions: label column, two right-aligned-ish figure columns
+    cells = [(40, top, "Millones de euros"), (380, top, "2024"), (460, top, "2023")]
+    for r in range(TABLE_ROWS):
+        y = top - 11 * (r + 1)
+        label = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(2, 3))).capitalize()
+        cells += [(40, y, label), (372, y, f"{rng.randint(1, 9)}.{rng.randint(0, 999):03d}"), (452, y, f"({rng.randint(10, 999)})")]
+    return " ".join(f"1 0 0 1 {x} {y} Tm ({_pdf_escape(text)}) Tj" for x, y, text in cells)
+
+
+def synthetic_pdf(path: Path, pages: int = 20, lines_per_page: int = 45, seed: int = 0, tables_per_page: int = 0) -> Path:
+    """
+    Write a text-only PDF (Helvetica, Latin-1) of random financial-report sentences, with up to
+    two tables of TABLE_ROWS rows per page below the text (`tables_per_page`).
+    """
+    rng = random.Random(seed)
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # Filled once the page tree id is known
+    page_tree = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    page_ids = []
+    for page in range(pages):
+        lines = [
+            f"{page + 1}.{i + 1} " + " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 14)))
+            for i in range(lines_per_page)
+        ]
+        text = " T* ".join(f"({_pdf_escape(line)}) Tj" for line in lines)
+        tables = " ".join(_table_ops(rng, 280 - 120 * t) for t in range(min(tables_per_page, 2)))
+        stream = f"BT /F1 9 Tf 11 TL 40 800 Td {text} {tables} ET".encode("latin-1", "replace")
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (page_tree, content, font)
+        ))
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % page_tree
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[page_tree - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+
+    path = Path(path)
+    path.parent.mkdir(parents = True, exist_ok = True)
+    path.write_bytes(bytes(out))
+    return path
+
+
+@contextmanager
+def offline_backends(vector_store: Any = None, chat: Optional[FakeChatModel] = None, embeddings_latency: float = 0.0):
+    """
+    Patch the OpenAI embeddings and chat model factory (and `FAISS.load_local` when a prebuilt
+    `vector_store` is given) for the duration of the block. Requires the LangChain packages.
+    """
+    from unittest import mock
+
+    chat = chat or FakeChatModel()
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch(
+            "langchain_openai.OpenAIEmbeddings", lambda *a, **k: FakeEmbeddings(latency = embeddings_latency)
+        ))
+        stack.enter_context(mock.patch("langchain.chat_models.init_chat_model", lambda *a, **k: chat))
+        if vector_store is not None:
+            stack.enter_context(mock.patch(
+                "langchain_community.vectorstores.faiss.FAISS.load_local", lambda *a, **k: vector_store
+            ))
+        yield chat
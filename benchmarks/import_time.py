@@ -0,0 +1,130 @@
+"""
+Import-time benchmark based on `python -X importtime`.
+
+Usage:
+    python benchmarks/import_time.py                          # simple_rag and generate, current tree
+    python benchmarks/import_time.py --ref baseline --runs 5  # also measure the same modules at a git ref
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODULES = ("simple_rag", "generate")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(module: str, cwd: Path) -> Tuple[Optional[int], List[Tuple[int, str]], str]:
+    """
+    Import `module` in a fresh interpreter.
+
+    Returns:
+        (cumulative microseconds of the module or None if the import failed,
+         list of (cumulative us, package) for the direct imports of `module`, error tail)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd            = cwd,
+        capture_output = True,
+        text           = True,
+    )
+
+    # Children are printed before their parent, so direct imports of `module` are the
+    # indented lines between the previous top-level line and the module's own line
+    total = None
+    children, pending = [], []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        cumulative, indent, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        if indent == 3:
+            pending.append((cumulative, name))
+        elif indent == 1:
+            if name == module:
+                total = cumulative
+                children = pending
+            pending = []
+
+    error = ""
+    if proc.returncode != 0:
+        total = None
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+
+    return total, sorted(children, reverse = True), error
+
+
+def export_ref(ref: str, target: Path) -> None:
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", ref],
+        cwd            = REPO_ROOT,
+        capture_output = True,
+        check          = True,
+    ).stdout
+    with tarfile.open(fileobj = BytesIO(archive)) as tar:
+        tar.extractall(target)
+
+
+def run(modules, cwd: Path, runs: int) -> Dict[str, Dict[str, object]]:
+    results = {}
+    for module in modules:
+        samples, top, error = [], [], ""
+        for _ in range(runs):
+            total, top, error = measure_import(module, cwd)
+            if total is None:
+                break
+            samples.append(total)
+        results[module] = {
+            "median_ms": statistics.median(samples) / 1000 if samples else None,
+            "top": top[:8],
+            "error": error,
+        }
+    return results
+
+
+def print_results(label: str, results: Dict[str, Dict[str, object]]) -> None:
+    print(f"== {label} ==")
+    for module, res in results.items():
+        if res["median_ms"] is None:
+            print(f"{module:<14} import failed: {res['error']}")
+            continue
+        print(f"{module:<14} {res['median_ms']:>9.1f} ms (median)")
+        for cumulative, name in res["top"]:
+            print(f"    {cumulative / 1000:>9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Measure module import time with -X importtime.")
+    parser.add_argument("modules", nargs = "*", default = list(DEFAULT_MODULES))
+    parser.add_argument("--runs", type = int, default = 3)
+    parser.add_argument("--ref", default = None, help = "Git ref to compare against (e.g. a commit before lazy imports).")
+    args = parser.parse_args()
+
+    current = run(args.modules, REPO_ROOT, args.runs)
+    print_results("working tree", current)
+
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            export_ref(args.ref, Path(tmp))
+            previous = run(args.modules, Path(tmp), args.runs)
+        print()
+        print_results(args.ref, previous)
+
+        print()
+        print("== gain ==")
+        for module in args.modules:
+            before, after = previous[module]["median_ms"], current[module]["median_ms"]
+            if before is None or after is None:
+                print(f"{module:<14} n/a (import failed in one of the trees)")
+            else:
+                print(f"{module:<14} {before:>9.1f} ms -> {after:>7.1f} ms ({before / max(after, 1e-9):.1f}x)")
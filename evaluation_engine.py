@@ -0,0 +1,317 @@
+"""
+Evaluation engine for subfactor questions (`prompts/subfactors/*.yaml`).
+
+- Renders the prompts with `load_prompts("evaluation", ...)`: one `premises_evaluation_prompts`
+  entry per premise plus the `consolidate_prompt`.
+- Resolves the `fields` of every premise from already computed extraction results (a mapping or a
+  callable field alias -> result, e.g. `ResultStore.field_results(company)`), so no extraction is
+  re-run here.
+- Evaluates all premises concurrently in a bounded thread pool (LLM calls are I/O bound), then runs
+  the consolidation with the premise answers in the YAML order.
+- Responses are cached by (system prompt, user prompt) hash, and every step is timed.
+
+Any object with `llm_response(system_prompt, user_prompt) -> str` (e.g. `RatingCalculatorLm`) or a
+plain callable with the same signature can be used as LLM. `FakeLLM` allows dry runs:
+
+    python evaluation_engine.py question_17 --fake --workers 5
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Union
+
+from prompts.prompts_engine import PromptOrchestrator
+from prompts.prompts_loader import BASE_QUESTIONS, load_prompts, load_yaml
+
+DEFAULT_WORKERS = 4
+MISSING_FIELD = "N/A"
+
+FieldSource = Union[Mapping[str, Any], Callable[[str], Any]]
+
+
+@dataclass
+class PremiseResult:
+    premise_id: str
+    fields: List[str]
+    missing_fields: List[str] = field(default_factory = list)
+    answer: Optional[str] = None
+    explanation: Optional[str] = None
+    raw: Optional[str] = None
+    seconds: float = 0.0
+    cached: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_history(self) -> Dict[str, Any]:
+        return {"answer": self.answer, "explanation": self.explanation}
+
+
+@dataclass
+class EvaluationResult:
+    question: str
+    premises: Dict[str, PremiseResult]
+    consolidation: Dict[str, Any]
+    consolidation_seconds: float = 0.0
+    consolidation_cached: bool = False
+    seconds: float = 0.0
+
+    def timings(self) -> Dict[str, Any]:
+        return {
+            "total": round(self.seconds, 4),
+            "premises": {pid: round(p.seconds, 4) for pid, p in self.premises.items()},
+            "premises_serial_sum": round(sum(p.seconds for p in self.premises.values()), 4),
+            "consolidation": round(self.consolidation_seconds, 4),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "question": self.question,
+            "premises": {pid: {**p.__dict__} for pid, p in self.premises.items()},
+            "consolidation": self.consolidation,
+            "timings": self.timings(),
+        }
+
+
+class ResponseCache:
+    """
+    Thread-safe LLM response cache keyed by the hash of (system prompt, user prompt).
+    With `path`, entries are also persisted as one JSON file per key.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self._data: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(system_prompt: str, user_prompt: str) -> str:
+        return hashlib.sha256(f"{system_prompt}\x00{user_prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._data:
+                return self._data[key]
+        if self.path and (self.path / f"{key}.json").exists():
+            value = (self.path / f"{key}.json").read_text(encoding = "utf-8")
+            with self._lock:
+                self._data[key] = value
+            return value
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = value
+        if self.path:
+            self.path.mkdir(parents = True, exist_ok = True)
+            (self.path / f"{key}.json").write_text(value, encoding = "utf-8")
+
+
+class FakeLLM:
+    """
+    Offline LLM for dry runs: waits `latency` seconds and answers with a fixed compliance level.
+    """
+
+    def __init__(self, latency: float = 0.2, answer: str = "High"):
+        self.latency = latency
+        self.answer = answer
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def llm_response(self, system_prompt: str, user_prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return json.dumps({"answer": self.answer, "explanation": f"Fake answer ({len(user_prompt)} chars of evidence)."})
+
+
+def _premise_fields(premise: Mapping[str, Any]) -> List[str]:
+    fields = premise.get("fields") or []
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    return [f.strip() for f in fields if f and str(f).strip()]
+
+
+def _dump(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return value
+
+
+def _parse_answer(raw: str) -> Dict[str, Any]:
+    try:
+        data = json.loads(raw)
+    except (TypeError, json.JSONDecodeError):
+        # Tolerate text around the JSON object (e.g. markdown fences)
+        start, end = raw.find("{"), raw.rfind("}")
+        data = json.loads(raw[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("LLM answer is not a JSON object")
+    return data
+
+
+class EvaluationEngine:
+    """
+    Args:
+        llm: Object with `llm_response(system_prompt, user_prompt)` or a callable with that signature.
+        field_results: Extraction results by field alias (mapping or callable). A missing field is
+            passed to the LLM as "N/A" and reported in `PremiseResult.missing_fields`.
+        max_workers: Max concurrent premise evaluations.
+        cache: Response cache (shared across questions); a fresh in-memory one by default.
+        layout: Prompt layout passed to `load_prompts` ("default" or "prefix_cache").
+    """
+
+    def __init__(
+        self,
+        llm           : Any,
+        field_results : FieldSource,
+        max_workers   : int = DEFAULT_WORKERS,
+        cache         : Optional[ResponseCache] = None,
+        layout        : str = "default",
+    ):
+        self._call = llm.llm_response if hasattr(llm, "llm_response") else llm
+        self.field_results = field_results
+        self.max_workers = max(1, max_workers)
+        self.cache = cache or ResponseCache()
+        self.layout = layout
+
+    def _field_value(self, alias: str) -> Any:
+        if callable(self.field_results):
+            return self.field_results(alias)
+        return self.field_results.get(alias)
+
+    def _complete(self, system_prompt: str, user_prompt: str):
+        """
+        Returns (parsed answer, raw response, cached). Only parseable responses are cached.
+        """
+        key = ResponseCache.key(system_prompt, user_prompt)
+        raw = self.cache.get(key)
+        if raw is not None:
+            return _parse_answer(raw), raw, True
+        raw = self._call(system_prompt, user_prompt)
+        answer = _parse_answer(raw)
+        self.cache.set(key, raw)
+        return answer, raw, False
+
+    def _evaluate_premise(
+        self,
+        premise_id    : str,
+        premise       : Mapping[str, Any],
+        system_prompt : str,
+    ) -> PremiseResult:
+        aliases = _premise_fields(premise)
+        values = {alias: _dump(self._field_value(alias)) for alias in aliases}
+        result = PremiseResult(
+            premise_id     = premise_id,
+            fields         = aliases,
+            missing_fields = [alias for alias, value in values.items() if value is None],
+        )
+        history = json.dumps(
+            {alias: MISSING_FIELD if value is None else value for alias, value in values.items()},
+            ensure_ascii = False,
+            indent       = 2,
+            default      = str,
+        )
+        user_prompt = PromptOrchestrator.get_prompt("common/user", user_type = "evaluate", history = history)
+
+        start = time.perf_counter()
+        try:
+            answer, result.raw, result.cached = self._complete(system_prompt, user_prompt)
+            result.answer = answer.get("answer")
+            result.explanation = answer.get("explanation")
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def evaluate(
+        self,
+        question_name   : Optional[str] = None,
+        evaluation_info : Optional[Mapping[str, Any]] = None,
+        base_questions  : Path = BASE_QUESTIONS,
+    ) -> EvaluationResult:
+        """
+        Evaluate every premise of a question concurrently, then consolidate.
+        """
+        if evaluation_info is None:
+            if not question_name:
+                raise ValueError("Pass question_name or evaluation_info")
+            evaluation_info = load_yaml(Path(base_questions) / f"{question_name}.yaml")
+
+        prompts = load_prompts("evaluation", evaluation_info = evaluation_info, layout = self.layout)
+        premises = evaluation_info.get("premises") or {}
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers = min(self.max_workers, max(1, len(premises)))) as pool:
+            futures = {
+                premise_id: pool.submit(
+                    self._evaluate_premise,
+                    premise_id,
+                    premise,
+                    prompts["premises_evaluation_prompts"][premise_id],
+                )
+                for premise_id, premise in premises.items()
+            }
+            results = {premise_id: future.result() for premise_id, future in futures.items()}
+
+        # Consolidation: answers of the premises that could be evaluated, in YAML order
+        history = json.dumps([r.to_history() for r in results.values() if r.ok], ensure_ascii = False, indent = 2)
+        consolidation: Dict[str, Any] = {}
+        consolidation_start = time.perf_counter()
+        consolidation_cached = False
+        if any(r.ok for r in results.values()):
+            try:
+                consolidation, _, consolidation_cached = self._complete(
+                    prompts["consolidate_prompt"],
+                    PromptOrchestrator.get_prompt("common/user", user_type = "consolidate", history = history),
+                )
+            except Exception as e:
+                consolidation = {"error": f"{type(e).__name__}: {e}"}
+        else:
+            consolidation = {"error": "No premise could be evaluated"}
+        consolidation_seconds = time.perf_counter() - consolidation_start
+
+        return EvaluationResult(
+            question              = str(evaluation_info.get("question_alias") or question_name or ""),
+            premises              = results,
+            consolidation         = consolidation,
+            consolidation_seconds = consolidation_seconds,
+            consolidation_cached  = consolidation_cached,
+            seconds               = time.perf_counter() - start,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Evaluate the premises of a subfactor question.")
+    parser.add_argument("question", help = "Question YAML name, e.g. question_17")
+    parser.add_argument("--fields", default = None, help = "JSON file with extraction results by field alias.")
+    parser.add_argument("--company", default = None, help = "Read the field results of this company from the result store.")
+    parser.add_argument("--workers", type = int, default = DEFAULT_WORKERS)
+    parser.add_argument("--fake", action = "store_true", help = "Use FakeLLM instead of the backend LLM.")
+    parser.add_argument("--latency", type = float, default = 0.2, help = "FakeLLM latency per call (s).")
+    args = parser.parse_args()
+
+    if args.company:
+        from result_store import ResultStore
+        field_results = ResultStore().field_results(args.company)
+    else:
+        field_results = json.loads(Path(args.fields).read_text(encoding = "utf-8")) if args.fields else {}
+
+    if args.fake:
+        llm = FakeLLM(latency = args.latency)
+    else:
+        from aigenrc.llm import RatingCalculatorLm
+        llm = RatingCalculatorLm(output_schema = None)
+
+    engine = EvaluationEngine(llm, field_results, max_workers = args.workers)
+    result = engine.evaluate(args.question)
+    print(json.dumps(result.to_dict(), indent = 2, ensure_ascii = False, default = str))
@@ -0,0 +1,261 @@
+"""
+Deterministic check that the `text_source` citations of an extraction exist in the retrieved chunks.
+
+`EvidenceIndex` is built once per retrieval (normalised chunk text, word n-gram hashes and
+chunk_id / page lookups). `verify()` then checks every `TextSource.text`, `chunk_id` and
+`chunk_page` of an output in milliseconds and returns a `GroundingReport` with a score in [0, 1].
+
+Clearly grounded outputs can skip the LLM critique; citations that are not found in any chunk are
+reported without spending a call.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+NGRAM_SIZE = 5              # Words per shingle
+GROUNDED_COVERAGE = 0.8     # Min share of quote shingles found in the cited chunk
+SKIP_CRITIQUE_SCORE = 0.9   # Min grounding score to consider the LLM critique unnecessary
+
+# Candidate column names of the retrieved-chunks frame, first match wins
+TEXT_COLUMNS = ("chunk_text", "text", "content", "page_content", "chunk")
+ID_COLUMNS = ("chunk_id", "id")
+PAGE_COLUMNS = ("chunk_page", "page", "page_number", "page_label")
+DOCUMENT_COLUMNS = ("chunk_document", "document", "source", "file_name")
+
+_WORD_RE = re.compile(r"\w+")
+_COMBINING_RE = re.compile(r"[\u0300-\u036f]")
+
+
+def normalize_text(text: Any) -> str:
+    """
+    Casefolded, accents removed (NFKD) and whitespace/punctuation collapsed to single spaces.
+    """
+    if not isinstance(text, str):
+        return ""
+    text = text.casefold()
+    if not text.isascii():
+        text = _COMBINING_RE.sub("", unicodedata.normalize("NFKD", text))
+    return " ".join(_WORD_RE.findall(text))
+
+
+def shingles(words: Sequence[str], n: int = NGRAM_SIZE) -> Set[int]:
+    if len(words) < n:
+        return {hash(tuple(words))} if words else set()
+    return {hash(tuple(words[i:i + n])) for i in range(len(words) - n + 1)}
+
+
+def _pages(value: Any) -> Set[int]:
+    if value is None:
+        return set()
+    values = value if isinstance(value, (list, tuple, set)) else [value]
+    pages = set()
+    for v in values:
+        try:
+            pages.add(int(v))
+        except (TypeError, ValueError):
+            continue
+    return pages
+
+
+def _get(obj: Any, name: str) -> Any:
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+@dataclass(frozen = True)
+class SourceCheck:
+    chunk_id: str
+    id_found: bool
+    page_ok: bool
+    exact: bool                          # Normalised quote is a substring of the cited chunk
+    coverage: float                      # Share of quote shingles found in the cited chunk
+    found_in: Optional[str] = None       # Best matching chunk_id when the cited one does not match
+    score: float = 0.0
+    short: bool = False                  # Quote under `ngram_size` words: too weak to ground anything
+
+    @property
+    def grounded(self) -> bool:
+        return self.id_found and self.page_ok and self.coverage >= GROUNDED_COVERAGE
+
+
+@dataclass(frozen = True)
+class GroundingReport:
+    score: float
+    sources: List[SourceCheck] = field(default_factory = list)
+
+    @property
+    def grounded(self) -> bool:
+        return bool(self.sources) and all(s.grounded for s in self.sources)
+
+    @property
+    def skip_critique(self) -> bool:
+        return self.grounded and self.score >= SKIP_CRITIQUE_SCORE
+
+    def ungrounded(self) -> List[SourceCheck]:
+        return [s for s in self.sources if not s.grounded]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "score": round(self.score, 4),
+            "grounded": self.grounded,
+            "skip_critique": self.skip_critique,
+            "sources": [{**s.__dict__, "grounded": s.grounded} for s in self.sources],
+        }
+
+
+class EvidenceIndex:
+    """
+    Index over the retrieved chunks.
+
+    Args:
+        chunks: One dict per chunk with keys `chunk_id`, `text` and optionally `chunk_page`
+            and `chunk_document`.
+        ngram_size: Words per shingle.
+    """
+
+    def __init__(self, chunks: Iterable[Dict[str, Any]], ngram_size: int = NGRAM_SIZE):
+        self.ngram_size = ngram_size
+        self.texts: Dict[str, str] = {}
+        self.pages: Dict[str, Set[int]] = {}
+        self.documents: Dict[str, Any] = {}
+        self.shingles: Dict[str, Set[int]] = {}
+
+        for chunk in chunks:
+            chunk_id = str(chunk["chunk_id"])
+            text = normalize_text(chunk.get("text"))
+            # Same chunk retrieved for several queries/indexes: keep one copy, merge pages
+            self.pages.setdefault(chunk_id, set()).update(_pages(chunk.get("chunk_page")))
+            if chunk_id in self.texts:
+                continue
+            self.texts[chunk_id] = text
+            self.documents[chunk_id] = chunk.get("chunk_document")
+            self.shingles[chunk_id] = shingles(text.split(), ngram_size)
+
+    @staticmethod
+    def _column(columns: Sequence[str], candidates: Sequence[str], explicit: Optional[str]) -> Optional[str]:
+        if explicit is not None:
+            return explicit
+        return next((c for c in candidates if c in columns), None)
+
+    @classmethod
+    def from_frame(
+        cls,
+        df_retrieved,
+        text_col     : Optional[str] = None,
+        id_col       : Optional[str] = None,
+        page_col     : Optional[str] = None,
+        document_col : Optional[str] = None,
+        ngram_size   : int = NGRAM_SIZE,
+    ) -> "EvidenceIndex":
+        """
+        Build from the `RetrieveComponent.retrieve` frame. Column names are detected from
+        `TEXT_COLUMNS` / `ID_COLUMNS` / `PAGE_COLUMNS` / `DOCUMENT_COLUMNS` unless given.
+        """
+        columns = list(df_retrieved.columns)
+        text_col = cls._column(columns, TEXT_COLUMNS, text_col)
+        id_col = cls._column(columns, ID_COLUMNS, id_col)
+        page_col = cls._column(columns, PAGE_COLUMNS, page_col)
+        document_col = cls._column(columns, DOCUMENT_COLUMNS, document_col)
+
+        if text_col is None or id_col is None:
+            raise ValueError(f"Cannot find chunk text/id columns in {columns}")
+
+        records = df_retrieved.to_dict("records")
+        return cls(
+            (
+                {
+                    "chunk_id": r[id_col],
+                    "text": r[text_col],
+                    "chunk_page": r.get(page_col) if page_col else None,
+                    "chunk_document": r.get(document_col) if document_col else None,
+                }
+                for r in records
+            ),
+            ngram_size = ngram_size,
+        )
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[Any], ngram_size: int = NGRAM_SIZE) -> "EvidenceIndex":
+        """
+        Build from LangChain documents (metadata keys as in `simple_rag.chunk_line`).
+        """
+        chunks = []
+        for i, doc in enumerate(docs):
+            md = doc.metadata or {}
+            chunks.append({
+                "chunk_id": md.get("chunk_id") or getattr(doc, "id", None) or f"chunk_{i}",
+                "text": doc.page_content,
+                "chunk_page": md.get("chunk_page", md.get("page_label", md.get("page"))),
+                "chunk_document": md.get("chunk_document") or md.get("source"),
+            })
+        return cls(chunks, ngram_size = ngram_size)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _best_chunk(self, grams: Set[int]) -> Optional[str]:
+        # Quotes have a few dozen shingles: set intersections per chunk beat an inverted index
+        best, best_hits = None, 0
+        for chunk_id, chunk_grams in self.shingles.items():
+            hits = len(grams & chunk_grams)
+            if hits > best_hits:
+                best, best_hits = chunk_id, hits
+        return best
+
+    def check_source(self, source: Any) -> SourceCheck:
+        chunk_id = str(_get(source, "chunk_id") or "")
+        quote = normalize_text(_get(source, "text"))
+        words = quote.split()
+        # A one-word or figure-only quote ("grew", "5") is a substring of almost any chunk
+        short = len(words) < self.ngram_size
+        grams = set() if short else shingles(words, self.ngram_size)
+
+        id_found = chunk_id in self.texts
+        cited_pages = _pages(_get(source, "chunk_page"))
+        known_pages = self.pages.get(chunk_id, set())
+        # Pages can only be contradicted when both sides have them
+        page_ok = id_found and (not cited_pages or not known_pages or bool(cited_pages & known_pages))
+
+        exact = id_found and not short and quote in self.texts[chunk_id]
+        if exact:
+            coverage = 1.0
+        elif id_found and grams:
+            coverage = len(grams & self.shingles[chunk_id]) / len(grams)
+        else:
+            coverage = 0.0
+
+        found_in = None
+        if coverage < GROUNDED_COVERAGE and grams:
+            best = self._best_chunk(grams)
+            if best is not None and best != chunk_id:
+                found_in = best
+
+        # Quote found in another chunk than the cited one still counts as evidence, at half weight
+        score = coverage
+        if found_in is not None:
+            score = max(score, 0.5 * len(grams & self.shingles[found_in]) / len(grams))
+        if id_found and not page_ok:
+            score *= 0.75
+
+        return SourceCheck(
+            chunk_id = chunk_id,
+            id_found = id_found,
+            page_ok  = page_ok,
+            exact    = exact,
+            coverage = round(coverage, 4),
+            found_in = found_in,
+            score    = round(score, 4),
+            short    = short,
+        )
+
+    def verify(self, output: Any) -> GroundingReport:
+        """
+        Check every `text_source` of an output (pydantic model or dict). Outputs without sources
+        get score 0.
+        """
+        sources = _get(output, "text_source") or []
+        checks = [self.check_source(s) for s in sources]
+        score = sum(c.score for c in checks) / len(checks) if checks else 0.0
+        return GroundingReport(score = score, sources = checks)
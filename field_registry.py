@@ -0,0 +1,292 @@
+"""
+Compact field registry: field -> field_id(s), type and retrieve params, built once from the
+prompt retrieve params and the fields catalog, persisted as Parquet and queried with dict lookups.
+
+Replaces the per-rerun `retrieve_params x index_names` cross merge + `drop_duplicates` +
+`pd.read_excel` that test_app and generate used to run: the cross product is only built for
+the selected field in `retrieve_frame`.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+REGISTRY_PATH = Path(".cache/field_registry.parquet")
+CATALOG_PATH = Path("fields_examples.xlsx")
+DEFAULT_TYPE = "String"
+
+_TYPE_MARKERS = {"numeric": "Numeric", "table": "Table", "string": "String", "text": "String"}
+
+
+def _normalize_type(raw: Any) -> Optional[str]:
+    text = str(raw or "").strip().lstrip("*").strip().lower()
+    for marker, field_type in _TYPE_MARKERS.items():
+        if text.startswith(marker):
+            return field_type
+    return None
+
+
+def load_catalog_types(catalog_path: Path = CATALOG_PATH, sheet_name: Any = 0) -> Dict[str, str]:
+    """
+    Read field alias -> type (Numeric / Table / String) from the fields catalog.
+
+    Supports both the inventory layout (columns "Alias Campo (YAML y Catálogo MLEs)" and "Tipo")
+    and the examples layout of `fields_examples.xlsx`, where consecutive field rows form a block
+    whose type is given by a "* Numeric value" / "* Table" marker next to the first row.
+    """
+    import pandas as pd
+
+    raw = pd.read_excel(catalog_path, sheet_name = sheet_name, header = None, dtype = str)
+
+    alias_col = type_col = header_row = None
+    for row_idx, row in raw.iterrows():
+        values = [str(v).strip() for v in row.tolist()]
+        if "Alias Campo (YAML y Catálogo MLEs)" in values:
+            header_row = row_idx
+            alias_col = values.index("Alias Campo (YAML y Catálogo MLEs)")
+            type_col = values.index("Tipo") if "Tipo" in values else None
+            break
+
+    if alias_col is None:
+        return {}
+
+    body = raw.iloc[header_row + 1:]
+
+    # Inventory layout: explicit "Tipo" column
+    if type_col is not None:
+        return {
+            str(alias).strip(): _normalize_type(field_type) or DEFAULT_TYPE
+            for alias, field_type in zip(body[alias_col], body[type_col])
+            if isinstance(alias, str) and alias.strip()
+        }
+
+    # Examples layout: blocks of consecutive aliases, typed by the first "* <type>" marker
+    types: Dict[str, str] = {}
+    block: List[str] = []
+    block_type: Optional[str] = None
+
+    def close_block():
+        for alias in block:
+            types[alias] = block_type or DEFAULT_TYPE
+
+    for _, row in body.iterrows():
+        alias = row[alias_col]
+        if isinstance(alias, str) and alias.strip():
+            block.append(alias.strip())
+            if block_type is None:
+                block_type = next((t for t in map(_normalize_type, row.tolist()[alias_col + 1:]) if t), None)
+        elif block:
+            close_block()
+            block, block_type = [], None
+    close_block()
+
+    return types
+
+
+class FieldRegistry:
+    """
+    In-memory registry keyed by field_id, with secondary lookups by field alias.
+
+    Args:
+        records: One dict per field_id with keys `field_id`, `field`, `type` and `params`
+            (the retrieve-param rows of that field_id).
+        all_indexes: company -> list of index names.
+        fingerprint: Hash of the sources the registry was built from.
+        catalog_error: Why the fields catalog could not be read (types defaulted to String), or None.
+    """
+
+    def __init__(
+        self,
+        records     : Iterable[Mapping[str, Any]],
+        all_indexes : Mapping[str, List[Any]],
+        fingerprint : str = "",
+        catalog_error: Optional[str] = None,
+    ):
+        self._by_id: Dict[str, Dict[str, Any]] = {r["field_id"]: dict(r) for r in records}
+        self._by_field: Dict[str, List[str]] = {}
+        for field_id, record in self._by_id.items():
+            self._by_field.setdefault(record["field"], []).append(field_id)
+
+        self.all_indexes = dict(all_indexes)
+        self.fingerprint = fingerprint
+        self.catalog_error = catalog_error
+
+    # ------------------------------------------------------------------ build
+
+    @staticmethod
+    def source_fingerprint(retrieve_params_df, catalog_path: Path = CATALOG_PATH, catalog_sheet: Any = 0) -> str:
+        digest = hashlib.sha256()
+        digest.update(retrieve_params_df.to_json(orient = "records", date_format = "iso").encode("utf-8"))
+        digest.update(f"sheet:{catalog_sheet!r}".encode("utf-8"))
+        catalog_path = Path(catalog_path)
+        if catalog_path.exists():
+            stat = catalog_path.stat()
+            digest.update(f"{catalog_path}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"))
+        return digest.hexdigest()
+
+    @classmethod
+    def from_sources(
+        cls,
+        retrieve_params_df,
+        all_indexes   : Mapping[str, List[Any]],
+        catalog_path  : Path = CATALOG_PATH,
+        catalog_sheet : Any = 0,
+    ) -> "FieldRegistry":
+        """
+        Build the registry from the prompt loader retrieve params (`prompt_loader.params["retrieve"]`).
+
+        If the catalog cannot be read (file locked by Excel, openpyxl missing...) every field gets
+        the default type, with a warning and `catalog_error` set so the registry is not persisted.
+        """
+        catalog_error = None
+        try:
+            types = load_catalog_types(catalog_path, catalog_sheet)
+        except Exception as e:
+            catalog_error = f"{type(e).__name__}: {e}"
+            warnings.warn(f"Fields catalog {catalog_path} not readable ({catalog_error}); all fields typed {DEFAULT_TYPE}", RuntimeWarning)
+            types = {}
+
+        params = retrieve_params_df.sort_values(by = ["fieldId"]).to_dict("records")
+
+        records: Dict[str, Dict[str, Any]] = {}
+        for row in params:
+            field_id = f"{row['fieldId']}_{row['subfield']}"
+            record = records.setdefault(field_id, {
+                "field_id": field_id,
+                "field": row["field"],
+                "type": types.get(row["field"], DEFAULT_TYPE),
+                "params": [],
+            })
+            record["params"].append(row)
+
+        fingerprint = cls.source_fingerprint(retrieve_params_df, catalog_path, catalog_sheet)
+        return cls(records.values(), all_indexes, fingerprint, catalog_error)
+
+    # ---------------------------------------------------------------- persist
+
+    def save(self, path: Path = REGISTRY_PATH) -> Optional[Path]:
+        """
+        Persist as Parquet (requires pyarrow). Returns None if pyarrow is not installed.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            return None
+
+        rows = list(self._by_id.values())
+        table = pa.table(
+            {
+                "field_id": [r["field_id"] for r in rows],
+                "field": [r["field"] for r in rows],
+                "type": [r["type"] for r in rows],
+                "params": [json.dumps(r["params"], default = str, ensure_ascii = False) for r in rows],
+            },
+            metadata = {
+                "fingerprint": self.fingerprint,
+                "all_indexes": json.dumps(self.all_indexes, ensure_ascii = False),
+            },
+        )
+
+        path = Path(path)
+        path.parent.mkdir(parents = True, exist_ok = True)
+        pq.write_table(table, path, compression = "zstd")
+        return path
+
+    @classmethod
+    def load(cls, path: Path = REGISTRY_PATH) -> Optional["FieldRegistry"]:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            return None
+
+        path = Path(path)
+        if not path.exists():
+            return None
+
+        table = pq.read_table(path)
+        metadata = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+        columns = table.to_pydict()
+
+        records = [
+            {"field_id": fid, "field": field, "type": ftype, "params": json.loads(params)}
+            for fid, field, ftype, params in zip(columns["field_id"], columns["field"], columns["type"], columns["params"])
+        ]
+        return cls(records, json.loads(metadata.get("all_indexes", "{}")), metadata.get("fingerprint", ""))
+
+    @classmethod
+    def load_or_build(
+        cls,
+        retrieve_params_df,
+        all_indexes   : Mapping[str, List[Any]],
+        path          : Path = REGISTRY_PATH,
+        catalog_path  : Path = CATALOG_PATH,
+        catalog_sheet : Any = 0,
+    ) -> "FieldRegistry":
+        """
+        Load the persisted registry if it was built from the same sources, otherwise rebuild and save it
+        (unless the catalog could not be read: a transient failure must not be cached as all-String).
+        """
+        fingerprint = cls.source_fingerprint(retrieve_params_df, catalog_path, catalog_sheet)
+
+        registry = cls.load(path)
+        if registry is not None and registry.fingerprint == fingerprint:
+            registry.all_indexes = dict(all_indexes)
+            return registry
+
+        registry = cls.from_sources(retrieve_params_df, all_indexes, catalog_path, catalog_sheet)
+        if registry.catalog_error is None:
+            registry.save(path)
+        return registry
+
+    # ----------------------------------------------------------------- lookup
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, field_id: str) -> bool:
+        return field_id in self._by_id
+
+    def get(self, field_id: str) -> Dict[str, Any]:
+        return self._by_id[field_id]
+
+    def field_ids(self, field: str) -> List[str]:
+        return list(self._by_field.get(field, []))
+
+    def field_type(self, field_id: str) -> str:
+        return self._by_id[field_id]["type"]
+
+    def indexes(self, company: str) -> List[Any]:
+        return list(self.all_indexes[company])
+
+    def fields_info(self) -> List[Dict[str, str]]:
+        """
+        One `{field, field_id, type}` dict per field_id, ordered like the retrieve params.
+        """
+        return [{"field": r["field"], "field_id": r["field_id"], "type": r["type"]} for r in self._by_id.values()]
+
+    def retrieve_frame(self, company: str, field_id: Optional[str] = None, field: Optional[str] = None):
+        """
+        `df_fields` for `RetrieveComponent.retrieve`: the retrieve-param rows of a field_id (or of every
+        field_id of a field alias) crossed with the company indexes. Only the selected rows are built.
+        """
+        import pandas as pd
+
+        if field_id is not None:
+            field_ids = [field_id]
+        elif field is not None:
+            field_ids = self.field_ids(field)
+        else:
+            raise ValueError("Pass field_id or field")
+
+        indexes = self.indexes(company)
+        rows = [
+            {**param, "index_name": index_name, "field_id": fid}
+            for fid in field_ids
+            for param in self._by_id[fid]["params"]
+            for index_name in indexes
+        ]
+        return pd.DataFrame(rows)
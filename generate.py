@@ -3,34 +3,13 @@
 # =========================
 # Modules
 # =========================
-import streamlit as st
-import re
-from contextlib import contextmanager
-import os
-
-import pandas as pd
-import yaml
-
+# Heavy dependencies (pandas, aigenpf, aigenrc, IPython) are imported lazily on first use,
+# so `import generate` is cheap and has no side effects. The pipeline runs from `main()`.
+import html
 import json
-from pathlib import Path
-import time
+from functools import lru_cache
 
-from aigenpf.application.prompt.prompt_reader import PromptReaderFromRepo
-from aigenpf.application.prompt.yaml_loader import LocalYamlLoader
-from aigenpf.application.retrieval_component.retrieval_component import (
-    RetrieveComponent,
-)
-
-from aigenrc.llm import RatingCalculatorLm
-from aigenrc.utils import (
-    OutputStringField,
-    OutputTableField,
-    OutputNumericField,
-    OutputSchemaCritic,
-    get_critique_prompt_with_context,
-    get_extract_prompt_with_context,
-    get_summary_prompt_from_text,
-)
+import tracing
 
 # =========================
 # Load prompt
@@ -39,9 +18,18 @@ LANGUAGE = "ES"
 PROMPTS_SUBMODULE = (
     "prompts-data_research-aigenpf",
 )
+CATALOG_XLSX = "DS - Campos prioritarios.xlsx"
+CATALOG_SHEET = "Inventario campos"
+
+
+@lru_cache(maxsize=1)
+def get_prompt_loader():
+    from aigenpf.application.prompt.prompt_reader import PromptReaderFromRepo
+    from aigenpf.application.prompt.yaml_loader import LocalYamlLoader
+
+    yaml_loader = LocalYamlLoader(prompts_submodule=PROMPTS_SUBMODULE, language=LANGUAGE)
+    return PromptReaderFromRepo(yaml_loader)
 
-yaml_loader = LocalYamlLoader(prompts_submodule=PROMPTS_SUBMODULE, language=LANGUAGE)
-prompt_loader = PromptReaderFromRepo(yaml_loader)
 
 # =========================
 # Chunks reference
@@ -83,173 +71,435 @@ all_indexes = {
 }
 
 # =========================
-# Auxiliar df
+# Field registry
 # =========================
-company_list = list(all_indexes.keys())
-
-COMPANY = company_list[0]
+@lru_cache(maxsize=1)
+def get_field_registry():
+    """
+    field -> field_id / type / retrieve params, persisted as Parquet (see field_registry.py)
+    """
+    from pathlib import Path
 
-df_indexes = pd.Series(all_indexes[COMPANY], name="index_name")
+    from field_registry import CATALOG_PATH, FieldRegistry
 
-df_aux = (
-    prompt_loader.params["retrieve"]
-    .copy()
-    .reset_index(drop=True)
-    .sort_values(by=["fieldId"])
-)
+    catalog_path, catalog_sheet = (CATALOG_XLSX, CATALOG_SHEET) if Path(CATALOG_XLSX).exists() else (CATALOG_PATH, 0)
 
-df_aux = df_aux.merge(df_indexes, how="cross")
-df_aux = df_aux.reset_index(drop=True)
-df_aux["field_id"] = df_aux["fieldId"] + "_" + df_aux["subfield"]
+    return FieldRegistry.load_or_build(
+        get_prompt_loader().params["retrieve"].copy().reset_index(drop=True),
+        all_indexes,
+        catalog_path=catalog_path,
+        catalog_sheet=catalog_sheet,
+    )
 
-fields_info = df_aux[["field", "field_id"]].drop_duplicates().reset_index(drop=True)
-fields_info
 
 # =========================
-# Fields catalog merge
+# Common classes
 # =========================
-fields_catalog = pd.read_excel(
-    "DS - Campos prioritarios.xlsx",
-    sheet_name="Inventario campos",
-)[["Alias Campo (YAML y Catálogo MLEs)", "Tipo"]]
+top_k_retrieve = 20
+top_k_extract = 10
+adaptive_top_k = True  # Chunks sent to the LLM chosen per field type and scores (see adaptive_k.py)
+use_answer_cache = True  # Reuse answers given on the same or near-identical chunks (see answer_cache.py)
 
-fields_catalog.columns = ["field", "type"]
-fields_info = pd.merge(fields_info, fields_catalog, how="left")
-fields_info
 
-# =========================
-# Field params
-# =========================
-idx = 1
+@lru_cache(maxsize=1)
+def get_components():
+    from aigenpf.application.retrieval_component.retrieval_component import (
+        RetrieveComponent,
+    )
+    from aigenrc.llm import RatingCalculatorLm
+    from aigenrc.utils import (
+        OutputStringField,
+        OutputTableField,
+        OutputNumericField,
+        OutputSchemaCritic,
+    )
 
-field = fields_info.iloc[idx]["field"]
-field_id = fields_info.iloc[idx]["field_id"]
-field_type = fields_info.iloc[idx]["type"]
+    return {
+        "retrieve_component": RetrieveComponent(top_k=top_k_retrieve),
+        "text_extract_llm": RatingCalculatorLm(output_schema=OutputStringField),
+        "table_extract_llm": RatingCalculatorLm(output_schema=OutputTableField),
+        "numeric_extract_llm": RatingCalculatorLm(output_schema=OutputNumericField),
+        "field_critique_llm": RatingCalculatorLm(output_schema=OutputSchemaCritic),
+        "summary_llm": RatingCalculatorLm(output_schema = None),
+    }
 
-# =========================
-# Common classes
-# =========================
-top_k_retrieve = 20
-top_k_extract = 10
 
-retrieve_component = RetrieveComponent(top_k=top_k_retrieve)
+def llm_response(llm_key, stage, system_prompt, user_prompt):
+    """
+    `llm_response` of a component LLM, timed (tracing) and recorded in the usage ledger
+    (see usage_ledger.py) under the labels of the current `usage_context`.
+    """
+    from usage_ledger import model_name, track
+
+    llm = get_components()[llm_key]
+    with tracing.span("llm", stage=stage), track(stage, model_name(llm), (system_prompt, user_prompt)) as call:
+        call.response = llm.llm_response(system_prompt, user_prompt)
+    return call.response
 
-text_extract_llm = RatingCalculatorLm(output_schema=OutputStringField)
-table_extract_llm = RatingCalculatorLm(output_schema=OutputTableField)
-numeric_extract_llm = RatingCalculatorLm(output_schema=OutputNumericField)
-field_critique_llm = RatingCalculatorLm(output_schema=OutputSchemaCritic)
-summary_llm = RatingCalculatorLm(output_schema = None)
 
+@lru_cache(maxsize=1)
+def get_answer_cache():
+    from answer_cache import AnswerCache
 
-def retrieved_chunks(field):
+    return AnswerCache()
+
+
+def cached_llm_output(llm_key, kind, field_id, df_retrieved, top_k, system_prompt, user_prompt, output_schema, store_key=None, depends_on=()):
+    """
+    Validated LLM output of the prompts, or the answer already given for this field on the same
+    (or near-identical) chunks when use_answer_cache is on. Returns (output, CachedAnswer or None).
+    depends_on: other inputs of the answer (e.g. the extraction being critiqued).
+    """
+    from schema_validation import validate_output
+
+    def answer():
+        raw = llm_response(llm_key, kind, system_prompt, user_prompt)
+        with tracing.span("validate"):
+            return validate_output(raw, output_schema)
+
+    if not use_answer_cache:
+        return answer(), None
+    from answer_cache import ChunkSet, answer_version
+
+    try:
+        chunks = ChunkSet.from_frame(df_retrieved.head(top_k))
+    except ValueError as e:
+        print(f"Answer cache skipped: {e}")
+        return answer(), None
+
+    output, hit = get_answer_cache().get_or_answer(
+        field_id,
+        kind,
+        chunks,
+        answer_version(system_prompt, output_schema.__name__, *depends_on),
+        answer,
+        schema=output_schema,
+        company=store_key["company"] if store_key else None,
+        run_id=store_key["run_id"] if store_key else None,
+        provenance={"prompt": f"{field_id}/{field_id}_{kind}"},
+    )
+    if hit is not None:
+        print(f"Reusing the {kind} answer of {hit.company} run {hit.run_id} ({hit.match} match, {hit.similarity:.3f})")
+    return output, hit
+
+
+@tracing.traced("retrieve")
+def retrieved_chunks(field, company):
     # Select the field you want to compute
-    fields = df_aux[df_aux["field"] == field].copy()
-    indexes = df_indexes.to_list()
+    registry = get_field_registry()
+    fields = registry.retrieve_frame(company, field=field)
+    indexes = registry.indexes(company)
     fields["language"] = LANGUAGE
     fields["prompt_language"] = LANGUAGE
 
-    df_retrieved = retrieve_component.retrieve(index_names=indexes, df_fields=fields)
+    df_retrieved = get_components()["retrieve_component"].retrieve(index_names=indexes, df_fields=fields)
+    tracing.current_span().set(rows=len(df_retrieved))
 
     return df_retrieved
 
 
-def extract_field(df_retrieved, field_id, output_schema):
-    prompt = f"{field_id}/{field_id}_extract"
-    system_prompt, user_prompt = get_extract_prompt_with_context(
-        prompt, df_retrieved, top_k_extract
+@tracing.traced("select_k")
+def select_chunks(df_retrieved, field_type):
+    """
+    Rank the retrieved chunks and pick how many go to the LLM: adaptive k (adaptive_k.py), or
+    top_k_extract when adaptive_top_k is off. Returns (ranked frame, KSelection or None).
+    """
+    if not adaptive_top_k:
+        return df_retrieved, None
+    from adaptive_k import select_frame
+
+    df_ranked, selection = select_frame(df_retrieved, field_type)
+    tracing.current_span().set(**selection.span_attrs())
+    print(f"Adaptive k: {selection.k}/{selection.candidates} chunks, ~{selection.tokens} tokens ({selection.reason})")
+    return df_ranked, selection
+
+
+@lru_cache(maxsize=1)
+def get_result_store():
+    from result_store import ResultStore
+
+    return ResultStore()
+
+
+def save_result(store_key, kind, field_id, output, prompt=None, system_prompt="", user_prompt="", df_retrieved=None, cache_hit=None):
+    """
+    Persist a step output in the result store (no-op when store_key is None).
+    store_key: {"company": ..., "field": ..., "run_id": ...}
+    cache_hit: CachedAnswer the output was reused from, if any.
+    """
+    if store_key is None:
+        return
+    from evidence_index import ID_COLUMNS
+    from result_store import prompt_hash
+
+    chunk_ids = []
+    if df_retrieved is not None:
+        id_col = next((c for c in ID_COLUMNS if c in df_retrieved.columns), None)
+        chunk_ids = df_retrieved[id_col].astype(str).unique().tolist() if id_col else []
+
+    get_result_store().put(
+        company=store_key["company"],
+        field=store_key["field"],
+        field_id=field_id,
+        output=output,
+        kind=kind,
+        run_id=store_key.get("run_id"),
+        prompt_hash=prompt_hash(system_prompt, user_prompt) if (system_prompt or user_prompt) else None,
+        provenance={
+            "prompt": prompt,
+            "language": LANGUAGE,
+            "indexes": get_field_registry().indexes(store_key["company"]),
+            "chunk_ids": chunk_ids,
+            "k_selection": store_key.get("k_selection"),
+            "answer_cache": cache_hit.to_dict() if cache_hit is not None else None,
+        },
     )
 
-    field_extract_raw = table_extract_llm.llm_response(system_prompt, user_prompt)
-    field_extract_sch = output_schema.model_validate_json(field_extract_raw)
-    field_extract_res = field_extract_sch.model_dump_json(indent=4)
-    print(field_extract_res)
+
+@tracing.traced("extract")
+def extract_field(df_retrieved, field_id, output_schema, store_key=None, top_k=top_k_extract):
+    from aigenrc.utils import get_extract_prompt_with_context
+    from schema_validation import print_output
+
+    prompt = f"{field_id}/{field_id}_extract"
+    with tracing.span("prompt", prompt=prompt) as sp:
+        system_prompt, user_prompt = get_extract_prompt_with_context(
+            prompt, df_retrieved, top_k
+        )
+        sp.count_tokens(system=system_prompt, user=user_prompt)
+
+    field_extract_sch, cache_hit = cached_llm_output(
+        "table_extract_llm", "extract", field_id, df_retrieved, top_k, system_prompt, user_prompt, output_schema, store_key
+    )
+    print_output(field_extract_sch)
+    with tracing.span("store"):
+        save_result(store_key, "extract", field_id, field_extract_sch, prompt, system_prompt, user_prompt, df_retrieved, cache_hit)
 
     return field_extract_sch
 
 
-def extract_alternative_field(df_retrieved, field_id, output_schema):
+@tracing.traced("alternative")
+def extract_alternative_field(df_retrieved, field_id, output_schema, store_key=None, top_k=top_k_extract):
+    from aigenrc.utils import get_extract_prompt_with_context
+    from schema_validation import print_output
+
     prompt = f"{field_id}/{field_id}_alternative"
-    system_prompt, user_prompt = get_extract_prompt_with_context(
-        prompt, df_retrieved, top_k_extract
+    with tracing.span("prompt", prompt=prompt) as sp:
+        system_prompt, user_prompt = get_extract_prompt_with_context(
+            prompt, df_retrieved, top_k
+        )
+        sp.count_tokens(system=system_prompt, user=user_prompt)
+
+    field_extract_sch, cache_hit = cached_llm_output(
+        "table_extract_llm", "alternative", field_id, df_retrieved, top_k, system_prompt, user_prompt, output_schema, store_key
     )
-
-    field_extract_raw = table_extract_llm.llm_response(system_prompt, user_prompt)
-    field_extract_sch = output_schema.model_validate_json(field_extract_raw)
-    field_extract_res = field_extract_sch.model_dump_json(indent = 4)
-    print(field_extract_res)
+    print_output(field_extract_sch)
+    with tracing.span("store"):
+        save_result(store_key, "alternative", field_id, field_extract_sch, prompt, system_prompt, user_prompt, df_retrieved, cache_hit)
 
     return field_extract_sch
 
 
+@tracing.traced("summary")
 def summary(text):
+    from aigenrc.utils import get_summary_prompt_from_text
+
     prompt = "summary_prompts/general_conclusion"
     text = text.model_dump().get("result_field").get("text")
 
-    system_prompt, user_prompt = get_summary_prompt_from_text(
-        prompt,
-        text,
-    )
+    with tracing.span("prompt", prompt=prompt) as sp:
+        system_prompt, user_prompt = get_summary_prompt_from_text(
+            prompt,
+            text,
+        )
+        sp.count_tokens(system=system_prompt, user=user_prompt)
 
-    plan_extract_raw = summary_llm.llm_response(system_prompt, user_prompt)
+    plan_extract_raw = llm_response("summary_llm", "summary", system_prompt, user_prompt)
 
     return plan_extract_raw
 
 
-def critique_field(df_retrieved, field_id, field_extract_sch):
+@tracing.traced("critique")
+def critique_field(df_retrieved, field_id, field_extract_sch, store_key=None, top_k=top_k_extract):
+    from aigenrc.utils import OutputSchemaCritic, get_critique_prompt_with_context
+    from schema_validation import print_output
+
     prompt = f"{field_id}/{field_id}_critique"
-    system_prompt, user_prompt = get_critique_prompt_with_context(
-        prompt, df_retrieved, top_k_extract, field_extract_sch
-    )
+    with tracing.span("prompt", prompt=prompt) as sp:
+        system_prompt, user_prompt = get_critique_prompt_with_context(
+            prompt, df_retrieved, top_k, field_extract_sch
+        )
+        sp.count_tokens(system=system_prompt, user=user_prompt)
 
     print("Initial extraction was successful. Let's autoevaluate the value...")
-    field_critique_raw = field_critique_llm.llm_response(system_prompt, user_prompt)
-    field_critique_sch = OutputSchemaCritic.model_validate_json(field_critique_raw)
-    field_critique_res = field_critique_sch.model_dump_json(indent = 4)
-    print(field_critique_res)
+    field_critique_sch, cache_hit = cached_llm_output(
+        "field_critique_llm", "critique", field_id, df_retrieved, top_k, system_prompt, user_prompt,
+        OutputSchemaCritic, store_key, depends_on=(field_extract_sch,),
+    )
+    print_output(field_critique_sch)
+    with tracing.span("store"):
+        save_result(store_key, "critique", field_id, field_critique_sch, prompt, system_prompt, user_prompt, df_retrieved, cache_hit)
 
     return field_critique_sch
 
 
+@tracing.traced("grounding")
+def verify_grounding(df_retrieved, field_extract_sch):
+    """
+    Local check of the text_source citations against the retrieved chunks (no LLM call).
+    Returns None if the retrieved frame has no chunk text/id columns.
+    """
+    from evidence_index import EvidenceIndex
 
+    try:
+        index = EvidenceIndex.from_frame(df_retrieved)
+    except ValueError as e:
+        print(f"Grounding check skipped: {e}")
+        return None
 
-df_retrieved = retrieved_chunks(field=field)
+    report = index.verify(field_extract_sch)
+    print(f"Grounding score: {report.score:.2f} ({len(report.ungrounded())} ungrounded source(s))")
+    return report
 
-if field_type == "Numeric":
-    output_schema = OutputNumericField
-elif field_type == "Table":
-    output_schema = OutputTableField
-else:
-    output_schema = OutputStringField
 
-# =========================
-# Extract
-# =========================
-response_extract = extract_field(
-    df_retrieved=df_retrieved,
-    field_id=field_id,
-    output_schema=output_schema,
-)
+def pick_output_schema(field_type):
+    from aigenrc.utils import OutputNumericField, OutputStringField, OutputTableField
+
+    if field_type == "Numeric":
+        return OutputNumericField
+    elif field_type == "Table":
+        return OutputTableField
+    else:
+        return OutputStringField
+
+
+def load_stored_results(company, field_id, output_schema):
+    """
+    Latest stored results of a field, or None if it was never extracted for this company.
+    """
+    from aigenrc.utils import OutputSchemaCritic
+
+    store = get_result_store()
+    stored = {kind: store.get(company, field_id, kind) for kind in ("extract", "alternative", "summary", "critique")}
+    if stored["extract"] is None:
+        return None
+
+    print(f"Reusing stored results for {field_id} (run {stored['extract'].run_id})")
+    return {
+        "extract": stored["extract"].output(output_schema),
+        "alternative": stored["alternative"].output(output_schema) if stored["alternative"] else None,
+        "summary": stored["summary"].payload.get("text") if stored["summary"] else None,
+        "critique": stored["critique"].output(OutputSchemaCritic) if stored["critique"] else None,
+        "grounding": None,
+    }
+
+
+@tracing.traced("generate.main")
+def main(company=None, idx=1, skip_grounded_critique=False, store=True, reuse=False, field_id=None, run_id=None):
+    """
+    idx / field_id: field to run (position in the registry, or its field_id when given).
+    store: persist every step in the result store (see result_store.py), under run_id if given.
+    reuse: return the stored results of the field instead of re-extracting it, when available.
+    Stage timings are recorded with tracing.py when enabled (RC_TRACE=1 / RC_TRACE_FILE=...), and
+    the token usage of every LLM call in the usage ledger (usage_ledger.py).
+    """
+    # =========================
+    # Field params
+    # =========================
+    registry = get_field_registry()
+    company = company or list(all_indexes.keys())[0]
+    field_id = field_id or registry.fields_info()[idx]["field_id"]
+
+    field = registry.get(field_id)["field"]
+    field_type = registry.field_type(field_id)
+    tracing.current_span().set(company=company, field_id=field_id, field_type=field_type)
+
+    output_schema = pick_output_schema(field_type)
+
+    if reuse:
+        stored = load_stored_results(company, field_id, output_schema)
+        tracing.current_span().set(cache_hit=stored is not None)
+        if stored is not None:
+            return stored
+
+    store_key = None
+    if store:
+        from result_store import new_run_id
+        store_key = {"company": company, "field": field, "run_id": run_id or new_run_id()}
 
-if field_type != "String":
-    # Alternative
-    response_alternative = extract_alternative_field(
+    from usage_ledger import usage_context
+
+    with usage_context(company=company, field=field, field_id=field_id, run_id=store_key and store_key["run_id"]):
+        return run_field(company, field, field_id, field_type, output_schema, store_key, skip_grounded_critique)
+
+
+def run_field(company, field, field_id, field_type, output_schema, store_key=None, skip_grounded_critique=False):
+    """
+    Retrieve, extract (+ alternative or summary), check grounding and critique one field.
+    """
+    df_retrieved = retrieved_chunks(field=field, company=company)
+    df_retrieved, k_selection = select_chunks(df_retrieved, field_type)
+    top_k = k_selection.k if k_selection is not None else top_k_extract
+    if store_key is not None and k_selection is not None:
+        store_key = {**store_key, "k_selection": k_selection.to_dict()}
+
+    # =========================
+    # Extract
+    # =========================
+    response_extract = extract_field(
         df_retrieved=df_retrieved,
         field_id=field_id,
         output_schema=output_schema,
+        store_key=store_key,
+        top_k=top_k,
     )
 
-if field_type == "String":
-    field_summary = summary(response_extract)
+    response_alternative = None
+    if field_type != "String":
+        # Alternative
+        response_alternative = extract_alternative_field(
+            df_retrieved=df_retrieved,
+            field_id=field_id,
+            output_schema=output_schema,
+            store_key=store_key,
+            top_k=top_k,
+        )
+
+    field_summary = None
+    if field_type == "String":
+        field_summary = summary(response_extract)
+        save_result(store_key, "summary", field_id, {"text": field_summary}, "summary_prompts/general_conclusion")
+
+    # =========================
+    # Critique
+    # =========================
+    grounding = verify_grounding(df_retrieved, response_extract)
+
+    response_critique = None
+    if skip_grounded_critique and grounding is not None and grounding.skip_critique:
+        print("All sources are grounded in the retrieved chunks: skipping the LLM critique.")
+    else:
+        response_critique = critique_field(
+            df_retrieved=df_retrieved,
+            field_id=field_id,
+            field_extract_sch=response_extract,
+            store_key=store_key,
+            top_k=top_k,
+        )
+
+    return {
+        "extract": response_extract,
+        "alternative": response_alternative,
+        "summary": field_summary,
+        "critique": response_critique,
+        "grounding": grounding,
+    }
+
 
 # =========================
-# Critique
+# Output examples (reference only; JSON, not Python)
 # =========================
-response_critique = critique_field(
-    df_retrieved=df_retrieved,
-    field_id=field_id,
-    field_extract_sch=response_extract,
-)
-
+OUTPUT_EXAMPLES = r"""
 # Ejemplo de output tabla:
 {
   "text_source": [
@@ -369,117 +619,40 @@ response_critique = critique_field(
     "confidence": float, 
     "justification": str
 }
+"""
 
 
-
-import json
-import pandas as pd
-
-try:
-    from IPython.display import display
-except ImportError:
-    display = None
-
-
-def _show_df(df: pd.DataFrame, title: str = ""):
-    if title:
-        print(f"\n== {title} ==")
-    if display:
-        display(df)
-    else:
-        print(df.to_string(index=False))
+@lru_cache(maxsize=1)
+def _ipython_display():
+    try:
+        from IPython.display import display, HTML
+    except ImportError:
+        return None, None
+    return display, HTML
 
 
-def _show_text(title: str, text: str):
-    print(f"\n== {title} ==")
-    print(text if text is not None else "")
-
-
-def show_output(data):
+def _table_frame(rf: dict):
     """
-    data puede ser:
-      - dict
-      - string con JSON
-      - lista de dicts (muestra como DataFrame si procede)
+    DataFrame of a table result_field: Arrow-backed (no copy) when pyarrow is installed.
     """
-    if isinstance(data, str):
-        data = json.loads(data)
-
-    if isinstance(data, list):
-        # Si es una lista de dicts, intento DataFrame directo
-        if all(isinstance(x, dict) for x in data):
-            _show_df(pd.DataFrame(data), "lista")
-        else:
-            print(data)
-        return
-
-    if not isinstance(data, dict):
-        print(data)
-        return
-
-    # Caso "critique" exacto
-    if set(data.keys()) == {"is_valid", "confidence", "justification"}:
-        _show_df(pd.DataFrame([{"is_valid": data["is_valid"], "confidence": data["confidence"]}]), "critique")
-        _show_text("justification", data["justification"])
-        return
-
-    # 1) result_field (tabla / numérico / texto)
-    rf = data.get("result_field")
-    if isinstance(rf, dict):
-        if "columns" in rf and "rows" in rf:
-            df = pd.DataFrame(rf["rows"], columns=rf["columns"])
-            _show_df(df, "result_field (tabla)")
-        elif "value" in rf:
-            _show_df(pd.DataFrame([rf]), "result_field (numérico)")
-        elif "text" in rf:
-            _show_text("result_field (texto)", rf.get("text", ""))
-        else:
-            # fallback: dict cualquiera -> df de una fila
-            _show_df(pd.DataFrame([rf]), "result_field")
-    elif rf is not None:
-        # fallback: result_field primitivo
-        _show_df(pd.DataFrame([{"value": rf}]), "result_field")
-
-    # 2) justification (texto normal)
-    if "justification" in data:
-        _show_text("justification", data.get("justification", ""))
-
-    # 3) synonyms_found (lista legible)
-    if "synonyms_found" in data:
-        syn = data.get("synonyms_found") or []
-        print("\n== synonyms_found ==")
-        if isinstance(syn, list):
-            for s in syn:
-                print(f"- {s}")
-        else:
-            print(syn)
-
-    # 4) text_source (texto normal, sin truncar)
-    if "text_source" in data:
-        ts = data.get("text_source") or []
-        print("\n== text_source ==")
-        if isinstance(ts, list) and all(isinstance(x, dict) for x in ts):
-            for i, x in enumerate(ts, 1):
-                doc = x.get("chunk_document")
-                cid = x.get("chunk_id")
-                pages = x.get("chunk_page")
-                pages_str = ", ".join(map(str, pages)) if isinstance(pages, list) else str(pages)
-                print(f"\n[{i}] {doc} | {cid} | page(s): {pages_str}")
-                print(x.get("text", ""))
-        else:
-            print(ts)
+    import pandas as pd
 
+    try:
+        from table_columns import ColumnarTable
+        return ColumnarTable.from_field(rf, parse_numbers=False).to_dataframe()
+    except Exception:
+        pass
+    try:
+        return pd.DataFrame(rf["rows"], columns=rf["columns"])
+    except Exception:
+        return pd.DataFrame(rf["rows"])
 
-import json, html
-import pandas as pd
 
-try:
-    from IPython.display import display, HTML
-except ImportError:
-    display = None
+def show_output(data):
+    import pandas as pd
 
+    display, HTML = _ipython_display()
 
-def show_output(data):
     if isinstance(data, str):
         data = json.loads(data)
     if not isinstance(data, dict):
@@ -521,7 +694,7 @@ def show_output(data):
     rf = data.get("result_field")
     if isinstance(rf, dict):
         if "columns" in rf and "rows" in rf:
-            show_df(pd.DataFrame(rf["rows"], columns=rf["columns"]), "result_field (tabla)")
+            show_df(_table_frame(rf), "result_field (tabla)")
         elif "value" in rf:
             show_df(pd.DataFrame([rf]), "result_field (numérico)")
         elif "text" in rf:
@@ -552,3 +725,7 @@ def show_output(data):
             show_text(header, x.get("text", ""))
     elif "text_source" in data:
         show_text("text_source", ts)
+
+
+if __name__ == "__main__":
+    main()
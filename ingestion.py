@@ -6,14 +6,31 @@ from langchain_community.vectorstores import FAISS
 from langchain_openai import OpenAIEmbeddings
 from dotenv import load_dotenv
 
+import tracing
+from parsed_cache import ParsedDocumentCache
+
 load_dotenv()
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
 
-def ingestion_workflow_pdf(doc_urls, index_dir = "vector_index"):
+LOADERS = ("pypdf", "layout")
+
+
+@tracing.traced("ingestion")
+def ingestion_workflow_pdf(doc_urls, index_dir = "vector_index", loader = "pypdf", chunk_size = 1000, chunk_overlap = 120, parsed_cache = True, quantize = None):
     """
     Load one or multiple PDFs, split into chunks preserving metadata (source & page),
     create embeddings and store/update FAISS vector index.
+
+    loader: "pypdf" (PyPDFLoader + tiktoken splitter) or "layout" (pdf_layout.py: PyMuPDF, table
+    regions as header + rows chunks, prose chunked along section boundaries).
+    parsed_cache: read parsed pages from parsed_cache.py (each PDF is parsed once; changing
+    chunk_size / chunk_overlap only re-splits).
+    quantize: `vector_quantization.QuantizationConfig` to also write a truncated / int8 / fp16
+    copy of the index (`<index_dir>/quantized/`, used by `load_vector_store`); None refreshes an
+    existing copy with its own config, so it never misses the chunks just added.
     """
+    if loader not in LOADERS:
+        raise ValueError(f"Invalid loader: {loader!r} (choose from {LOADERS})")
     start = time.time()
 
     # 0) Normalize input: str -> [str]
@@ -23,44 +40,72 @@ def ingestion_workflow_pdf(doc_urls, index_dir = "vector_index"):
     # 1) Text splitter (same as before)
     splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
         separators    = ["\n\n", "\n", ". ", " ", ""],
-        chunk_size    = 1000,
-        chunk_overlap = 120,
+        chunk_size    = chunk_size,
+        chunk_overlap = chunk_overlap,
     )
+    cache = ParsedDocumentCache() if parsed_cache else None
 
     # 2) Embeddings (initialize once)
     embeddings = OpenAIEmbeddings(model = "text-embedding-3-small")
 
     # 3) Load or create the vector store (initialize once)
-    if os.path.exists(index_dir):
-        vector_store = FAISS.load_local(
-            index_dir,
-            embeddings,
-            allow_dangerous_deserialization = True
-            )
-    else:
-        vector_store = None
+    with tracing.span("index.load"):
+        if os.path.exists(index_dir):
+            vector_store = FAISS.load_local(
+                index_dir,
+                embeddings,
+                allow_dangerous_deserialization = True
+                )
+        else:
+            vector_store = None
 
     total_chunks = 0
 
     # 4) Iterate through documents
     for doc_url in doc_urls:
-        loader = PyPDFLoader(doc_url)
-        docs_loader = loader.load()
+        if loader == "layout":
+            from pdf_layout import load_layout_documents
+
+            # Parsing and chunking in one pass: tables and sections set the chunk boundaries
+            with tracing.span("pdf.load", document = os.path.basename(doc_url), loader = loader) as sp:
+                pages = cache.layout(doc_url) if cache is not None else None
+                docs_chunks = load_layout_documents(doc_url, chunk_tokens = chunk_size, pages = pages)
+                sp.set(chunks = len(docs_chunks), tables = sum(d.metadata["chunk_type"] == "table" for d in docs_chunks))
+        else:
+            with tracing.span("pdf.load", document = os.path.basename(doc_url)) as sp:
+                docs_loader = cache.documents(doc_url) if cache is not None else PyPDFLoader(doc_url).load()
+                sp.set(pages = len(docs_loader))
 
-        docs_chunks = splitter.split_documents(docs_loader)
+            with tracing.span("split") as sp:
+                docs_chunks = splitter.split_documents(docs_loader)
+                sp.set(chunks = len(docs_chunks))
 
         print(f"[{os.path.basename(doc_url)}] Split into {len(docs_chunks)} sub-documents.")
         total_chunks += len(docs_chunks)
 
-        # 5) Add documents to existing store or create a new one
-        if vector_store is None:
-            vector_store = FAISS.from_documents(docs_chunks, embeddings)
-        else:
-            vector_store.add_documents(docs_chunks)
+        # 5) Add documents to existing store or create a new one (embedding calls)
+        with tracing.span("embed", chunks = len(docs_chunks)):
+            if vector_store is None:
+                vector_store = FAISS.from_documents(docs_chunks, embeddings)
+            else:
+                vector_store.add_documents(docs_chunks)
 
     # 6) Save once at the end
+    with tracing.span("index.save"):
+        if vector_store is not None:
+            vector_store.save_local(index_dir)
+
+    # 7) Quantized copy (requested, or already present and now stale)
     if vector_store is not None:
-        vector_store.save_local(index_dir)
+        from vector_quantization import QuantizationConfig, read_config, save_quantized
+
+        existing = read_config(index_dir)
+        if quantize is None and existing is not None:
+            quantize = QuantizationConfig.from_dict(existing)
+    if quantize is not None and vector_store is not None:
+        with tracing.span("index.quantize", quantization = quantize.label) as sp:
+            stats = save_quantized(index_dir, quantize)
+            sp.set(**stats)
 
     end = time.time()
     print(f"Total chunks: {total_chunks} | Time: {end - start:.2f}s")
@@ -0,0 +1,170 @@
+"""
+Batch normalisation of numeric extraction results (`schema.OutputNumericField` /
+`schema.NumericValue`, as models or dicts) into one typed pandas table.
+
+Instead of validating and post-processing each object in a Python loop, the raw fields are
+gathered once into columns and normalised with vectorised pandas/NumPy operations:
+
+- unit: None -> 1 (like `NumericValue.unit_none_to_default`), unknown codes -> <NA>
+- unit_name / currency: categoricals, each distinct raw value is resolved once
+- value_scaled: value * `schema.UNIT_SCALE[unit]` (pct -> fraction)
+- currency: ISO 4217 code (symbols and common names mapped, anything else -> "")
+- source_document / source_page: first chunk of `text_source`
+"""
+from __future__ import annotations
+
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from schema import UNIT_SCALE, _UNIT_CODE_MAP
+
+UNIT_NAMES = {code: name for name, code in _UNIT_CODE_MAP.items()}
+
+CURRENCY_ALIASES = {
+    "€": "EUR", "EURO": "EUR", "EUROS": "EUR",
+    "$": "USD", "US$": "USD", "USD$": "USD", "DOLLAR": "USD", "DOLLARS": "USD", "DÓLARES": "USD",
+    "£": "GBP", "POUND": "GBP", "POUNDS": "GBP",
+    "¥": "JPY",
+}
+
+COLUMNS = [
+    "key", "value", "unit", "unit_name", "value_scaled", "currency",
+    "source_document", "source_page", "valid",
+]
+
+
+def _get(obj: Any, name: str) -> Any:
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+def _first_source(output: Any) -> Tuple[Optional[str], Optional[int]]:
+    sources = _get(output, "text_source") or []
+    if not sources:
+        return None, None
+    pages = _get(sources[0], "chunk_page") or []
+    return _get(sources[0], "chunk_document"), (pages[0] if pages else None)
+
+
+def _to_float_array(values: List[Any]) -> np.ndarray:
+    # None -> NaN; numeric strings ("54") are coerced like pydantic does, anything else -> NaN.
+    # Always a writable copy (pandas copy-on-write can hand out read-only views)
+    try:
+        return np.array(values, dtype = float)
+    except (TypeError, ValueError):
+        return np.array(pd.to_numeric(pd.Series(values, dtype = object), errors = "coerce"), dtype = float)
+
+
+def _iso_currency(raw: Any) -> str:
+    if not isinstance(raw, str):
+        return ""
+    code = raw.strip().upper()
+    if code in CURRENCY_ALIASES:
+        return CURRENCY_ALIASES[code]
+    return code if len(code) == 3 and code.isascii() and code.isalpha() else ""
+
+
+def normalize_currency(currency: Sequence[Any]) -> pd.Categorical:
+    """
+    Map raw currencies to ISO 4217 codes ("" when missing or not recognised). Each distinct raw
+    value is normalised once (`pd.factorize`), the rest is an integer take.
+    """
+    codes, uniques = pd.factorize(pd.Series(currency, dtype = object), use_na_sentinel = False)
+    normalized = [_iso_currency(u) for u in uniques]
+    categories = sorted(set(normalized))
+    index = {c: i for i, c in enumerate(categories)}
+    lookup = np.array([index[c] for c in normalized], dtype = np.int32)
+    return pd.Categorical.from_codes(lookup[codes] if len(codes) else codes, categories = categories)
+
+
+def normalize_numeric_batch(outputs: Iterable[Any], keys: Optional[Sequence[Any]] = None) -> pd.DataFrame:
+    """
+    Normalise a batch of numeric results.
+
+    Args:
+        outputs: `OutputNumericField` / `NumericValue` objects or their dict form (e.g. LLM JSON
+            already parsed). For output fields the value is read from `result_field`.
+        keys: One identifier per output (e.g. field_id); defaults to the position.
+
+    Returns:
+        DataFrame with `COLUMNS`. `valid` is False when the value is not numeric or the unit code
+        is unknown (those rows have <NA> in `value_scaled`).
+    """
+    outputs = list(outputs)
+
+    # Single Python pass to gather the raw columns, everything else is vectorised
+    values, units, currencies, documents, pages = [], [], [], [], []
+    for output in outputs:
+        result = _get(output, "result_field")
+        result = output if result is None else result
+        document, page = _first_source(output)
+        values.append(_get(result, "value"))
+        units.append(_get(result, "unit"))
+        currencies.append(_get(result, "currency"))
+        documents.append(document)
+        pages.append(page)
+
+    value = _to_float_array(values)
+
+    # Unit code: missing -> 1, unknown -> <NA>; scale through a lookup array indexed by code
+    unit = _to_float_array(units)
+    unit[np.fromiter((u is None for u in units), dtype = bool, count = len(units))] = 1  # Not "pct" / "x"
+    max_code = max(UNIT_SCALE)
+    scale_lookup = np.full(max_code + 1, np.nan)
+    scale_lookup[list(UNIT_SCALE)] = list(UNIT_SCALE.values())
+    in_range = (unit >= 0) & (unit <= max_code) & (unit == np.floor(unit))
+    scale = np.full(len(unit), np.nan)
+    scale[in_range] = scale_lookup[unit[in_range].astype(np.int64)]
+    known = ~np.isnan(scale)
+
+    unit_int = np.where(known, unit, 0).astype(np.int64)
+    unit_codes = pd.arrays.IntegerArray(unit_int, ~known)
+
+    names = sorted(UNIT_NAMES)
+    name_lookup = np.full(max_code + 1, -1, dtype = np.int8)
+    name_lookup[names] = np.arange(len(names))
+    unit_names = pd.Categorical.from_codes(
+        np.where(known, name_lookup[unit_int], -1), categories = [UNIT_NAMES[c] for c in names]
+    )
+
+    frame = pd.DataFrame({
+        "key": list(keys) if keys is not None else np.arange(len(outputs)),
+        "value": pd.array(value, dtype = "Float64"),
+        "unit": unit_codes,
+        "unit_name": unit_names,
+        "value_scaled": pd.array(value * scale, dtype = "Float64"),
+        "currency": normalize_currency(currencies),
+        "source_document": pd.Series(documents, dtype = object),
+        "source_page": pd.array(pages, dtype = "Int64"),
+        "valid": ~np.isnan(value) & known,
+    })
+    return frame[COLUMNS]
+
+
+def normalize_numeric_loop(outputs: Iterable[Any]) -> List[dict]:
+    """
+    Reference per-object implementation (pydantic validation + Python post-processing),
+    kept for the benchmark and to check `normalize_numeric_batch` against.
+    """
+    from schema import NumericValue
+
+    rows = []
+    for key, output in enumerate(outputs):
+        result = _get(output, "result_field")
+        numeric = NumericValue.model_validate(result if result is not None else output)
+        document, page = _first_source(output)
+        currency = _iso_currency(numeric.currency)
+        scale = UNIT_SCALE.get(numeric.unit)
+        rows.append({
+            "key": key,
+            "value": numeric.value,
+            "unit": numeric.unit if scale is not None else None,
+            "unit_name": UNIT_NAMES.get(numeric.unit),
+            "value_scaled": numeric.value * scale if numeric.value is not None and scale is not None else np.nan,
+            "currency": currency,
+            "source_document": document,
+            "source_page": page,
+            "valid": numeric.value is not None and scale is not None,
+        })
+    return rows
@@ -0,0 +1,191 @@
+"""
+Persistent cache of parsed PDFs, independent of how they are chunked afterwards.
+
+Parsing is the slow part of ingestion; splitting is cheap. The pages of every PDF (text + loader
+metadata, or the positioned lines and tables of `pdf_layout`) are stored once per content hash
+and parser, so changing `chunk_size` / `chunk_overlap` or trying another splitter on the
+`annual_reports/` corpus only re-splits:
+
+    cache = ParsedDocumentCache()
+    pages = cache.documents("annual_reports/cuentas-anuales-consolidadas.pdf")   # PyPDFLoader pages
+    chunks = RecursiveCharacterTextSplitter(chunk_size = 500).split_documents(pages)
+
+- Key: SHA-256 of the PDF bytes + parser + `PARSER_VERSIONS` (bump a version when its parsing
+  changes). Renamed or copied files hit the same entry; `source` is set to the path asked for.
+- Storage: one Parquet file per entry (zstd, columns page / text / metadata JSON) under
+  `.cache/parsed/`, written atomically.
+
+Pre-parse a corpus:
+    python parsed_cache.py annual_reports --parsers pypdf layout
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+PARSED_DIR = Path(".cache/parsed")
+PARSERS = ("pypdf", "layout")
+PARSER_VERSIONS = {"pypdf": "1", "layout": "1"}
+
+_HASH_BLOCK = 1 << 20
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParsedDocumentCache:
+    """
+    Args:
+        root: Folder of the Parquet entries (created on first write).
+    """
+
+    def __init__(self, root: Path = PARSED_DIR):
+        self.root = Path(root)
+        # (path, size, mtime) -> hash: re-hashing a large PDF on every call would cost ~1 parse
+        self._hashes: Dict[Tuple[str, int, float], str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _hash(self, path: Path) -> str:
+        stat = os.stat(path)
+        key = (str(Path(path).resolve()), stat.st_size, stat.st_mtime)
+        with self._lock:
+            cached = self._hashes.get(key)
+        if cached is None:
+            cached = file_hash(path)
+            with self._lock:
+                self._hashes[key] = cached
+        return cached
+
+    def entry_path(self, path: Path, parser: str) -> Path:
+        if parser not in PARSERS:
+            raise ValueError(f"Invalid parser: {parser!r} (choose from {PARSERS})")
+        digest = self._hash(path)
+        return self.root / digest[:2] / f"{digest}.{parser}-v{PARSER_VERSIONS[parser]}.parquet"
+
+    # ------------------------------------------------------------------ I/O
+
+    @staticmethod
+    def _read(entry: Path) -> List[Dict[str, Any]]:
+        import pyarrow.parquet as pq
+
+        columns = pq.read_table(entry).to_pydict()
+        return [
+            {"page": page, "text": text, "metadata": json.loads(metadata)}
+            for page, text, metadata in zip(columns["page"], columns["text"], columns["metadata"])
+        ]
+
+    @staticmethod
+    def _write(entry: Path, rows: List[Dict[str, Any]]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({
+            "page": pa.array([r["page"] for r in rows], type = pa.int32()),
+            "text": [r["text"] for r in rows],
+            "metadata": [json.dumps(r["metadata"], ensure_ascii = False, default = str) for r in rows],
+        })
+        entry.parent.mkdir(parents = True, exist_ok = True)
+        tmp = entry.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        pq.write_table(table, tmp, compression = "zstd")
+        os.replace(tmp, entry)
+
+    def _pages(self, path: Path, parser: str, parse) -> List[Dict[str, Any]]:
+        entry = self.entry_path(path, parser)
+        if entry.exists():
+            try:
+                rows = self._read(entry)
+            except Exception:
+                rows = None  # Truncated / foreign file: parse again and overwrite
+            if rows is not None:
+                self.hits += 1
+                return rows
+        self.misses += 1
+        rows = parse(path)
+        self._write(entry, rows)
+        return rows
+
+    # -------------------------------------------------------------- parsers
+
+    def documents(self, path: Path) -> List[Any]:
+        """
+        `PyPDFLoader(path).load()` pages as LangChain documents, parsed at most once per PDF.
+        """
+        from langchain_core.documents import Document
+
+        def parse(path: Path) -> List[Dict[str, Any]]:
+            from langchain_community.document_loaders import PyPDFLoader
+
+            return [
+                {"page": int(doc.metadata.get("page", i)), "text": doc.page_content, "metadata": doc.metadata}
+                for i, doc in enumerate(PyPDFLoader(str(path)).load())
+            ]
+
+        return [
+            Document(page_content = row["text"], metadata = {**row["metadata"], "source": str(path)})
+            for row in self._pages(path, "pypdf", parse)
+        ]
+
+    def layout(self, path: Path) -> List[Any]:
+        """
+        `pdf_layout.parse_pdf(path)` pages (positioned lines and tables), parsed at most once per PDF.
+        """
+        from pdf_layout import page_from_dict, page_to_dict, parse_pdf
+
+        def parse(path: Path) -> List[Dict[str, Any]]:
+            return [
+                {"page": page.page, "text": "\n".join(ln.text for ln in page.lines), "metadata": page_to_dict(page)}
+                for page in parse_pdf(path)
+            ]
+
+        return [page_from_dict(row["metadata"]) for row in self._pages(path, "layout", parse)]
+
+    def invalidate(self, path: Path) -> int:
+        """
+        Drop the cached entries of a PDF (every parser). Returns the number of files removed.
+        """
+        removed = 0
+        for parser in PARSERS:
+            entry = self.entry_path(path, parser)
+            if entry.exists():
+                entry.unlink()
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        entries = list(self.root.glob("*/*.parquet")) if self.root.exists() else []
+        return {
+            "entries": len(entries),
+            "bytes": sum(e.stat().st_size for e in entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Parse PDFs once into the parsed-document cache.")
+    parser.add_argument("paths", nargs = "+", type = Path, help = "PDF files or folders (searched recursively).")
+    parser.add_argument("--parsers", nargs = "+", default = ["pypdf"], choices = PARSERS)
+    parser.add_argument("--root", type = Path, default = PARSED_DIR)
+    args = parser.parse_args()
+
+    cache = ParsedDocumentCache(args.root)
+    pdfs = [p for path in args.paths for p in (sorted(path.rglob("*.pdf")) if path.is_dir() else [path])]
+    for pdf in pdfs:
+        for name in args.parsers:
+            start = time.perf_counter()
+            pages = cache.documents(pdf) if name == "pypdf" else cache.layout(pdf)
+            print(f"{pdf} [{name}]: {len(pages)} pages in {time.perf_counter() - start:.2f}s")
+    print(cache.stats())
@@ -0,0 +1,424 @@
+"""
+Page-aware, layout-preserving PDF loader: table regions become structured table chunks and prose
+is chunked along section boundaries (alternative to `PyPDFLoader` + a generic text splitter).
+
+- Text lines with positions, font size and weight come from PyMuPDF (`pip install pymupdf`),
+  which parses locally in C, much faster than pypdf.
+- Tables: PyMuPDF's ruled-table finder (`page.find_tables`) when available, plus runs of lines
+  whose words fall into aligned columns with figures (the usual borderless financial tables).
+  Each table is stored as header + rows; a long table is split between rows, repeating the
+  header in every chunk, so no row is cut in half.
+- Prose: headings (larger or bold font, numbered "3.2 Riesgo de tipo de interés" lines) start a
+  new section; paragraphs are packed into chunks of up to `chunk_tokens` without crossing a
+  section, and every chunk carries its section title.
+
+Chunks keep PyPDFLoader's metadata (`source`, 0-based `page`, `page_label`) plus `chunk_type`
+("table" | "text"), `section`, `pages` and, for tables, `table_header` / `table_rows`.
+
+    from pdf_layout import load_layout_documents
+    docs = load_layout_documents("annual_reports/cuentas-anuales-consolidadas.pdf")
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+DEFAULT_CHUNK_TOKENS = 1000   # Same budget as the tiktoken splitter of ingestion.py
+COLUMN_GAP = 12.0             # Min horizontal gap (pt) between two cells of a table row
+MIN_TABLE_ROWS = 3            # Consecutive aligned rows to call a region a table
+HEADING_SIZE_RATIO = 1.15     # Font size over the body size to call a line a heading
+MAX_HEADING_CHARS = 120
+
+_NUMBER_RE = re.compile(r"^[(\-–]?[\d.,]+%?\)?$|^[-–—]$")
+_YEAR_RE = re.compile(r"^(19|20)\d{2}$|^(19|20)\d{2}[-/]\d{2,4}$")
+_NUMBERED_HEADING_RE = re.compile(r"^(\d{1,2}(\.\d{1,2})*\.?|[IVX]{1,4}\.|[a-z]\))\s+[A-ZÁÉÍÓÚÑ]")
+
+
+@dataclass
+class Word:
+    x0: float
+    x1: float
+    text: str
+
+
+@dataclass
+class Line:
+    page: int                         # 0-based
+    y0: float
+    y1: float
+    words: List[Word]
+    size: float = 0.0
+    bold: bool = False
+
+    @property
+    def text(self) -> str:
+        return " ".join(w.text for w in self.words)
+
+    @property
+    def x0(self) -> float:
+        return self.words[0].x0 if self.words else 0.0
+
+    def cells(self, gap: float = COLUMN_GAP) -> List[Tuple[float, float, str]]:
+        """
+        (x0, x1, text) of the runs of words separated by at least `gap` points.
+        """
+        cells: List[Tuple[float, float, str]] = []
+        for w in self.words:
+            if cells and w.x0 - cells[-1][1] < gap:
+                x0, _, text = cells[-1]
+                cells[-1] = (x0, w.x1, f"{text} {w.text}")
+            else:
+                cells.append((w.x0, w.x1, w.text))
+        return cells
+
+
+@dataclass
+class Table:
+    page: int
+    header: List[str]
+    rows: List[List[str]]
+    y0: float = 0.0
+
+    def to_markdown(self, rows: Optional[Sequence[Sequence[str]]] = None) -> str:
+        def line(cells: Sequence[str]) -> str:
+            return "| " + " | ".join(str(c or "").replace("|", "/").replace("\n", " ") for c in cells) + " |"
+
+        return "\n".join([line(self.header), line(["---"] * len(self.header)), *(line(r) for r in (self.rows if rows is None else rows))])
+
+
+@dataclass
+class Page:
+    page: int                         # 0-based
+    lines: List[Line] = field(default_factory = list)
+    tables: List[Table] = field(default_factory = list)
+
+
+@dataclass
+class Chunk:
+    text: str
+    metadata: Dict[str, Any]
+
+
+# ======================================================================================
+# Parsing (PyMuPDF)
+# ======================================================================================
+def _page_lines(page: Any, page_no: int) -> List[Line]:
+    data = page.get_text("dict")
+    words = page.get_text("words")  # (x0, y0, x1, y1, word, block_no, line_no, word_no)
+
+    by_line: Dict[Tuple[int, int], List[Word]] = {}
+    for x0, _, x1, _, text, block_no, line_no, _ in words:
+        by_line.setdefault((block_no, line_no), []).append(Word(x0, x1, text))
+
+    lines = []
+    for block_no, block in enumerate(data.get("blocks", [])):
+        for line_no, line in enumerate(block.get("lines", [])):
+            line_words = by_line.get((block.get("number", block_no), line_no))
+            spans = [s for s in line.get("spans", []) if s.get("text", "").strip()]
+            if not line_words or not spans:
+                continue
+            main = max(spans, key = lambda s: len(s["text"]))
+            lines.append(Line(
+                page  = page_no,
+                y0    = line["bbox"][1],
+                y1    = line["bbox"][3],
+                words = sorted(line_words, key = lambda w: w.x0),
+                size  = round(main.get("size", 0.0), 1),
+                bold  = bool(main.get("flags", 0) & 16) or "bold" in main.get("font", "").lower(),
+            ))
+    return sorted(lines, key = lambda ln: (round(ln.y0), ln.x0))
+
+
+def _ruled_tables(page: Any, page_no: int) -> Tuple[List[Table], List[Tuple[float, float]]]:
+    finder = getattr(page, "find_tables", None)  # PyMuPDF >= 1.23
+    if finder is None:
+        return [], []
+    tables, spans = [], []
+    for found in finder().tables:
+        rows = [[(c or "").strip() for c in row] for row in found.extract()]
+        rows = [r for r in rows if any(r)]
+        if len(rows) < 2:
+            continue
+        header = list(getattr(found.header, "names", None) or rows[0])
+        body = rows[1:] if header == rows[0] else rows
+        tables.append(Table(page_no, [h or "" for h in header], body, y0 = found.bbox[1]))
+        spans.append((found.bbox[1], found.bbox[3]))
+    return tables, spans
+
+
+def parse_pdf(path: Path) -> List[Page]:
+    """
+    Lines (outside ruled tables) and ruled tables of every page.
+    """
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf  # Older PyMuPDF releases
+
+    pages = []
+    with pymupdf.open(str(path)) as pdf:
+        for page_no, page in enumerate(pdf):
+            tables, spans = _ruled_tables(page, page_no)
+            lines = [
+                ln for ln in _page_lines(page, page_no)
+                if not any(y0 - 1 <= (ln.y0 + ln.y1) / 2 <= y1 + 1 for y0, y1 in spans)
+            ]
+            pages.append(Page(page_no, lines, tables))
+    return pages
+
+
+# ======================================================================================
+# Layout analysis (backend independent)
+# ======================================================================================
+def _is_number(text: str) -> bool:
+    return bool(_NUMBER_RE.match(text.replace(" ", "")))
+
+
+def _is_row(line: Line) -> bool:
+    cells = line.cells()
+    return len(cells) >= 2 and any(_is_number(c[2]) for c in cells[1:])
+
+
+def _is_header_row(line: Line) -> bool:
+    # "Millones de euros   2024   2023": the only figures are years (column headers)
+    cells = line.cells()
+    return len(cells) >= 2 and all(_YEAR_RE.match(c[2]) or not _is_number(c[2]) for c in cells[1:])
+
+
+def _columns(rows: Sequence[Line]) -> List[float]:
+    # Right edges of the widest row: figures are right-aligned in financial tables
+    widest = max(rows, key = lambda ln: len(ln.cells()))
+    return [x1 for _, x1, _ in widest.cells()]
+
+
+def _assign(cells: Sequence[Tuple[float, float, str]], columns: Sequence[float]) -> List[str]:
+    out = [""] * len(columns)
+    for i, (x0, x1, text) in enumerate(cells):
+        col = 0 if i == 0 and x0 < columns[0] else min(range(len(columns)), key = lambda c: abs(columns[c] - x1))
+        out[col] = f"{out[col]} {text}".strip()
+    return out
+
+
+def detect_tables(lines: Sequence[Line]) -> Tuple[List[Table], List[Line]]:
+    """
+    Split the lines of a page into aligned-column tables (runs of >= MIN_TABLE_ROWS rows with
+    figures) and the remaining prose lines. The header is the first row when its only figures are
+    years, or else the line just above the run when it has several cells and no figures.
+    """
+    tables: List[Table] = []
+    prose: List[Line] = []
+    i = 0
+    while i < len(lines):
+        j = i
+        while j < len(lines) and _is_row(lines[j]):
+            j += 1
+        if j - i < MIN_TABLE_ROWS:
+            prose.append(lines[i])
+            i += 1
+            continue
+
+        rows = list(lines[i:j])
+        header_line = None
+        if _is_header_row(rows[0]):
+            header_line = rows.pop(0)
+        elif prose and len(prose[-1].cells()) >= 2 and not _is_row(prose[-1]) and prose[-1].page == rows[0].page:
+            header_line = prose.pop()
+        columns = _columns(rows + ([header_line] if header_line else []))
+        header = _assign(header_line.cells(), columns) if header_line else [""] + [f"col_{c}" for c in range(1, len(columns))]
+        tables.append(Table(
+            page   = rows[0].page,
+            header = header,
+            rows   = [_assign(r.cells(), columns) for r in rows],
+            y0     = (header_line or rows[0]).y0,
+        ))
+        i = j
+    return tables, prose
+
+
+def body_size(pages: Iterable[Page]) -> float:
+    sizes = Counter()
+    for page in pages:
+        for ln in page.lines:
+            sizes[ln.size] += len(ln.text)
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def is_heading(line: Line, body: float) -> bool:
+    text = line.text.strip()
+    if not text or len(text) > MAX_HEADING_CHARS or text.endswith((".", ",", ";")) or _is_number(text):
+        return False
+    if body and line.size >= body * HEADING_SIZE_RATIO:
+        return True
+    return line.bold or bool(_NUMBERED_HEADING_RE.match(text))
+
+
+# ======================================================================================
+# Chunking
+# ======================================================================================
+def _count_tokens(text: str) -> int:
+    try:
+        from prompts.prompts_profiler import estimate_tokens
+    except ImportError:
+        return len(text) // 4  # Rough estimate
+    return estimate_tokens(text)
+
+
+def _metadata(source: str, pages: Sequence[int], chunk_type: str, section: str, **extra: Any) -> Dict[str, Any]:
+    return {
+        "source": source,
+        "page": pages[0],
+        "page_label": str(pages[0] + 1),
+        "pages": sorted(set(pages)),
+        "chunk_type": chunk_type,
+        "section": section,
+        **extra,
+    }
+
+
+def table_chunks(table: Table, source: str, section: str, chunk_tokens: int = DEFAULT_CHUNK_TOKENS) -> List[Chunk]:
+    """
+    Markdown table chunks of at most `chunk_tokens`, split between rows, header repeated.
+    """
+    title = f"{section}\n" if section else ""
+    fixed = _count_tokens(title + table.to_markdown([]))
+    groups: List[List[List[str]]] = [[]]
+    used = fixed
+    for row in table.rows:
+        cost = _count_tokens(table.to_markdown([row]).rsplit("\n", 1)[-1]) + 1
+        if groups[-1] and used + cost > chunk_tokens:
+            groups.append([])
+            used = fixed
+        groups[-1].append(row)
+        used += cost
+
+    return [
+        Chunk(
+            text     = title + table.to_markdown(rows),
+            metadata = _metadata(
+                source, [table.page], "table", section,
+                table_header = list(table.header), table_rows = len(rows), table_part = f"{n}/{len(groups)}",
+            ),
+        )
+        for n, rows in enumerate(groups, 1)
+    ]
+
+
+def _paragraphs(lines: Sequence[Line]) -> List[Tuple[int, str]]:
+    # Lines closer than ~1 line height belong to the same paragraph
+    paragraphs: List[Tuple[int, List[str]]] = []
+    previous = None
+    for ln in lines:
+        new = (
+            previous is None or ln.page != previous.page
+            or ln.y0 - previous.y1 > 0.8 * max(previous.y1 - previous.y0, 1.0)
+        )
+        if new:
+            paragraphs.append((ln.page, []))
+        paragraphs[-1][1].append(ln.text)
+        previous = ln
+    return [(page, " ".join(texts)) for page, texts in paragraphs]
+
+
+def _split_long(text: str, chunk_tokens: int) -> List[str]:
+    # Paragraph over the budget: pack sentences (a single huge sentence is kept whole)
+    sentences = re.split(r"(?<=[.;:])\s+", text)
+    parts, current = [], ""
+    for sentence in sentences:
+        candidate = f"{current} {sentence}".strip()
+        if current and _count_tokens(candidate) > chunk_tokens:
+            parts.append(current)
+            current = sentence
+        else:
+            current = candidate
+    return parts + ([current] if current else [])
+
+
+def prose_chunks(section: str, lines: Sequence[Line], source: str, chunk_tokens: int = DEFAULT_CHUNK_TOKENS) -> List[Chunk]:
+    """
+    Paragraphs of one section packed into chunks of at most `chunk_tokens` (section title first).
+    """
+    title = f"{section}\n" if section else ""
+    chunks: List[Chunk] = []
+    texts: List[str] = []
+    pages: List[int] = []
+    used = _count_tokens(title)
+
+    def flush() -> None:
+        nonlocal texts, pages, used
+        if texts:
+            chunks.append(Chunk(title + "\n".join(texts), _metadata(source, pages, "text", section)))
+        texts, pages, used = [], [], _count_tokens(title)
+
+    for page, paragraph in _paragraphs(lines):
+        for part in _split_long(paragraph, chunk_tokens) if _count_tokens(paragraph) > chunk_tokens else [paragraph]:
+            cost = _count_tokens(part)
+            if texts and used + cost > chunk_tokens:
+                flush()
+            texts.append(part)
+            pages.append(page)
+            used += cost
+    flush()
+    return chunks
+
+
+def layout_chunks(pages: Sequence[Page], source: str, chunk_tokens: int = DEFAULT_CHUNK_TOKENS) -> List[Chunk]:
+    """
+    Table and section chunks of parsed pages (a table is emitted as soon as it is found, so it
+    may precede the prose of its section that comes before it).
+    """
+    body = body_size(pages)
+    chunks: List[Chunk] = []
+    section, section_lines = "", []
+
+    def close_section() -> None:
+        nonlocal section_lines
+        chunks.extend(prose_chunks(section, section_lines, source, chunk_tokens))
+        section_lines = []
+
+    for page in pages:
+        tables, prose = detect_tables(page.lines)
+        # Interleave tables with the prose by vertical position, so they get the right section
+        items = sorted(
+            [(t.y0, 1, t) for t in page.tables + tables] + [(ln.y0, 0, ln) for ln in prose],
+            key = lambda item: (item[0], item[1]),
+        )
+        for _, is_table, item in items:
+            if is_table:
+                chunks.extend(table_chunks(item, source, section, chunk_tokens))
+            elif is_heading(item, body):
+                close_section()
+                section = item.text.strip()
+            else:
+                section_lines.append(item)
+    close_section()
+    return chunks
+
+
+def page_to_dict(page: Page) -> Dict[str, Any]:
+    return asdict(page)
+
+
+def page_from_dict(data: Mapping[str, Any]) -> Page:
+    return Page(
+        page   = data["page"],
+        lines  = [
+            Line(**{**ln, "words": [Word(**w) for w in ln["words"]]})
+            for ln in data.get("lines", [])
+        ],
+        tables = [Table(**t) for t in data.get("tables", [])],
+    )
+
+
+def load_layout_documents(path: Path, chunk_tokens: int = DEFAULT_CHUNK_TOKENS, pages: Optional[Sequence[Page]] = None) -> List[Any]:
+    """
+    LangChain documents of the table and section chunks of a PDF (of its already parsed
+    `pages` when given, e.g. from parsed_cache.py).
+    """
+    from langchain_core.documents import Document
+
+    source = str(path)
+    pages = parse_pdf(path) if pages is None else pages
+    return [Document(page_content = c.text, metadata = c.metadata) for c in layout_chunks(pages, source, chunk_tokens)]
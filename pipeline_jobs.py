@@ -0,0 +1,150 @@
+"""
+Background execution of extraction pipelines for the Streamlit apps.
+
+`JobManager` runs pipeline functions in a bounded thread pool, outside the Streamlit script thread,
+and keeps their progress in process memory (shared by every session, so reruns, widget
+interactions and other users never restart or block a run). The UI only holds job ids and polls
+`JobManager.get()` snapshots:
+
+- `Job.partial[stage]`: fields streamed so far (`on_event(stage, key, value)` callback).
+- `Job.stages[stage]`: finished stage outputs (`on_stage(stage, output)` callback).
+
+The pipeline function is called as `fn(*args, on_event=..., on_stage=...)`; its return value is
+ignored (stages are reported through `on_stage`).
+"""
+from __future__ import annotations
+
+import copy
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_WORKERS = 4
+MAX_FINISHED_JOBS = 200  # Finished jobs kept for polling, oldest dropped first
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+@dataclass
+class Job:
+    job_id: str
+    company: str
+    field_id: str
+    field_type: str
+    status: str = "queued"                # queued | running | done | error
+    stages: Dict[str, Dict[str, Any]] = field(default_factory = dict)
+    partial: Dict[str, Dict[str, Any]] = field(default_factory = dict)
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory = time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    @property
+    def seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def label(self) -> str:
+        return f"{self.company} / {self.field_id} — {self.status} ({self.seconds:,.0f}s)"
+
+
+class JobManager:
+    """
+    Args:
+        max_workers: Max pipelines running at once (further jobs wait in the queue).
+        max_finished: Finished jobs kept in memory.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._pool = ThreadPoolExecutor(max_workers = max(1, max_workers), thread_name_prefix = "pipeline")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], company: str, field_id: str, field_type: str) -> str:
+        """
+        Queue `fn(company, field_id, field_type, on_event=..., on_stage=...)`. A job already
+        queued/running for the same (company, field_id) is reused instead of starting another.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.active and (job.company, job.field_id) == (company, field_id):
+                    return job.job_id
+            job = Job(job_id = uuid.uuid4().hex[:12], company = company, field_id = field_id, field_type = field_type)
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._pool.submit(self._run, job.job_id, fn)
+        return job.job_id
+
+    def _run(self, job_id: str, fn: Callable[..., Any]) -> None:
+        job = self._jobs[job_id]
+        with self._lock:
+            job.status, job.started_at = "running", time.time()
+        try:
+            fn(
+                job.company,
+                job.field_id,
+                job.field_type,
+                on_event = lambda stage, key, value: self._on_event(job, stage, key, value),
+                on_stage = lambda stage, output: self._on_stage(job, stage, output),
+            )
+            status, error = "done", None
+        except Exception as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+        with self._lock:
+            job.status, job.error, job.finished_at = status, error, time.time()
+
+    def _on_event(self, job: Job, stage: str, key: str, value: Any) -> None:
+        with self._lock:
+            data = job.partial.setdefault(stage, {})
+            if key.endswith("[]"):
+                data.setdefault(key[:-2] + "_items", []).append(value)
+            else:
+                data[key] = value
+
+    def _on_stage(self, job: Job, stage: str, output: Dict[str, Any]) -> None:
+        with self._lock:
+            job.stages[stage] = output
+            job.partial.pop(stage, None)
+
+    def _prune(self) -> None:
+        finished = sorted((j for j in self._jobs.values() if not j.active), key = lambda j: j.finished_at or 0)
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.job_id]
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        """
+        Consistent copy of a job (safe to render while the pipeline keeps updating it).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id) if job_id else None
+            return copy.deepcopy(job) if job is not None else None
+
+    def jobs(self, job_ids: Optional[List[str]] = None) -> List[Job]:
+        with self._lock:
+            ids = job_ids if job_ids is not None else list(self._jobs)
+            return [copy.deepcopy(self._jobs[i]) for i in ids if i in self._jobs]
+
+    def statuses(self, job_ids: List[str]) -> Dict[str, str]:
+        """
+        Status per job id without copying the outputs (cheap to poll for large grids).
+        """
+        with self._lock:
+            return {i: self._jobs[i].status for i in job_ids if i in self._jobs}
+
+    def counts(self) -> Tuple[int, int]:
+        """
+        (running, queued) jobs across all sessions.
+        """
+        with self._lock:
+            statuses = [j.status for j in self._jobs.values()]
+        return statuses.count("running"), statuses.count("queued")
@@ -1,18 +1,34 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Tuple
 import re
 
-import frontmatter
 from jinja2 import (
     Environment,
     FileSystemLoader,
     StrictUndefined,
     TemplateError,
-    meta,
 )
 
+from prompts.template_index import TemplateIndex
+
+_SECTION_RE = re.compile(r"^#{1,2} +(.+?)\s*$", re.MULTILINE)
+_FIELD_SENTINEL = "\x00field\x00" # Never appears in real prompts; marks field-dependent output
+
+
+class PromptParts(NamedTuple):
+    """
+    A rendered prompt split for provider-side prefix caching.
+    """
+
+    prefix: str
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
 
 class PromptOrchestrator:
     """
@@ -22,9 +38,12 @@ class PromptOrchestrator:
     - Loads template content from a configured templates directory.
     - Renders prompts with provided variables (`kwargs`).
     - Extracts frontmatter metadata and detects undeclared variables used by the template.
+    - Keeps a precomputed template index (AST, variables, flags, hash) refreshed on file changes.
+    - Optionally splits prompts into a shared prefix and a field-specific suffix (prefix caching).
     """
 
     _env: Environment | None = None
+    _index: TemplateIndex | None = None
 
     @classmethod
     def _get_env(cls, templates_dir: str = "prompts/templates") -> Environment:
@@ -49,29 +68,16 @@ class PromptOrchestrator:
 
         return cls._env
 
-    @staticmethod
-    def _load_post(template_name: str) -> frontmatter.Post:
+    @classmethod
+    def get_index(cls) -> TemplateIndex:
         """
-        Load a `.j2` template and return a `frontmatter.Post` object (content, metadata).
-
-        Args:
-            template_name: Template name without extension.
-
-        Raises:
-            FileNotFoundError: If the template cannot be found by the configured loader.
+        Return (and cache) the template metadata index bound to the configured Environment.
         """
-        env = PromptOrchestrator._get_env()
-        template_path = f"{template_name}.j2"
+        if cls._index is None:
+            env = cls._get_env()
+            cls._index = TemplateIndex(env, Path(env.loader.searchpath[0]))
 
-        _, filename, _ = env.loader.get_source(env, template_path)
-
-        try:
-            with open(filename, "r", encoding = "utf-8") as file:
-                return frontmatter.load(file)
-        except FileNotFoundError as e:
-            raise FileNotFoundError(
-                f"Template not found: '{template_path}' in the configured templates directory."
-            ) from e
+        return cls._index
 
     @staticmethod
     def get_prompt(template_name: str, **kwargs: Any) -> str:
@@ -88,10 +94,7 @@ class PromptOrchestrator:
         Raises:
             ValueError: If Jinja2 raises a rendering error.
         """
-        env = PromptOrchestrator._get_env()
-        post = PromptOrchestrator._load_post(template_name) 
-
-        jinja_template = env.from_string(post.content)
+        jinja_template = PromptOrchestrator.get_index().get(template_name).template
 
         try:
             rendered = jinja_template.render(**kwargs)
@@ -110,8 +113,7 @@ class PromptOrchestrator:
         """
         Return template metadata and a list of variables referenced by the template.
 
-        It parses the template content and finds undeclared variables (placeholders that
-        must be provided at render time).
+        Served from the template index, so the AST is only parsed when the file changes.
 
         Returns:
             A dict with:
@@ -119,18 +121,91 @@ class PromptOrchestrator:
             - description: from frontmatter (or default)
             - author: from frontmatter (or default)
             - variables: sorted list of undeclared variables used in the template
+            - required: sorted list of variables referenced without a default/defined guard
+            - flags: sorted list of `include_*` conditional flags
+            - content_hash: sha256 of the template file
             - frontmatter: the full metadata dict
         """
-        env = PromptOrchestrator._get_env()
-        post = PromptOrchestrator._load_post(template_name)
-
-        ast = env.parse(post.content)
-        variables = sorted(meta.find_undeclared_variables(ast))
+        entry = PromptOrchestrator.get_index().get(template_name)
 
         return {
             "name": template_name,
-            "description": post.metadata.get("description", "No description provided"),
-            "author": post.metadata.get("author", "Unknown"),
-            "variables": variables,
-            "frontmatter": post.metadata,
+            "description": entry.frontmatter.get("description", "No description provided"),
+            "author": entry.frontmatter.get("author", "Unknown"),
+            "variables": sorted(entry.variables),
+            "required": sorted(entry.required),
+            "flags": sorted(entry.flags),
+            "content_hash": entry.content_hash,
+            "frontmatter": entry.frontmatter,
         }
+
+    @staticmethod
+    def split_sections(prompt: str) -> List[Tuple[str, str]]:
+        """
+        Split a rendered prompt into its top-level (`#`/`##`) sections.
+
+        Returns:
+            A list of `(section_title, section_text)`; text before the first heading is `(preamble)`.
+            Concatenating the texts gives back the original prompt.
+        """
+        matches = list(_SECTION_RE.finditer(prompt))
+        if not matches:
+            return [("(preamble)", prompt)]
+
+        sections = []
+        if matches[0].start() > 0:
+            sections.append(("(preamble)", prompt[: matches[0].start()]))
+
+        for i, m in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(prompt)
+            sections.append((m.group(1).rstrip(":"), prompt[m.start(): end]))
+        return sections
+
+    @staticmethod
+    def get_prompt_parts(
+        template_name : str,
+        field_keys    : Iterable[str],
+        probe_values  : Mapping[str, Any] | None = None,
+        **kwargs      : Any,
+    ) -> PromptParts:
+        """
+        Render the template with its sections reordered into a shared prefix and a field-specific suffix.
+
+        A section belongs to the prefix when its rendered text does not change if every variable in
+        `field_keys` is replaced by a probe value, so for a fixed set of layout variables (flags,
+        `field_type`, language, sizes...) the prefix is byte-identical across fields. Sections keep
+        their relative order inside each part. If the probe cannot be rendered, the prompt is
+        returned unsplit (empty prefix).
+
+        Args:
+            template_name: Template name without extension.
+            field_keys: Variables that vary per field (e.g. field_name, synonyms, sources).
+            probe_values: Alternative values for some field keys (e.g. a lookup key that must exist);
+                the rest are replaced by an opaque sentinel.
+            **kwargs: Variables available to the Jinja2 renderer.
+        """
+        field_keys = set(field_keys)
+        probe_values = probe_values or {}
+
+        rendered = PromptOrchestrator.get_prompt(template_name, **kwargs)
+        try:
+            probe = PromptOrchestrator.get_prompt(
+                template_name,
+                **{
+                    k: (probe_values.get(k, _FIELD_SENTINEL) if k in field_keys else v)
+                    for k, v in kwargs.items()
+                },
+            )
+        except ValueError:
+            return PromptParts("", rendered)
+        probe_sections = {text for _, text in PromptOrchestrator.split_sections(probe)}
+
+        prefix, suffix = [], []
+        for _, text in PromptOrchestrator.split_sections(rendered):
+            (prefix if text in probe_sections else suffix).append(text)
+
+        prefix_text = "".join(prefix)
+        if prefix_text and not prefix_text.endswith("\n\n"):
+            prefix_text = prefix_text.rstrip("\n") + "\n\n"
+
+        return PromptParts(prefix_text, "".join(suffix))
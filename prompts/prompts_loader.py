@@ -3,13 +3,25 @@ from __future__ import annotations
 import yaml
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Mapping, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional
 
 from prompts.prompts_engine import PromptOrchestrator
 
 BASE_FIELDS = Path("prompts/fields")
 BASE_QUESTIONS = Path("prompts/subfactors")
 
+# Templates rendered per YAML, and the variables the builders below add on top of it
+EXTRACTION_TEMPLATES = ("extraction/extract", "extraction/critique")
+EVALUATION_TEMPLATES = ("evaluation/evaluate", "evaluation/consolidate")
+EXTRACTION_RENDER_VARIABLES = frozenset({"output_language", "max_characters"})
+EVALUATION_RENDER_VARIABLES = frozenset({"output_language", "max_characters", "premise_id"})
+
+# "default": templates rendered as written; "prefix_cache": shared sections first (see PromptOrchestrator.get_prompt_parts)
+PROMPT_LAYOUTS = ("default", "prefix_cache")
+
+# YAML keys that select the template layout rather than field content (kept in the shared prefix)
+LAYOUT_KEYS = frozenset({"field_type", "scoring_levels"})
+
 
 @lru_cache(maxsize = 256)
 def load_yaml(path: Path) -> Dict[str, Any]:
@@ -23,7 +35,26 @@ def _user_prompts(*user_types: str) -> Dict[str, str]:
     }
 
 
-def _build_extraction_prompts(field_info: Mapping[str, Any]) -> Dict[str, Any]:
+def _render(
+    template_name : str,
+    source        : Mapping[str, Any],
+    layout        : str,
+    *,
+    field_keys    : Optional[Iterable[str]] = None,
+    probe_values  : Optional[Mapping[str, Any]] = None,
+    **kwargs      : Any,
+) -> str:
+    if layout == "prefix_cache":
+        if field_keys is None:
+            field_keys = set(source) - LAYOUT_KEYS
+        return PromptOrchestrator.get_prompt_parts(
+            template_name, field_keys, probe_values, **source, **kwargs
+        ).text
+
+    return PromptOrchestrator.get_prompt(template_name, **source, **kwargs)
+
+
+def _build_extraction_prompts(field_info: Mapping[str, Any], layout: str = "default") -> Dict[str, Any]:
     field_type = field_info.get("field_type")
     
     if field_type not in {"quantitative", "qualitative"}:
@@ -36,9 +67,10 @@ def _build_extraction_prompts(field_info: Mapping[str, Any]) -> Dict[str, Any]:
             include_normalization = True,
         )
 
-        extract_quantitative = PromptOrchestrator.get_prompt(
+        extract_quantitative = _render(
             "extraction/extract",
-            **field_info,
+            field_info,
+            layout,
             **base_extract,
             include_source_guides  = True,
             include_synonyms       = True,
@@ -46,9 +78,10 @@ def _build_extraction_prompts(field_info: Mapping[str, Any]) -> Dict[str, Any]:
             include_exclusions     = True,
         )
 
-        alternative_quantitative = PromptOrchestrator.get_prompt(
+        alternative_quantitative = _render(
             "extraction/extract",
-            **field_info,
+            field_info,
+            layout,
             **base_extract,
             include_source_guides  = False,
             include_synonyms       = False,
@@ -56,9 +89,10 @@ def _build_extraction_prompts(field_info: Mapping[str, Any]) -> Dict[str, Any]:
             include_exclusions     = False,
         )
 
-        critique_quantitative = PromptOrchestrator.get_prompt(
+        critique_quantitative = _render(
             "extraction/critique",
-            **field_info,
+            field_info,
+            layout,
             output_language        = "es",
             max_characters         = 1000,
             include_specifications = True,
@@ -73,9 +107,10 @@ def _build_extraction_prompts(field_info: Mapping[str, Any]) -> Dict[str, Any]:
         }
 
     # qualitative
-    extract_qualitative = PromptOrchestrator.get_prompt(
+    extract_qualitative = _render(
         "extraction/extract",
-        **field_info,
+        field_info,
+        layout,
         output_language             = "es",
         max_characters              = 5000,
         include_source_guides       = True,
@@ -84,9 +119,10 @@ def _build_extraction_prompts(field_info: Mapping[str, Any]) -> Dict[str, Any]:
         include_coverage_rule       = True,
     )
 
-    critique_qualitative = PromptOrchestrator.get_prompt(
+    critique_qualitative = _render(
         "extraction/critique",
-        **field_info,
+        field_info,
+        layout,
         output_language = "es",
         max_characters  = 1000,
     )
@@ -105,20 +141,25 @@ def _build_extraction_prompts(field_info: Mapping[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _build_evaluation_prompts(evaluation_info: Mapping[str, Any]) -> Dict[str, Any]:
+def _build_evaluation_prompts(evaluation_info: Mapping[str, Any], layout: str = "default") -> Dict[str, Any]:
     premises = evaluation_info.get("premises") or {}
     if not isinstance(premises, dict):
         raise ValueError("evaluation_info['premises'] debe ser un dict")
 
+    premise_ids = list(premises.keys())
+
     premises_evaluation_prompts = {
-        premise_id: PromptOrchestrator.get_prompt(
+        premise_id: _render(
             "evaluation/evaluate",
-            **evaluation_info,
+            evaluation_info,
+            layout,
+            field_keys      = {"premise_id"},
+            probe_values    = {"premise_id": premise_ids[(i + 1) % len(premise_ids)]},
             premise_id      = premise_id,
             output_language = "es",
             max_characters  = 1000,
         )
-        for premise_id in premises.keys()
+        for i, premise_id in enumerate(premise_ids)
     }
 
     consolidate_prompt = PromptOrchestrator.get_prompt(
@@ -143,23 +184,73 @@ def load_prompts(
     evaluation_info : Optional[Mapping[str, Any]] = None,
     base_fields     : Path = BASE_FIELDS,
     base_questions  : Path = BASE_QUESTIONS,
+    layout          : str = "default",
 ) -> Dict[str, Any]:
     """
     - process="extraction": field_name or field_info
     - process="evaluation": question_name or evaluation_info
+    - layout="prefix_cache": field-independent sections first, so the system prompt starts with a
+      byte-identical prefix across fields (provider-side prompt caching)
     """
+    if layout not in PROMPT_LAYOUTS:
+        raise ValueError(f"Invalid layout: {layout!r}")
+
     if process == "extraction":
         if field_info is None:
             if not field_name:
                 raise ValueError("For extraction, pass field_name or field_info")
             field_info = load_yaml(base_fields / f"{field_name}.yaml")
-        return _build_extraction_prompts(field_info)
+        return _build_extraction_prompts(field_info, layout)
 
     if process == "evaluation":
         if evaluation_info is None:
             if not question_name:
                 raise ValueError("For evaluation, pass question_name or evaluation_info")
             evaluation_info = load_yaml(base_questions / f"{question_name}.yaml")
-        return _build_evaluation_prompts(evaluation_info)
+        return _build_evaluation_prompts(evaluation_info, layout)
+
+    raise ValueError(f"Invalid process: {process!r}")
+
+def _missing_variables(templates, source: Mapping[str, Any], provided: frozenset) -> Dict[str, List[str]]:
+    index = PromptOrchestrator.get_index()
+    assume = {k: v for k, v in source.items() if isinstance(v, (str, int, float, bool))}
+    available = provided | set(source.keys())
+
+    missing = {}
+    for template_name in templates:
+        required = index.required_variables(template_name, **assume)
+        absent = sorted(required - available)
+        if absent:
+            missing[template_name] = absent
+    return missing
+
+
+def validate_prompt_catalog(
+    base_fields    : Path = BASE_FIELDS,
+    base_questions : Path = BASE_QUESTIONS,
+) -> Dict[str, List[str]]:
+    """
+    Statically check that every field/question YAML supplies the variables its templates need.
+
+    Uses the template index (no rendering), so it is cheap enough to run at startup, before any
+    retrieval or LLM call.
+
+    Returns:
+        A dict `"<yaml path> -> <template>"` -> sorted list of missing variables (empty if all OK).
+    """
+    problems: Dict[str, List[str]] = {}
+
+    for path in sorted(Path(base_fields).glob("*.yaml")):
+        field_info = load_yaml(path) or {}
+        if field_info.get("field_type") not in {"quantitative", "qualitative"}:
+            problems[f"{path} -> field_type"] = [f"invalid field_type: {field_info.get('field_type')!r}"]
+            continue
+        for template_name, absent in _missing_variables(EXTRACTION_TEMPLATES, field_info, EXTRACTION_RENDER_VARIABLES).items():
+            problems[f"{path} -> {template_name}"] = absent
+
+    for path in sorted(Path(base_questions).glob("*.yaml")):
+        evaluation_info = load_yaml(path) or {}
+        for template_name, absent in _missing_variables(EVALUATION_TEMPLATES, evaluation_info, EVALUATION_RENDER_VARIABLES).items():
+            problems[f"{path} -> {template_name}"] = absent
 
-    raise ValueError(f"Invalid process: {process!r}")
\ No newline at end of file
+    return problems
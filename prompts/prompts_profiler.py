@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+from prompts.prompts_engine import PromptOrchestrator
+from prompts.prompts_loader import BASE_FIELDS, BASE_QUESTIONS, load_prompts, load_yaml
+
+DEFAULT_ENCODING = "o200k_base" # Tokenizer of the gpt-4.1 / gpt-5 family
+
+
+@lru_cache(maxsize = 8)
+def _get_encoder(encoding_name: str):
+    try:
+        import tiktoken
+    except ImportError as e:
+        raise ImportError("Token profiling requires tiktoken: pip install tiktoken") from e
+
+    return tiktoken.get_encoding(encoding_name)
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    return len(_get_encoder(encoding_name).encode(text or ""))
+
+
+@lru_cache(maxsize = 8)
+def _encoder_available(encoding_name: str) -> bool:
+    # tiktoken may be missing or unable to download its encoding (offline): checked once
+    try:
+        _get_encoder(encoding_name)
+    except Exception:
+        return False
+    return True
+
+
+def estimate_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """
+    `count_tokens` when the tokenizer is available, otherwise ~4 characters per token.
+    """
+    if _encoder_available(encoding_name):
+        return count_tokens(text, encoding_name)
+    return len(text or "") // 4
+
+
+def _flatten(prompts: Mapping[str, Any], prefix: str = "") -> Iterable[Tuple[str, str]]:
+    for key, value in prompts.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, Mapping):
+            yield from _flatten(value, name)
+        elif isinstance(value, str):
+            yield name, value
+
+
+def profile_prompt(source: str, prompt_key: str, prompt: str, encoding_name: str = DEFAULT_ENCODING) -> List[Dict[str, Any]]:
+    """
+    Token/char counts of one rendered prompt, one row per section.
+    """
+    return [
+        {
+            "source": source,
+            "prompt": prompt_key,
+            "section": title,
+            "chars": len(text),
+            "tokens": count_tokens(text, encoding_name),
+        }
+        for title, text in PromptOrchestrator.split_sections(prompt)
+    ]
+
+
+def profile_flags(
+    field_info    : Mapping[str, Any],
+    template_name : str = "extraction/extract",
+    encoding_name : str = DEFAULT_ENCODING,
+) -> List[Dict[str, Any]]:
+    """
+    Token cost of every `include_*` flag of a template for one field: tokens with all flags on
+    minus tokens with only that flag turned off.
+    """
+    flags = sorted(PromptOrchestrator.get_index().get(template_name).flags)
+    base = {"output_language": "es", **{flag: True for flag in flags}}
+
+    # The profiling flags override the field's own values (a YAML may set output_language / include_*)
+    full_tokens = count_tokens(PromptOrchestrator.get_prompt(template_name, **{**field_info, **base}), encoding_name)
+
+    rows = []
+    for flag in flags:
+        without_tokens = count_tokens(
+            PromptOrchestrator.get_prompt(template_name, **{**field_info, **base, flag: False}), encoding_name
+        )
+        rows.append({
+            "template": template_name,
+            "flag": flag,
+            "tokens_all_on": full_tokens,
+            "tokens_flag_off": without_tokens,
+            "flag_cost": full_tokens - without_tokens,
+        })
+    return rows
+
+
+def profile_catalog(
+    base_fields    : Path = BASE_FIELDS,
+    base_questions : Path = BASE_QUESTIONS,
+    encoding_name  : str = DEFAULT_ENCODING,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Render the prompts of every field and question and profile them.
+
+    Returns:
+        A dict with:
+        - sections: one row per (source, prompt, section)
+        - prompts: one row per (source, prompt) with total tokens
+        - flags: one row per (field, include_* flag) with its token cost in `extraction/extract`
+    """
+    section_rows: List[Dict[str, Any]] = []
+    flag_rows: List[Dict[str, Any]] = []
+
+    for path in sorted(Path(base_fields).glob("*.yaml")):
+        prompts = load_prompts("extraction", field_name = path.stem, base_fields = Path(base_fields))
+        for prompt_key, prompt in _flatten(prompts):
+            section_rows.extend(profile_prompt(path.stem, prompt_key, prompt, encoding_name))
+
+        field_info = load_yaml(Path(base_fields) / path.name)
+        flag_rows.extend({"source": path.stem, **row} for row in profile_flags(field_info, encoding_name = encoding_name))
+
+    for path in sorted(Path(base_questions).glob("*.yaml")):
+        prompts = load_prompts("evaluation", question_name = path.stem, base_questions = Path(base_questions))
+        for prompt_key, prompt in _flatten(prompts):
+            section_rows.extend(profile_prompt(path.stem, prompt_key, prompt, encoding_name))
+
+    totals: Dict[Tuple[str, str], Dict[str, int]] = defaultdict(lambda: {"chars": 0, "tokens": 0, "sections": 0})
+    for row in section_rows:
+        total = totals[(row["source"], row["prompt"])]
+        total["chars"] += row["chars"]
+        total["tokens"] += row["tokens"]
+        total["sections"] += 1
+
+    prompt_rows = [{"source": s, "prompt": p, **t} for (s, p), t in totals.items()]
+
+    return {"sections": section_rows, "prompts": prompt_rows, "flags": flag_rows}
+
+
+def profile_prefixes(
+    base_fields   : Path = BASE_FIELDS,
+    layout        : str = "prefix_cache",
+    encoding_name : str = DEFAULT_ENCODING,
+) -> List[Dict[str, Any]]:
+    """
+    Shared-prefix length of every extraction prompt, per field.
+
+    For each prompt key (e.g. `extract_quantitative`) the prefix is the longest common prefix of
+    that prompt across all fields rendered with the same `layout`, i.e. what a provider-side prompt
+    cache can reuse between fields.
+    """
+    rendered: Dict[str, Dict[str, str]] = defaultdict(dict)
+    for path in sorted(Path(base_fields).glob("*.yaml")):
+        prompts = load_prompts("extraction", field_name = path.stem, base_fields = Path(base_fields), layout = layout)
+        for prompt_key, prompt in _flatten(prompts):
+            rendered[prompt_key][path.stem] = prompt
+
+    rows = []
+    for prompt_key, by_field in rendered.items():
+        shared = os.path.commonprefix(list(by_field.values())) if len(by_field) > 1 else ""
+        shared_tokens = count_tokens(shared, encoding_name)
+        for source, prompt in by_field.items():
+            tokens = count_tokens(prompt, encoding_name)
+            rows.append({
+                "source": source,
+                "prompt": prompt_key,
+                "layout": layout,
+                "fields_sharing": len(by_field),
+                "tokens": tokens,
+                "prefix_chars": len(shared),
+                "prefix_tokens": shared_tokens,
+                "prefix_ratio": shared_tokens / tokens if tokens else 0.0,
+            })
+    return rows
+
+
+def build_prefix_report(rows: List[Dict[str, Any]]) -> str:
+    lines = ["== Shared prefix per field (prefix tokens / total tokens) =="]
+    for row in sorted(rows, key = lambda r: (r["layout"], r["prompt"], r["source"])):
+        lines.append(
+            f"{row['layout']:<13} {row['prompt']:<28} {row['source']:<28} "
+            f"{row['prefix_tokens']:>6} / {row['tokens']:<6} ({row['prefix_ratio']:.0%}, {row['fields_sharing']} fields)"
+        )
+    return "\n".join(lines)
+
+
+def build_report(profile: Mapping[str, List[Dict[str, Any]]], top: int = 10) -> str:
+    """
+    Plain-text ranking of the most expensive sources, prompts, sections and flags.
+    """
+    by_source: Dict[str, int] = defaultdict(int)
+    for row in profile["prompts"]:
+        by_source[row["source"]] += row["tokens"]
+
+    by_section: Dict[str, List[int]] = defaultdict(list)
+    for row in profile["sections"]:
+        by_section[row["section"]].append(row["tokens"])
+
+    by_flag: Dict[str, List[int]] = defaultdict(list)
+    for row in profile["flags"]:
+        by_flag[row["flag"]].append(row["flag_cost"])
+
+    lines = ["== Tokens per field/question (all rendered prompts) =="]
+    for source, tokens in sorted(by_source.items(), key = lambda kv: -kv[1])[:top]:
+        lines.append(f"{tokens:>8}  {source}")
+
+    lines.append("")
+    lines.append("== Most expensive prompts ==")
+    for row in sorted(profile["prompts"], key = lambda r: -r["tokens"])[:top]:
+        lines.append(f"{row['tokens']:>8}  {row['source']} / {row['prompt']} ({row['sections']} sections)")
+
+    lines.append("")
+    lines.append("== Most expensive sections (total | mean | occurrences) ==")
+    for section, values in sorted(by_section.items(), key = lambda kv: -sum(kv[1]))[:top]:
+        lines.append(f"{sum(values):>8} | {sum(values) / len(values):>7.0f} | {len(values):>4}  {section}")
+
+    if by_flag:
+        lines.append("")
+        lines.append("== include_* flag cost in extraction/extract (mean tokens per field) ==")
+        for flag, values in sorted(by_flag.items(), key = lambda kv: -sum(kv[1]) / len(kv[1])):
+            lines.append(f"{sum(values) / len(values):>8.0f}  {flag}")
+
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Token profile of the rendered prompt catalog.")
+    parser.add_argument("--top", type = int, default = 10, help = "Rows per ranking.")
+    parser.add_argument("--encoding", default = DEFAULT_ENCODING, help = "tiktoken encoding name.")
+    parser.add_argument("--json", dest = "json_path", default = None, help = "Also dump the raw profile to this file.")
+    parser.add_argument("--prefix", action = "store_true", help = "Report shared-prefix length per field (default vs prefix_cache layout).")
+    args = parser.parse_args()
+
+    profile = profile_catalog(encoding_name = args.encoding)
+    print(build_report(profile, top = args.top))
+
+    if args.prefix:
+        profile["prefixes"] = [
+            row
+            for layout in ("default", "prefix_cache")
+            for row in profile_prefixes(layout = layout, encoding_name = args.encoding)
+        ]
+        print()
+        print(build_prefix_report(profile["prefixes"]))
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(profile, indent = 2, ensure_ascii = False), encoding = "utf-8")
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Set, Tuple
+
+import frontmatter
+from jinja2 import Environment, Template, meta, nodes
+
+TEMPLATE_SUFFIX = ".j2"
+FLAG_PREFIX = "include_"
+
+# Filters/tests that make a reference safe under StrictUndefined
+_GUARD_FILTERS = {"default", "d"}
+_GUARD_TESTS = {"defined", "undefined"}
+
+_UNKNOWN = object()
+
+
+@dataclass(frozen = True)
+class TemplateMeta:
+    """
+    Static metadata of a single `.j2` template, computed once per file version.
+    """
+
+    name: str
+    path: Path
+    mtime_ns: int
+    size: int
+    content_hash: str
+    frontmatter: Dict[str, Any]
+    variables: FrozenSet[str]
+    required: FrozenSet[str]
+    flags: FrozenSet[str]
+    ast: nodes.Template
+    template: Template
+
+
+def _static_value(expr: nodes.Node, assume: Mapping[str, Any]) -> Any:
+    """
+    Best-effort evaluation of a condition using only constants and the `assume` mapping.
+    Returns `_UNKNOWN` when the value depends on anything else.
+    """
+    if isinstance(expr, nodes.Const):
+        return expr.value
+
+    if isinstance(expr, nodes.Name):
+        return assume.get(expr.name, _UNKNOWN)
+
+    if isinstance(expr, nodes.Filter) and expr.name in _GUARD_FILTERS and isinstance(expr.node, nodes.Name):
+        return assume.get(expr.node.name, _UNKNOWN)
+
+    if isinstance(expr, nodes.Not):
+        value = _static_value(expr.node, assume)
+        return _UNKNOWN if value is _UNKNOWN else not value
+
+    if isinstance(expr, (nodes.And, nodes.Or)):
+        left = _static_value(expr.left, assume)
+        right = _static_value(expr.right, assume)
+        if isinstance(expr, nodes.And):
+            if (left is not _UNKNOWN and not left) or (right is not _UNKNOWN and not right):
+                return False
+        else:
+            if (left is not _UNKNOWN and left) or (right is not _UNKNOWN and right):
+                return True
+        if left is _UNKNOWN or right is _UNKNOWN:
+            return _UNKNOWN
+        return bool(right)
+
+    if isinstance(expr, nodes.Compare) and len(expr.ops) == 1:
+        left = _static_value(expr.expr, assume)
+        right = _static_value(expr.ops[0].expr, assume)
+        if left is _UNKNOWN or right is _UNKNOWN:
+            return _UNKNOWN
+        op = expr.ops[0].op
+        try:
+            if op == "eq":
+                return left == right
+            if op == "ne":
+                return left != right
+            if op == "in":
+                return left in right
+            if op == "notin":
+                return left not in right
+        except TypeError:
+            return _UNKNOWN
+
+    return _UNKNOWN
+
+
+class _RequiredCollector:
+    """
+    Walks a template AST and collects the names that must be supplied at render time,
+    i.e. referenced without a `default` filter or an `is defined` guard. Branches whose
+    condition can be decided from `assume` are pruned.
+    """
+
+    def __init__(self, assume: Mapping[str, Any]):
+        self.assume = assume
+        self.assigned: Set[str] = set()
+        self.required: Set[str] = set()
+
+    def visit(self, node: nodes.Node) -> None:
+        if isinstance(node, nodes.Name):
+            if node.ctx == "load" and node.name not in self.assigned:
+                self.required.add(node.name)
+            return
+
+        if isinstance(node, nodes.Filter) and node.name in _GUARD_FILTERS:
+            if not isinstance(node.node, nodes.Name):
+                self.visit(node.node)
+            self._visit_all(node.args)
+            self._visit_all(kw.value for kw in node.kwargs)
+            return
+
+        if isinstance(node, nodes.Test) and node.name in _GUARD_TESTS:
+            if not isinstance(node.node, nodes.Name):
+                self.visit(node.node)
+            return
+
+        if isinstance(node, nodes.Assign):
+            self.visit(node.node)
+            self.assigned.update(_target_names(node.target))
+            return
+
+        if isinstance(node, nodes.For):
+            self.visit(node.iter)
+            self.assigned.update(_target_names(node.target))
+            self._visit_all(node.body)
+            self._visit_all(node.else_)
+            return
+
+        if isinstance(node, nodes.And):
+            self.visit(node.left)
+            self._visit_guarded(_defined_names(node.left), [node.right])
+            return
+
+        if isinstance(node, nodes.If):
+            self._visit_if(node)
+            return
+
+        self._visit_all(node.iter_child_nodes())
+
+    def _visit_if(self, node: nodes.If) -> None:
+        decision = _static_value(node.test, self.assume)
+
+        if decision is _UNKNOWN:
+            self.visit(node.test)
+            self._visit_guarded(_defined_names(node.test), node.body)
+            self._visit_all(node.elif_)
+            self._visit_all(node.else_)
+            return
+
+        if decision:
+            self._visit_guarded(_defined_names(node.test), node.body)
+            return
+
+        for elif_node in node.elif_:
+            elif_decision = _static_value(elif_node.test, self.assume)
+            if elif_decision is _UNKNOWN:
+                self.visit(elif_node.test)
+                self._visit_all(elif_node.body)
+                continue
+            if elif_decision:
+                self._visit_all(elif_node.body)
+                return
+
+        self._visit_all(node.else_)
+
+    def _visit_guarded(self, guarded: Set[str], children: Iterable[nodes.Node]) -> None:
+        added = guarded - self.assigned
+        self.assigned |= added
+        try:
+            self._visit_all(children)
+        finally:
+            self.assigned -= added
+
+    def _visit_all(self, children: Iterable[nodes.Node]) -> None:
+        for child in children:
+            self.visit(child)
+
+
+def _target_names(target: nodes.Node) -> Set[str]:
+    if isinstance(target, nodes.Name):
+        return {target.name}
+    return {n.name for n in target.find_all(nodes.Name)}
+
+
+def _defined_names(test: nodes.Node) -> Set[str]:
+    """
+    Names proven defined by a condition, i.e. `x is defined` conjuncts of an `and` chain.
+    """
+    if isinstance(test, nodes.Test) and test.name == "defined" and isinstance(test.node, nodes.Name):
+        return {test.node.name}
+    if isinstance(test, nodes.And):
+        return _defined_names(test.left) | _defined_names(test.right)
+    return set()
+
+
+def find_required_variables(ast: nodes.Template, assume: Optional[Mapping[str, Any]] = None) -> FrozenSet[str]:
+    """
+    Return the undeclared variables that would raise under StrictUndefined if missing.
+
+    Args:
+        ast: Parsed template.
+        assume: Known render-time values used to prune `{% if %}` branches (e.g. `field_type`).
+    """
+    collector = _RequiredCollector(assume or {})
+    collector.visit(ast)
+    return frozenset(collector.required & meta.find_undeclared_variables(ast))
+
+
+class TemplateIndex:
+    """
+    Precomputed metadata for every template under a templates directory.
+
+    Entries are built on first access (or eagerly with `build`) and transparently
+    rebuilt when the file's mtime or size changes.
+    """
+
+    def __init__(self, env: Environment, templates_path: Path):
+        self.env = env
+        self.templates_path = Path(templates_path)
+        self._entries: Dict[str, TemplateMeta] = {}
+        self._required_cache: Dict[Tuple[str, str, FrozenSet[Tuple[str, Any]]], FrozenSet[str]] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> list[str]:
+        return sorted(
+            p.relative_to(self.templates_path).with_suffix("").as_posix()
+            for p in self.templates_path.rglob(f"*{TEMPLATE_SUFFIX}")
+        )
+
+    def build(self) -> "TemplateIndex":
+        for name in self.names():
+            self.get(name)
+        return self
+
+    def get(self, template_name: str) -> TemplateMeta:
+        """
+        Return the metadata of `template_name` (without extension), refreshing it if the file changed.
+
+        Raises:
+            FileNotFoundError: If the template does not exist in the templates directory.
+        """
+        path = self.templates_path / f"{template_name}{TEMPLATE_SUFFIX}"
+        try:
+            stat = path.stat()
+        except FileNotFoundError as e:
+            raise FileNotFoundError(
+                f"Template not found: '{template_name}{TEMPLATE_SUFFIX}' in the configured templates directory."
+            ) from e
+
+        entry = self._entries.get(template_name)
+        if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(template_name)
+            if entry is None or entry.mtime_ns != stat.st_mtime_ns or entry.size != stat.st_size:
+                entry = self._load(template_name, path, stat.st_mtime_ns, stat.st_size)
+                self._entries[template_name] = entry
+        return entry
+
+    def entries(self) -> Dict[str, TemplateMeta]:
+        return {name: self.get(name) for name in self.names()}
+
+    def required_variables(self, template_name: str, **assume: Any) -> FrozenSet[str]:
+        """
+        Variables the template needs given the `assume`d values (memoized per template version).
+        """
+        entry = self.get(template_name)
+        if not assume:
+            return entry.required
+
+        try:
+            key = (template_name, entry.content_hash, frozenset(assume.items()))
+        except TypeError:
+            return find_required_variables(entry.ast, assume)
+
+        with self._lock:
+            cached = self._required_cache.get(key)
+        if cached is None:
+            # Computed outside the lock (pure function of the key): a concurrent miss only repeats it
+            cached = find_required_variables(entry.ast, assume)
+            with self._lock:
+                self._required_cache[key] = cached
+        return cached
+
+    def _load(self, template_name: str, path: Path, mtime_ns: int, size: int) -> TemplateMeta:
+        raw = path.read_bytes()
+        post = frontmatter.loads(raw.decode("utf-8"))
+
+        ast = self.env.parse(post.content)
+        variables = frozenset(meta.find_undeclared_variables(ast))
+
+        return TemplateMeta(
+            name         = template_name,
+            path         = path,
+            mtime_ns     = mtime_ns,
+            size         = size,
+            content_hash = hashlib.sha256(raw).hexdigest(),
+            frontmatter  = dict(post.metadata),
+            variables    = variables,
+            required     = find_required_variables(ast),
+            flags        = frozenset(v for v in variables if v.startswith(FLAG_PREFIX)),
+            ast          = ast,
+            template     = self.env.from_string(post.content),
+        )
+
+
+if __name__ == "__main__":
+    import sys
+
+    from prompts.prompts_loader import validate_prompt_catalog
+
+    problems = validate_prompt_catalog()
+    for source, missing in problems.items():
+        print(f"[{source}] missing variables: {', '.join(missing)}")
+    print("Prompt catalog OK" if not problems else f"{len(problems)} prompt source(s) with missing variables")
+    sys.exit(1 if problems else 0)
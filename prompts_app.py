@@ -7,7 +7,8 @@ from typing import Any, Dict, Iterable, Tuple
 import streamlit as st
 import streamlit.components.v1 as components
 
-from prompts.prompts_loader import load_prompts, BASE_FIELDS, BASE_QUESTIONS
+import tracing
+from prompts.prompts_loader import load_prompts, validate_prompt_catalog, BASE_FIELDS, BASE_QUESTIONS
 
 
 def md_to_html(markdown_text: str) -> str:
@@ -365,17 +366,41 @@ def render_preview(view_mode: str, md_text: str, selected_prompt_key: str) -> No
         st.code(md_text, language="markdown")
 
 
+def render_timings() -> None:
+    """
+    Stage timings of this script run (tracing enabled with RC_TRACE=1).
+    """
+    rows = tracing.flatten(tracing.current_span().to_dict())
+    if rows:
+        with st.expander("Timings", expanded=False):
+            st.dataframe(
+                [{"stage": "  " * r["depth"] + r["name"], "duration_ms": r["duration_ms"]} for r in rows],
+                use_container_width=True,
+                hide_index=True,
+            )
+
+
+@tracing.traced("prompts_app")
 def main() -> None:
     st.set_page_config(page_title="Prompt Viewer", layout="wide")
     inject_styles()
     render_header()
 
+    with tracing.span("validate_prompt_catalog"):
+        problems = validate_prompt_catalog() # Static check via the template index (milliseconds)
+    if problems:
+        st.error(
+            "Prompt catalog has missing template variables:\n\n"
+            + "\n".join(f"- `{source}`: {', '.join(missing)}" for source, missing in problems.items())
+        )
+
     process, selected_item, view_mode = sidebar_controls()
     if not selected_item:
         st.stop()
 
     try:
-        prompts_obj = cached_load_prompts(process, selected_item)
+        with tracing.span("load_prompts", process=process, name=selected_item):
+            prompts_obj = cached_load_prompts(process, selected_item)
     except Exception as e:
         st.error(f"Error generating prompts: {e}")
         st.stop()
@@ -436,7 +461,9 @@ def main() -> None:
     with d3:
         st.caption(f"Source: `{process} / {selected_item}`")
 
-    render_preview(view_mode=view_mode, md_text=md_text, selected_prompt_key=sel)
+    with tracing.span("render_preview"):
+        render_preview(view_mode=view_mode, md_text=md_text, selected_prompt_key=sel)
+    render_timings()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,260 @@
+"""
+Persistent store of field-extraction results, shared by generate, the Streamlit apps, the
+evaluation engine and the exports.
+
+SQLite (stdlib, single file under `.cache/`): one row per (company, field_id, kind, run_id) with the
+validated `Output*Field` JSON, its schema name, the hash of the prompts that produced it and the
+provenance (retrieved chunk ids, indexes, prompt name...). The primary key and the
+(company, field, kind, created_at) index make point lookups and per-company bulk reads cheap.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Type
+
+RESULTS_PATH = Path(".cache/results.sqlite")
+RESULT_KINDS = ("extract", "alternative", "critique", "summary")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    company      TEXT NOT NULL,
+    field        TEXT NOT NULL,
+    field_id     TEXT NOT NULL,
+    kind         TEXT NOT NULL,
+    run_id       TEXT NOT NULL,
+    schema       TEXT,
+    payload      TEXT NOT NULL,
+    prompt_hash  TEXT,
+    provenance   TEXT,
+    created_at   REAL NOT NULL,
+    PRIMARY KEY (company, field_id, kind, run_id)
+);
+CREATE INDEX IF NOT EXISTS results_by_field ON results (company, field, kind, created_at);
+"""
+
+_COLUMNS = "company, field, field_id, kind, run_id, schema, payload, prompt_hash, provenance, created_at"
+
+
+def prompt_hash(*prompts: str) -> str:
+    return hashlib.sha256("\x00".join(prompts).encode("utf-8")).hexdigest()
+
+
+def new_run_id() -> str:
+    return time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+
+
+@dataclass(frozen = True)
+class StoredResult:
+    company: str
+    field: str
+    field_id: str
+    kind: str
+    run_id: str
+    schema: Optional[str]
+    payload: Dict[str, Any]
+    prompt_hash: Optional[str]
+    provenance: Dict[str, Any]
+    created_at: float
+
+    def output(self, schema: Optional[Type[Any]] = None, mode: str = "fast") -> Any:
+        """
+        The stored output as a `schema` model (payloads were validated before being stored, so
+        the default "fast" mode only constructs it), or the raw dict without `schema`.
+        """
+        if schema is None:
+            return self.payload
+        from schema_validation import validate_output
+
+        return validate_output(self.payload, schema, mode = mode)
+
+
+def _row_to_result(row: sqlite3.Row) -> StoredResult:
+    return StoredResult(
+        company     = row["company"],
+        field       = row["field"],
+        field_id    = row["field_id"],
+        kind        = row["kind"],
+        run_id      = row["run_id"],
+        schema      = row["schema"],
+        payload     = json.loads(row["payload"]),
+        prompt_hash = row["prompt_hash"],
+        provenance  = json.loads(row["provenance"] or "{}"),
+        created_at  = row["created_at"],
+    )
+
+
+def _dump(output: Any) -> Dict[str, Any]:
+    if hasattr(output, "model_dump"):
+        return output.model_dump(mode = "json")
+    if isinstance(output, str):
+        return json.loads(output)
+    return dict(output)
+
+
+class ResultStore:
+    """
+    Args:
+        path: SQLite file (created on first use). ":memory:" for a throwaway store.
+    """
+
+    def __init__(self, path: Path = RESULTS_PATH):
+        self.path = path
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents = True, exist_ok = True)
+
+        # One connection shared across threads (Streamlit, evaluation pool), serialised by a lock
+        self._conn = sqlite3.connect(str(path), check_same_thread = False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ----------------------------------------------------------------- write
+
+    def put(
+        self,
+        company     : str,
+        field       : str,
+        field_id    : str,
+        output      : Any,
+        kind        : str = "extract",
+        run_id      : Optional[str] = None,
+        prompt_hash : Optional[str] = None,
+        provenance  : Optional[Mapping[str, Any]] = None,
+    ) -> StoredResult:
+        """
+        Store a validated output (pydantic model, dict or JSON string). Same key -> overwritten.
+        """
+        if kind not in RESULT_KINDS:
+            raise ValueError(f"Invalid result kind: {kind!r}")
+
+        result = StoredResult(
+            company     = company,
+            field       = field,
+            field_id    = field_id,
+            kind        = kind,
+            run_id      = run_id or new_run_id(),
+            schema      = type(output).__name__ if hasattr(output, "model_dump") else None,
+            payload     = _dump(output),
+            prompt_hash = prompt_hash,
+            provenance  = dict(provenance or {}),
+            created_at  = time.time(),
+        )
+        self.put_many([result])
+        return result
+
+    def put_many(self, results: Iterable[StoredResult]) -> None:
+        rows = [
+            (
+                r.company, r.field, r.field_id, r.kind, r.run_id, r.schema,
+                json.dumps(r.payload, ensure_ascii = False),
+                r.prompt_hash,
+                json.dumps(r.provenance, ensure_ascii = False, default = str),
+                r.created_at,
+            )
+            for r in results
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO results ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    # ------------------------------------------------------------------ read
+
+    def _query(self, sql: str, params: Iterable[Any]) -> List[StoredResult]:
+        with self._lock:
+            rows = self._conn.execute(sql, tuple(params)).fetchall()
+        return [_row_to_result(row) for row in rows]
+
+    def get(
+        self,
+        company  : str,
+        field_id : str,
+        kind     : str = "extract",
+        run_id   : Optional[str] = None,
+    ) -> Optional[StoredResult]:
+        """
+        Point lookup: the given run, or the latest one.
+        """
+        if run_id is not None:
+            rows = self._query(
+                f"SELECT {_COLUMNS} FROM results WHERE company = ? AND field_id = ? AND kind = ? AND run_id = ?",
+                (company, field_id, kind, run_id),
+            )
+        else:
+            rows = self._query(
+                f"SELECT {_COLUMNS} FROM results WHERE company = ? AND field_id = ? AND kind = ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (company, field_id, kind),
+            )
+        return rows[0] if rows else None
+
+    def latest(
+        self,
+        company : str,
+        fields  : Optional[Iterable[str]] = None,
+        kind    : str = "extract",
+    ) -> Dict[str, StoredResult]:
+        """
+        Bulk read: latest result per field alias of a company (optionally only `fields`).
+        When a field has several field_ids, the most recent result wins.
+        """
+        sql = (
+            f"SELECT {_COLUMNS} FROM results WHERE company = ? AND kind = ?"
+        )
+        params: List[Any] = [company, kind]
+        if fields is not None:
+            fields = list(fields)
+            if not fields:
+                return {}
+            sql += f" AND field IN ({', '.join('?' * len(fields))})"
+            params += fields
+        sql += " ORDER BY created_at"
+
+        # Ascending order: later rows overwrite earlier ones
+        return {r.field: r for r in self._query(sql, params)}
+
+    def history(self, company: str, field_id: str, kind: str = "extract") -> List[StoredResult]:
+        return self._query(
+            f"SELECT {_COLUMNS} FROM results WHERE company = ? AND field_id = ? AND kind = ? ORDER BY created_at",
+            (company, field_id, kind),
+        )
+
+    def companies(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT company FROM results ORDER BY company")]
+
+    def field_results(self, company: str, kind: str = "extract"):
+        """
+        Field alias -> stored payload lookup for `EvaluationEngine(field_results=...)`.
+        """
+        def lookup(field: str) -> Optional[Dict[str, Any]]:
+            found = self.latest(company, [field], kind).get(field)
+            return found.payload if found else None
+
+        return lookup
+
+    def to_frame(self, company: Optional[str] = None, kind: Optional[str] = None, run_id: Optional[str] = None):
+        """
+        All rows (optionally filtered) as a DataFrame, payload/provenance as JSON strings.
+        """
+        import pandas as pd
+
+        sql, params = f"SELECT {_COLUMNS} FROM results WHERE 1 = 1", []
+        for column, value in (("company", company), ("kind", kind), ("run_id", run_id)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(value)
+        with self._lock:
+            return pd.read_sql_query(sql + " ORDER BY company, field, kind, created_at", self._conn, params = params)
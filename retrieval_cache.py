@@ -0,0 +1,132 @@
+"""
+In-process cache of retrieval results (`RetrieveComponent.retrieve` DataFrames).
+
+- Keyed by (company, field_id, index names, top_k, language, registry fingerprint), so a change in
+  the retrieve params or the company indexes never serves stale chunks.
+- Bounded (LRU, `maxsize` entries) with a time-to-live per entry.
+- Frames are kept as Arrow tables (compact, columnar, no pickling); each `get` returns a fresh
+  DataFrame so callers can add columns freely. Frames Arrow cannot represent (e.g. mixed-type
+  object columns) are kept as a DataFrame copy instead.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import tracing
+
+DEFAULT_MAXSIZE = 64
+DEFAULT_TTL = 60 * 60  # seconds
+
+
+def _flatten(indexes: Iterable[Any]) -> Tuple[str, ...]:
+    # all_indexes entries are lists of one-element lists
+    names = []
+    for index in indexes:
+        if isinstance(index, (list, tuple)):
+            names.extend(map(str, index))
+        else:
+            names.append(str(index))
+    return tuple(names)
+
+
+def retrieval_key(
+    company     : str,
+    field_id    : str,
+    indexes     : Iterable[Any],
+    top_k       : int,
+    language    : str,
+    fingerprint : str = "",
+) -> Tuple[Hashable, ...]:
+    return (company, field_id, _flatten(indexes), int(top_k), language, fingerprint)
+
+
+def _pack(frame):
+    try:
+        import pyarrow as pa
+        return pa.Table.from_pandas(frame, preserve_index = False)
+    except Exception:
+        return frame.copy()
+
+
+def _unpack(packed):
+    if hasattr(packed, "to_pandas"):
+        import pyarrow as pa
+
+        frame = packed.to_pandas()
+        # Arrow list columns (e.g. page lists) come back as numpy arrays: give callers the lists
+        # they got on the miss, so the frame does not depend on the cache state
+        for field in packed.schema:
+            if pa.types.is_list(field.type) or pa.types.is_large_list(field.type):
+                frame[field.name] = packed.column(field.name).to_pylist()
+        return frame
+    return packed.copy()
+
+
+class RetrievalCache:
+    """
+    Thread-safe LRU + TTL cache of retrieved DataFrames.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            packed = entry[1]
+        return _unpack(packed)
+
+    def put(self, key: Hashable, frame) -> None:
+        packed = _pack(frame)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), packed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last = False)
+
+    def get_or_retrieve(self, key: Hashable, retrieve: Callable[[], Any]):
+        """
+        Cached frame for `key`, or the result of `retrieve()` (stored before being returned).
+        """
+        frame = self.get(key)
+        tracing.current_span().set(cache_hit = frame is not None)
+        if frame is None:
+            frame = retrieve()
+            self.put(key, frame)
+        return frame
+
+    def invalidate(self, company: Optional[str] = None, field_id: Optional[str] = None) -> int:
+        """
+        Drop the entries of a company and/or field_id (all entries without arguments).
+        """
+        with self._lock:
+            keys = [
+                k for k in self._entries
+                if (company is None or k[0] == company) and (field_id is None or k[1] == field_id)
+            ]
+            for k in keys:
+                del self._entries[k]
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            nbytes = sum(getattr(packed, "nbytes", 0) for _, packed in self._entries.values())
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "arrow_bytes": nbytes}
@@ -80,14 +80,25 @@ class TableField(BaseModel):
 
         if self.rows is None:
             return self
-        
-        for i, row in enumerate(self.rows):
-            if len(row) != len(self.columns):
-                raise ValueError(
-                    f"Row {i} has {len(row)} cells but expected {len(self.columns)}."
-                )
+
+        # Row widths computed in C (map/set); only locate the offending row on failure
+        n_columns = len(self.columns)
+        widths = set(map(len, self.rows))
+        if widths and widths != {n_columns}:
+            i, row = next((i, row) for i, row in enumerate(self.rows) if len(row) != n_columns)
+            raise ValueError(
+                f"Row {i} has {len(row)} cells but expected {n_columns}."
+            )
         return self
 
+    def to_columnar(self, parse_numbers: bool = True):
+        """
+        Columnar (Arrow) form of the table, see `table_columns.ColumnarTable`. Requires pyarrow.
+        """
+        from table_columns import ColumnarTable
+
+        return ColumnarTable.from_field(self, parse_numbers = parse_numbers)
+
 
 class OutputTableField(BaseOutputField):
     result_field: TableField = Field(description = "The table extracted.")
@@ -95,6 +106,9 @@ class OutputTableField(BaseOutputField):
 
 _UNIT_CODE_MAP = {"unit": 1, "pct": 7, "yrs": 8, "x": 9}
 
+# Factor applied to `value` per unit code when normalising (pct -> fraction, the rest as-is)
+UNIT_SCALE = {1: 1.0, 7: 0.01, 8: 1.0, 9: 1.0}
+
 
 class NumericValue(BaseModel):
     value: Optional[float] = Field(
@@ -0,0 +1,115 @@
+"""
+Validation layer for the `schema.py` output models.
+
+- Cached pydantic `TypeAdapter` per schema (built once, reused for every LLM response).
+- Modes:
+    - "lax":    standard validation, same result as `Model.model_validate_json` (default).
+    - "strict": no type coercion (e.g. "54" is rejected for a float, 1 for a str).
+    - "fast":   no validation at all, nested models are only constructed. Use it only for
+                payloads that were already validated (e.g. read back from a cache/store).
+- `print_output` only pretty-prints (indent=4) when the stream is a terminal.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import typing
+from functools import lru_cache
+from typing import Any, Dict, Type, TypeVar, Union
+
+from pydantic import BaseModel, TypeAdapter
+
+VALIDATION_MODES = ("lax", "strict", "fast")
+
+M = TypeVar("M", bound = BaseModel)
+
+
+@lru_cache(maxsize = None)
+def get_adapter(schema: Type[M]) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+@lru_cache(maxsize = None)
+def _contains_model(annotation: Any) -> bool:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return True
+    return any(_contains_model(arg) for arg in typing.get_args(annotation))
+
+
+def _construct(annotation: Any, value: Any) -> Any:
+    """
+    Build (without validating) the value of a field annotated with `annotation`.
+    """
+    # Plain data (e.g. table rows) is kept as-is instead of walking every cell
+    if value is None or not _contains_model(annotation):
+        return value
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return construct_output(annotation, value) if isinstance(value, dict) else value
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin is Union:
+        model_args = [a for a in args if isinstance(a, type) and issubclass(a, BaseModel)]
+        if len(model_args) == 1 and isinstance(value, dict):
+            return construct_output(model_args[0], value)
+        list_args = [a for a in args if typing.get_origin(a) is list]
+        if len(list_args) == 1 and isinstance(value, list):
+            return _construct(list_args[0], value)
+        return value
+
+    if origin is list and args and isinstance(value, list):
+        return [_construct(args[0], v) for v in value]
+
+    return value
+
+
+def construct_output(schema: Type[M], data: Dict[str, Any]) -> M:
+    """
+    Recursively `model_construct` a model from trusted data (no validation, no coercion).
+    """
+    values = {
+        name: _construct(field.annotation, data[name])
+        for name, field in schema.model_fields.items()
+        if name in data
+    }
+    return schema.model_construct(**values)
+
+
+def validate_output(raw: Union[str, bytes, Dict[str, Any]], schema: Type[M], mode: str = "lax") -> M:
+    """
+    Validate an LLM response (JSON string/bytes or already-parsed dict) against `schema`.
+
+    Raises:
+        ValueError: If `mode` is unknown.
+        pydantic.ValidationError: If the payload does not match the schema ("lax"/"strict").
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Invalid validation mode: {mode!r}")
+
+    if mode == "fast":
+        data = raw if isinstance(raw, dict) else json.loads(raw)
+        return construct_output(schema, data)
+
+    adapter = get_adapter(schema)
+    strict = mode == "strict"
+
+    if isinstance(raw, dict):
+        return adapter.validate_python(raw, strict = strict)
+    return adapter.validate_json(raw, strict = strict)
+
+
+def dump_output(obj: BaseModel, pretty: bool = False) -> str:
+    adapter = get_adapter(type(obj))
+    return adapter.dump_json(obj, indent = 4 if pretty else None).decode("utf-8")
+
+
+def print_output(obj: BaseModel, stream = None) -> None:
+    """
+    Print a validated output: pretty JSON on a terminal, compact single-line JSON otherwise
+    (logs, pipes, batch runs), which avoids the indentation pass on large tables.
+    """
+    stream = stream or sys.stdout
+    is_tty = getattr(stream, "isatty", lambda: False)()
+    print(dump_output(obj, pretty = is_tty), file = stream)
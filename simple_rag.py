@@ -1,30 +1,44 @@
 # .\myenv\Scripts\activate
+# LangChain, FAISS and the prompt engine are imported lazily inside the functions that use them,
+# so importing this module is fast and has no side effects (no .env loading at import time).
 import os
-import time
-import yaml
 import json
+from functools import lru_cache
 from pathlib import Path
-from jinja2 import Template
-import json
 
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores.faiss import FAISS
-from langchain.chat_models import init_chat_model
-from langchain_core.prompts import PromptTemplate
+import tracing
+from usage_ledger import track
+
+MODEL_NAME = "gpt-5.2"
 
-import sys
-from prompts.prompts_engine import PromptOrchestrator
 
-from dotenv import load_dotenv
-load_dotenv()
+@lru_cache(maxsize = 1)
+def load_env():
+    """
+    Load .env once and expose OPENAI_API_KEY to the OpenAI clients
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
 
-os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
+    api_key = os.getenv("OPENAI_API_KEY")
+    if api_key:
+        os.environ["OPENAI_API_KEY"] = api_key
 
 
 def load_yaml(path):
+    import yaml
+
     return yaml.safe_load(Path(path).read_text(encoding = "utf-8"))
 
 
+def field_labels(field_info):
+    """
+    Usage-ledger labels of a field YAML (see usage_ledger.py)
+    """
+    field_info = field_info or {}
+    return {"field": field_info.get("field_alias"), "field_id": str(field_info.get("field_id") or "") or None}
+
+
 def chunk_line(doc, i = None):
     """
     Format a document chunk into a single line with metadata
@@ -48,53 +62,83 @@ def chunk_line(doc, i = None):
     return f"text: {text} | chunk_id: {chunk_id} | chunk_page: {chunk_page} | chunk_document: {chunk_document}"
 
 
+@tracing.traced("retrieval_with_answer")
 def retrieval_with_answer(field_info     = None,
                           field_type     = None,
                           user_prompt    = None,
                           extract_prompt = None,
-                          k_docs         = 15
+                          k_docs         = None,
+                          stream         = False
                           ):
     """
     Retrieve the most relevant documents and response
+
+    `k_docs=None` picks the number of chunks from the field type, the similarity scores and a
+    token budget (see `adaptive_k.py`); an int keeps a fixed k
+
+    With `stream=True` the response is a generator of `(field, value)` events instead of the
+    final message, so callers can show `result_field`, `justification` and every `text_source`
+    as soon as they are generated
     """
+    from langchain_openai import OpenAIEmbeddings
+    from langchain.chat_models import init_chat_model
+    from prompts.prompts_engine import PromptOrchestrator
+    from vector_quantization import QuantizedVectorStore, load_vector_store
+
+    load_env()
+
     # OpenAI embeddings (reemplazo de BedrockEmbeddings)
-    embeddings = OpenAIEmbeddings(
-        model  = "text-embedding-3-small"
-    )
+    with tracing.span("embeddings.init"):
+        embeddings = OpenAIEmbeddings(
+            model  = "text-embedding-3-small"
+        )
     
     # Extract prompt
-    extract_prompt = PromptOrchestrator.get_prompt(
-        "extract",
-        **field_info,
-        field_type          = field_type,
-        output_language        = "es",
-        max_words              = 500,
-        include_source_guides  = True
-        )
+    with tracing.span("prompt", prompt = "extract") as sp:
+        extract_prompt = PromptOrchestrator.get_prompt(
+            "extract",
+            **field_info,
+            field_type          = field_type,
+            output_language        = "es",
+            max_words              = 500,
+            include_source_guides  = True
+            )
+        sp.count_tokens(system = extract_prompt)
 
     # Load FAISS vector store
-    vector_store = FAISS.load_local(
-        "vector_index",  # load folder FAISS
-        embeddings,      # embeddings
-        allow_dangerous_deserialization = True
-    )
-
-    # Similarity search
-    retrieved_docs = vector_store.similarity_search(field_info["retrieval_keywords"], k = k_docs)
+    with tracing.span("index.load") as sp:
+        vector_store = load_vector_store("vector_index", embeddings)  # Quantized copy when present
+        sp.set(quantization = vector_store.config.label if isinstance(vector_store, QuantizedVectorStore) else "full")
+
+    # Similarity search (embeds the query, then searches the index)
+    if k_docs is None:
+        from adaptive_k import policy_for, select_documents
+
+        with tracing.span("similarity_search", k = policy_for(field_type).max_k) as sp:
+            docs_and_scores = vector_store.similarity_search_with_score(
+                field_info["retrieval_keywords"], k = policy_for(field_type).max_k
+                )
+            retrieved_docs, selection = select_documents(docs_and_scores, field_type)
+            sp.set(**selection.span_attrs())
+    else:
+        with tracing.span("similarity_search", k = k_docs):
+            retrieved_docs = vector_store.similarity_search(field_info["retrieval_keywords"], k = k_docs)
     
     # Prepare chunks
     chunks = "\n".join(chunk_line(doc, i) for i, doc in enumerate(retrieved_docs))
     
     # User prompt for extraction
-    user_prompt = PromptOrchestrator.get_prompt(
-        "user",
-        user_type = "extract",
-        chunks = chunks
-        )
+    with tracing.span("prompt", prompt = "user") as sp:
+        user_prompt = PromptOrchestrator.get_prompt(
+            "user",
+            user_type = "extract",
+            chunks = chunks
+            )
+        sp.count_tokens(user = user_prompt)
 
     # Initialize model
     model = init_chat_model(
-        model       = "gpt-5.2",
+        model       = MODEL_NAME,
         temperature = 0.0,
         top_p       = 1.0,
         max_tokens  = 3000
@@ -106,15 +150,36 @@ def retrieval_with_answer(field_info     = None,
         {"role": "user", "content": user_prompt},
     ]
     
-    response = model.invoke(messages)
+    if stream:
+        return _stream_output(model, messages), extract_prompt
+
+    with tracing.span("llm"), track("extract", MODEL_NAME, (extract_prompt, user_prompt), **field_labels(field_info)) as call:
+        call.response = response = model.invoke(messages)
 
     return response, extract_prompt
 
 
+def _stream_output(model, messages):
+    """
+    Stream the model answer and yield the output fields as soon as they are complete
+    (see `streaming_json.StreamingOutputParser`), then `("__raw__", full_text)`
+    """
+    from streaming_json import parse_stream
+
+    chunks = (chunk.content for chunk in model.stream(messages) if isinstance(chunk.content, str))
+    yield from parse_stream(chunks)
+
+
+@tracing.traced("summarize_content")
 def summarize_content(content = None):
     """
     Summarize the content provided
     """
+    from langchain.chat_models import init_chat_model
+    from prompts.prompts_engine import PromptOrchestrator
+
+    load_env()
+
     # Summary prompt
     summary_prompt = PromptOrchestrator.get_prompt(
         "summarize",
@@ -131,7 +196,7 @@ def summarize_content(content = None):
 
     # Initialize model
     model = init_chat_model(
-        model       = "gpt-5.2",
+        model       = MODEL_NAME,
         temperature = 0.0,
         top_p       = 1.0,
         max_tokens  = 3000
@@ -143,7 +208,8 @@ def summarize_content(content = None):
         {"role": "user", "content": user_prompt},
     ]
     
-    response = model.invoke(messages)
+    with tracing.span("llm"), track("summary", MODEL_NAME, (summary_prompt, user_prompt)) as call:
+        call.response = response = model.invoke(messages)
 
     return response, summary_prompt
 
@@ -159,8 +225,7 @@ if __name__ == "__main__":
     # Raw retrieval and answer
     answer = retrieval_with_answer(
         field_info     = macro_info,
-        field_type     = "qualitative",
-        k_docs         = 15
+        field_type     = "qualitative"
         )
     
     normalized_answer = json.loads(answer[0].content)
@@ -180,8 +245,7 @@ if __name__ == "__main__":
 
         response, _ = retrieval_with_answer(
             field_info = field_info,
-            field_type = "qualitative",
-            k_docs     = 15
+            field_type = "qualitative"
         )
 
         normalized_answer = json.loads(response.content)
@@ -0,0 +1,182 @@
+"""
+Incremental parser for the structured outputs of `schema.py` (`OutputStringField`,
+`OutputNumericField`, `OutputTableField`, `OutputSchemaCritic`) while the LLM is still streaming.
+
+The top-level JSON object is scanned once, chunk by chunk (string/escape/depth state is kept
+between chunks), and every top-level field is decoded as soon as its value is closed. Items of
+`text_source` are surfaced one by one. The complete payload is still validated at the end.
+
+Usage:
+    parser = StreamingOutputParser()
+    for chunk in token_stream:
+        for key, value in parser.feed(chunk):
+            ...  # ("text_source[]", {...}), ("justification", "..."), ("result_field", {...}), ...
+    result = parser.result(OutputTableField)
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable, Iterator, List, Optional, Tuple, Type
+
+from schema_validation import validate_output
+
+ITEM_KEYS = ("text_source",)  # Top-level arrays whose items are surfaced one by one
+
+Event = Tuple[str, Any]
+
+
+class StreamingOutputParser:
+    """
+    Feed text chunks with `feed()`; it returns the `(key, value)` events completed by the chunk.
+
+    Events:
+        (key, value):      a top-level field is complete (value already decoded).
+        (f"{key}[]", item): an item of a top-level array listed in `item_keys` is complete.
+    """
+
+    def __init__(self, item_keys: Iterable[str] = ITEM_KEYS):
+        self.item_keys = set(item_keys)
+        self.buffer = ""
+        self.fields: dict = {}
+
+        self._pos = 0             # Next char of `buffer` to scan
+        self._root: Optional[int] = None
+        self._depth = 0           # Nesting depth ({ and [), the root object is depth 1
+        self._in_string = False
+        self._escape = False
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._expect_key = False
+        self._closed = False
+        self._end: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Event]:
+        self.buffer += chunk
+        events: List[Event] = []
+
+        buffer = self.buffer
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._close_string(i, events)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_start = i
+                elif self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start = i
+                elif self._depth == 2 and self._in_items() and self._item_start is None:
+                    self._item_start = i
+
+            elif ch in "{[":
+                if self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start = i
+                elif self._depth == 2 and self._in_items() and self._item_start is None:
+                    self._item_start = i
+                self._depth += 1
+                if self._depth == 1:
+                    self._root = i if self._root is None else self._root
+                    self._expect_key = True
+
+            elif ch in "}]":
+                if self._depth == 2 and self._item_start is not None:
+                    self._emit_item(i, events)
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    self._emit_field(i + 1, events)
+                elif self._depth == 2 and self._in_items() and self._item_start is not None:
+                    self._emit_item(i + 1, events)
+                elif self._depth == 0:
+                    if self._value_start is not None:
+                        self._emit_field(i, events)  # Last scalar value before the closing brace
+                    self._closed = True
+                    self._end = i + 1
+
+            elif ch == ",":
+                if self._depth == 1:
+                    if self._value_start is not None:
+                        self._emit_field(i, events)  # Scalar value (number, bool, null)
+                    self._expect_key = True
+                elif self._depth == 2 and self._item_start is not None:
+                    self._emit_item(i, events)
+
+            elif ch == ":":
+                pass
+
+            elif not ch.isspace():
+                if self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start = i
+                elif self._depth == 2 and self._in_items() and self._item_start is None:
+                    self._item_start = i
+
+        self._pos = len(buffer)
+        return events
+
+    def _in_items(self) -> bool:
+        return self._key in self.item_keys and self._value_start is not None
+
+    def _close_string(self, i: int, events: List[Event]) -> None:
+        if self._depth == 1 and self._key_start is not None:
+            self._key = json.loads(self.buffer[self._key_start:i + 1])
+            self._key_start = None
+            self._expect_key = False
+        elif self._depth == 1 and self._value_start is not None:
+            self._emit_field(i + 1, events)
+        elif self._depth == 2 and self._item_start is not None and self.buffer[self._item_start] == '"':
+            self._emit_item(i + 1, events)
+
+    def _emit_field(self, end: int, events: List[Event]) -> None:
+        text = self.buffer[self._value_start:end].strip()
+        self._value_start = None
+        if not text:
+            return
+        value = json.loads(text)
+        self.fields[self._key] = value
+        events.append((self._key, value))
+        self._key = None
+
+    def _emit_item(self, end: int, events: List[Event]) -> None:
+        text = self.buffer[self._item_start:end].strip()
+        self._item_start = None
+        if text:
+            events.append((f"{self._key}[]", json.loads(text)))
+
+    @property
+    def done(self) -> bool:
+        return self._closed
+
+    @property
+    def text(self) -> str:
+        """
+        The root JSON object, without any text around it (e.g. markdown fences).
+        """
+        if self._root is None:
+            return self.buffer
+        return self.buffer[self._root:self._end]
+
+    def result(self, schema: Type[Any], mode: str = "lax") -> Any:
+        """
+        Validate the complete streamed payload against `schema`.
+        """
+        return validate_output(self.text, schema, mode = mode)
+
+
+def parse_stream(chunks: Iterable[str], item_keys: Iterable[str] = ITEM_KEYS) -> Iterator[Event]:
+    """
+    Yield the events of a stream of text chunks, then `("__raw__", full_text)`.
+    """
+    parser = StreamingOutputParser(item_keys)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield "__raw__", parser.buffer
@@ -0,0 +1,293 @@
+"""
+Columnar form of `schema.TableField` results, backed by Arrow (requires pyarrow).
+
+- Every column is kept as a dictionary-encoded Arrow string array with the cells exactly as
+  extracted, so `to_field()` gives back the same `columns`/`rows` (lossless round trip for valid
+  tables; unvalidated ones get str cells and rows padded / cut to the columns).
+- Columns whose non-empty cells are all numbers (e.g. "1.234,5", "(12)", "EUR 54 m", "7.5%")
+  also get typed arrays: `value` (float64), `unit` and `currency`. Cells are parsed once per
+  distinct value of the column.
+- `to_dataframe()` wraps the Arrow buffers in `pd.ArrowDtype` columns, without copying them.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+_NUMBER_RE = re.compile(
+    r"""^\s*
+    (?P<open>\()?\s*
+    (?P<sign>[-+−])?\s*
+    (?P<currency>[A-Za-z]{3}|[$€£])?\s*
+    (?P<sign2>[-+−])?\s*
+    (?P<number>\d[\d.,\s ']*\d|\d)\s*
+    (?P<unit>(?i:%|pct|x|k|m|mm|mn|bn|million|billion|thousand|years?|yrs))?\s*
+    (?P<currency2>[A-Za-z]{3}|[$€£])?\s*
+    (?P<close>\))?\s*$""",
+    re.VERBOSE,
+)
+
+# ISO 4217 codes accepted around a number; any other three letters ("Dec 2023") is not a currency
+CURRENCIES = frozenset(
+    "EUR USD GBP CHF JPY CNY HKD SGD AUD NZD CAD SEK NOK DKK ISK PLN CZK HUF RON BGN TRY RUB ILS "
+    "AED SAR QAR INR KRW TWD THB IDR MYR PHP ZAR EGP MAD NGN MXN BRL ARS CLP COP PEN UYU".split()
+)
+
+_UNIT_ALIASES = {
+    "%": "pct", "pct": "pct", "x": "x",
+    "k": "k", "thousand": "k",
+    "m": "m", "mm": "m", "mn": "m", "million": "m",
+    "bn": "bn", "billion": "bn",
+    "year": "yrs", "years": "yrs", "yrs": "yrs",
+}
+
+
+def _to_float(number: str) -> Optional[float]:
+    """
+    Parse a number written with either "," or "." as decimal separator.
+
+    The last separator is the decimal one when both appear, or when it is not followed by
+    exactly three digits ("1,5" -> 1.5, "1,500" -> 1500, "1.234,5" -> 1234.5).
+    """
+    digits = re.sub(r"[\s ']", "", number)
+    last = max(digits.rfind(","), digits.rfind("."))
+    if last == -1:
+        return float(digits)
+
+    separators = set(digits) & {",", "."}
+    decimals = digits[last + 1:]
+    if len(separators) == 2 or len(decimals) != 3 or (digits.count(digits[last]) == 1 and digits.startswith("0")):
+        integer = re.sub(r"[.,]", "", digits[:last])
+        return float(f"{integer}.{decimals}")
+    return float(re.sub(r"[.,]", "", digits))
+
+
+def parse_number(cell: str) -> Optional[Tuple[float, str, str]]:
+    """
+    Parse one table cell as `(value, unit, currency)`, or None if it is not a number.
+
+    >>> parse_number("(EUR 1.234,5)")
+    (-1234.5, '', 'EUR')
+    >>> parse_number("7.5%")
+    (7.5, 'pct', '')
+    >>> parse_number("eur 54 M")
+    (54.0, 'm', 'EUR')
+    >>> parse_number("Dec 2023") is None
+    True
+    """
+    m = _NUMBER_RE.match(cell)
+    if not m or bool(m.group("open")) != bool(m.group("close")):
+        return None
+    if m.group("currency") and m.group("currency2"):
+        return None
+
+    try:
+        value = _to_float(m.group("number"))
+    except ValueError:
+        return None
+
+    if m.group("open") or (m.group("sign") or m.group("sign2") or "") in ("-", "−"):
+        value = -value
+
+    unit = _UNIT_ALIASES.get((m.group("unit") or "").lower(), "")
+    currency = (m.group("currency") or m.group("currency2") or "").upper()
+    if currency.isalpha() and currency not in CURRENCIES:
+        return None
+    return value, unit, currency
+
+
+def _compact(array):
+    """
+    Dictionary-encode a string array only when it is smaller that way (repeated cells).
+    """
+    encoded = array.dictionary_encode()
+    return encoded if encoded.nbytes < array.nbytes else array
+
+
+def _to_pylist(array) -> List[str]:
+    # Decode dictionary columns once per distinct value instead of once per cell
+    if hasattr(array, "indices"):
+        return list(map(array.dictionary.to_pylist().__getitem__, array.indices.to_pylist()))
+    return array.to_pylist()
+
+
+def unique_names(columns: List[str]) -> List[str]:
+    """
+    Distinct column names for Arrow / pandas: repeated titles get a ".1", ".2"... suffix and
+    empty ones are named after their position.
+
+    >>> unique_names(["a", "a", "", "a.1"])
+    ['a', 'a.1', 'col_2', 'a.1.1']
+    """
+    names: List[str] = []
+    seen = set()
+    for i, title in enumerate(columns):
+        base = str(title).strip() or f"col_{i}"
+        name, n = base, 0
+        while name in seen:
+            n += 1
+            name = f"{base}.{n}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _string_array(pa, cells):
+    try:
+        return pa.array(cells, type = pa.string())
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        return pa.array([None if cell is None else str(cell) for cell in cells], type = pa.string())
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Columnar tables require pyarrow: pip install pyarrow") from e
+    return pa
+
+
+class ColumnarTable:
+    """
+    Column-oriented view of a `TableField`.
+
+    Args:
+        columns: Column titles, as in `TableField.columns` (duplicates allowed).
+        raw: One Arrow string array per column (dictionary-encoded when smaller), cells as extracted.
+        parsed: Column position -> Arrow struct array `{value, unit, currency}` for numeric columns.
+    """
+
+    def __init__(self, columns: List[str], raw: List[Any], parsed: Optional[Dict[int, Any]] = None):
+        self.columns = list(columns)
+        self.raw = list(raw)
+        self.parsed = dict(parsed or {})
+
+    # ---------------------------------------------------------------- convert
+
+    @classmethod
+    def from_field(cls, table: Union["TableField", Mapping[str, Any]], parse_numbers: bool = True) -> "ColumnarTable":
+        """
+        Build from a `TableField` or its dict form (`{"columns": [...], "rows": [[...], ...]}`).
+        """
+        pa = _require_pyarrow()
+
+        if isinstance(table, Mapping):
+            columns, rows = table.get("columns") or [], table.get("rows") or []
+        else:
+            columns, rows = table.columns or [], table.rows or []
+
+        # Unvalidated payloads (fast mode, stored results) may hold ragged rows or non-str cells:
+        # rows are padded with nulls / cut to the columns and cells cast to str (None stays null)
+        width = len(columns)
+        if any(len(row) != width for row in rows):
+            rows = [list(row)[:width] + [None] * (width - len(row)) for row in rows]
+        cells = list(zip(*rows)) if rows else [()] * width
+        arrays = [_string_array(pa, col) for col in cells]
+
+        parsed = {}
+        if parse_numbers:
+            for i, array in enumerate(arrays):
+                numeric = cls._parse_column(array.dictionary_encode())
+                if numeric is not None:
+                    parsed[i] = numeric
+
+        return cls(columns, [_compact(array) for array in arrays], parsed)
+
+    @staticmethod
+    def _parse_column(column) -> Optional[Any]:
+        """
+        Typed `{value, unit, currency}` struct array of a dictionary-encoded column, or None if
+        any non-empty cell is not a number (or every cell is empty).
+        """
+        import pyarrow as pa
+
+        values, units, currencies = [], [], []
+        has_number = False
+        for cell in column.dictionary.to_pylist():
+            if not cell.strip():
+                values.append(None); units.append(""); currencies.append("")
+                continue
+            number = parse_number(cell)
+            if number is None:
+                return None
+            has_number = True
+            values.append(number[0]); units.append(number[1]); currencies.append(number[2])
+
+        if not has_number:
+            return None
+
+        indices = column.indices
+        return pa.StructArray.from_arrays(
+            [
+                pa.array(values, pa.float64()).take(indices),
+                pa.DictionaryArray.from_arrays(indices, pa.array(units, pa.string())),
+                pa.DictionaryArray.from_arrays(indices, pa.array(currencies, pa.string())),
+            ],
+            names = ["value", "unit", "currency"],
+        )
+
+    def to_field(self) -> "TableField":
+        from schema import TableField
+
+        rows = [list(row) for row in zip(*map(_to_pylist, self.raw))]
+        return TableField.model_construct(columns = list(self.columns), rows = rows)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.to_field().model_dump()
+
+    def to_arrow(self, parsed: bool = False):
+        """
+        Arrow table with one column per table column. With `parsed=True` numeric columns are
+        float64 values instead of the extracted strings.
+
+        Column names are made unique (`unique_names`); the titles as extracted are kept in the
+        schema metadata under `b"columns"` (JSON list).
+        """
+        pa = _require_pyarrow()
+
+        arrays = [
+            self.parsed[i].field("value") if parsed and i in self.parsed else col
+            for i, col in enumerate(self.raw)
+        ]
+        schema = pa.schema(
+            [pa.field(name, array.type) for name, array in zip(unique_names(self.columns), arrays)],
+            metadata = {b"columns": json.dumps(self.columns, ensure_ascii = False).encode("utf-8")},
+        )
+        return pa.Table.from_arrays(arrays, schema = schema)
+
+    def to_dataframe(self, parsed: bool = False):
+        """
+        pandas DataFrame over the Arrow buffers (`pd.ArrowDtype` columns, no copy).
+        """
+        import pandas as pd
+
+        return self.to_arrow(parsed = parsed).to_pandas(types_mapper = pd.ArrowDtype)
+
+    # ----------------------------------------------------------------- lookup
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.raw[0]) if self.raw else 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.nbytes for col in self.raw) + sum(col.nbytes for col in self.parsed.values())
+
+    def numeric_columns(self) -> List[str]:
+        return [self.columns[i] for i in sorted(self.parsed)]
+
+    def values(self, column: Union[int, str]):
+        """
+        float64 values of a numeric column (by position or title); None if it is not numeric.
+        """
+        i = column if isinstance(column, int) else self.columns.index(column)
+        return self.parsed[i].field("value") if i in self.parsed else None
+
+    def units(self, column: Union[int, str]):
+        i = column if isinstance(column, int) else self.columns.index(column)
+        return self.parsed[i].field("unit") if i in self.parsed else None
+
+    def currencies(self, column: Union[int, str]):
+        i = column if isinstance(column, int) else self.columns.index(column)
+        return self.parsed[i].field("currency") if i in self.parsed else None
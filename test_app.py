@@ -5,12 +5,28 @@ from __future__ import annotations
 
 import json
 import re
+import time
 from contextlib import contextmanager
-from typing import Any, Dict, List, Optional, Tuple
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
 import streamlit as st
 
+import tracing
+from adaptive_k import select_frame
+from answer_cache import AnswerCache, CachedAnswer, ChunkSet, answer_version
+from evidence_index import EvidenceIndex
+from field_registry import CATALOG_PATH, FieldRegistry
+from pipeline_jobs import JobManager
+from result_store import ResultStore, new_run_id
+from retrieval_cache import RetrievalCache, retrieval_key
+from schema_validation import validate_output
+from streaming_json import StreamingOutputParser
+from table_columns import ColumnarTable
+from usage_ledger import model_name, track, usage_context
+
 
 # ======================================================================================
 # Page config
@@ -463,6 +479,10 @@ def result_to_dataframe(result_field: Dict[str, Any]) -> Optional[pd.DataFrame]:
     if "columns" in result_field and "rows" in result_field:
         cols = result_field.get("columns") or []
         rows = result_field.get("rows") or []
+        try:
+            return ColumnarTable.from_field(result_field, parse_numbers=False).to_dataframe()
+        except Exception:
+            pass
         try:
             return pd.DataFrame(rows, columns=cols)
         except Exception:
@@ -536,6 +556,21 @@ def render_sources_block(text_sources: List[Dict[str, Any]]) -> None:
         )
 
 
+def render_live_preview(stage: str, data: Dict[str, Any]) -> None:
+    """
+    Fields of a stage streamed so far (result first, then sources), before the full response is
+    validated.
+    """
+    st.caption(f"{stage.capitalize()} extraction — streaming…")
+    result_field = data.get("result_field")
+    df = result_to_dataframe(result_field or {})
+    if df is not None:
+        st.dataframe(df, use_container_width=True, hide_index=True)
+    elif isinstance(result_field, dict):
+        st.markdown(str(result_field.get("text") or ""))
+    render_sources_block(data.get("text_source") or data.get("text_source_items") or [])
+
+
 def render_justification_and_synonyms(response: Dict[str, Any]) -> None:
     justification = response.get("justification") or ""
     synonyms = response.get("synonyms_found") or []
@@ -556,6 +591,29 @@ def render_justification_and_synonyms(response: Dict[str, Any]) -> None:
         st.caption("No synonyms found.")
 
 
+def render_timing_panel(trace: Dict[str, Any]) -> None:
+    """
+    Per-stage durations of a traced run (see tracing.py), nested stages indented.
+    """
+    rows = tracing.flatten(trace)
+    if not rows:
+        st.info("Enable “Trace timings” and run an extraction to see the stage timings.")
+        return
+    df = pd.DataFrame(rows)
+    df.insert(0, "stage", [" " * d + n for d, n in zip(df.pop("depth"), df.pop("name"))])
+    df = df.drop(columns=["trace_id", "span_id", "parent_id", "thread"])
+    st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "duration_ms": st.column_config.ProgressColumn(
+                "duration (ms)", format="%.1f", min_value=0.0, max_value=float(df["duration_ms"].max() or 1.0)
+            ),
+        },
+    )
+
+
 def render_critique_block(critique: Dict[str, Any]) -> None:
     if not critique:
         st.info("No critique available.")
@@ -586,11 +644,38 @@ def render_critique_block(critique: Dict[str, Any]) -> None:
             key=f"ta_c_{hash(str(justification))}",
         )
 
+    grounding = critique.get("grounding")
+    if grounding:
+        st.caption(f"Local grounding score (citations found in retrieved chunks): {grounding['score']:.2f}")
+        for src in grounding.get("sources", []):
+            if src.get("grounded"):
+                continue
+            where = f" — quote found in `{src['found_in']}`" if src.get("found_in") else ""
+            issue = "unknown chunk_id" if not src.get("id_found") else "page mismatch" if not src.get("page_ok") else "quote not found"
+            st.markdown(f"- `{src['chunk_id']}`: {issue} (coverage {src['coverage']:.0%}){where}")
+
+    selection = critique.get("k_selection")
+    if selection:
+        st.caption(
+            f"Chunks sent to the LLM: {selection['k']} of {selection['candidates']} retrieved, "
+            f"~{selection['tokens']:,} tokens (stopped by {selection['reason'].replace('_', ' ')})"
+        )
+
+    for kind, hit in (critique.get("answer_cache") or {}).items():
+        st.caption(
+            f"{kind.capitalize()} reused from the answer cache ({hit['match']} match, similarity "
+            f"{hit['similarity']:.3f}): {hit['company']} run {hit['run_id'] or '—'}"
+        )
+
 
 # ======================================================================================
 # Backend (logic-only)
 # ======================================================================================
 LANGUAGE = "ES"
+RETRIEVE_TOP_K = 20
+EXTRACT_TOP_K = 10  # Chunks sent to the LLM when ADAPTIVE_TOP_K is off
+ADAPTIVE_TOP_K = True  # Chunks chosen per field type and scores (see adaptive_k.py)
+ANSWER_CACHE = True  # Reuse answers given on the same or near-identical chunks (see answer_cache.py)
 PROMPTS_SUBMODULE = "prompts-data_research-aigenpf"
 CATALOG_XLSX = "DS - Campos prioritarios.xlsx"
 CATALOG_SHEET = "Inventario campos"
@@ -658,7 +743,7 @@ def get_backend_objects() -> Dict[str, Any]:
     yaml_loader = LocalYamlLoader(prompts_submodule=PROMPTS_SUBMODULE, language=LANGUAGE)
     prompt_loader = PromptReaderFromRepo(yaml_loader)
 
-    retrieve_component = RetrieveComponent(top_k=20)
+    retrieve_component = RetrieveComponent(top_k=RETRIEVE_TOP_K)
 
     text_llm = RatingCalculatorLm(output_schema=OutputStringField)
     table_llm = RatingCalculatorLm(output_schema=OutputTableField)
@@ -678,32 +763,44 @@ def get_backend_objects() -> Dict[str, Any]:
     }
 
 
-@st.cache_data
-def build_registry_for_company(company: str, retrieve_params_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    df_indexes = pd.Series(all_indexes[company], name="index_name")
-
-    df_aux = (
-        retrieve_params_df.copy()
-        .reset_index(drop=True)
-        .sort_values(by=["fieldId"])
+@st.cache_resource
+def get_field_registry() -> FieldRegistry:
+    backend = get_backend_objects()
+    catalog_path, catalog_sheet = (CATALOG_XLSX, CATALOG_SHEET) if Path(CATALOG_XLSX).exists() else (CATALOG_PATH, 0)
+    return FieldRegistry.load_or_build(
+        backend["retrieve_params_df"],
+        all_indexes,
+        catalog_path=catalog_path,
+        catalog_sheet=catalog_sheet,
     )
-    df_aux = df_aux.merge(df_indexes, how="cross").reset_index(drop=True)
-    df_aux["field_id"] = df_aux["fieldId"] + "_" + df_aux["subfield"]
 
-    fields_info = df_aux[["field", "field_id"]].drop_duplicates().reset_index(drop=True)
 
-    # Merge catalog for field type (Numeric / Table / String)
-    try:
-        catalog = pd.read_excel(CATALOG_XLSX, sheet_name=CATALOG_SHEET)[
-            ["Alias Campo (YAML y Catálogo MLEs)", "Tipo"]
-        ]
-        catalog.columns = ["field", "type"]
-        fields_info = pd.merge(fields_info, catalog, how="left", on="field")
-    except Exception:
-        fields_info["type"] = "String"
+@st.cache_resource
+def get_result_store() -> ResultStore:
+    return ResultStore()
 
-    fields_info["type"] = fields_info["type"].fillna("String")
-    return df_aux, fields_info
+
+def store_results(
+    company: str,
+    field_id: str,
+    outputs: Dict[str, Any],
+    k_selection: Optional[Dict[str, Any]] = None,
+    cache_hits: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> None:
+    """
+    Persist the outputs of one run (kind -> output) so evaluation and exports can reuse them.
+    cache_hits: kind -> provenance of the answer-cache hit the output was reused from.
+    """
+    registry = get_field_registry()
+    field = registry.get(field_id)["field"]
+    run_id = new_run_id()
+    provenance = {"source": "test_app", "indexes": registry.indexes(company), "k_selection": k_selection}
+    for kind, output in outputs.items():
+        if output is not None:
+            get_result_store().put(
+                company, field, field_id, output, kind=kind, run_id=run_id,
+                provenance={**provenance, "answer_cache": (cache_hits or {}).get(kind)},
+            )
 
 
 def pick_schema_and_llm(field_type: str, backend: Dict[str, Any]):
@@ -715,13 +812,68 @@ def pick_schema_and_llm(field_type: str, backend: Dict[str, Any]):
     return OutputStringField, backend["text_llm"]
 
 
-def retrieve_chunks(company: str, df_aux: pd.DataFrame, field_id: str, backend: Dict[str, Any]) -> pd.DataFrame:
-    df_fields = df_aux[df_aux["field_id"] == field_id].copy()
-    df_fields["language"] = LANGUAGE
-    df_fields["prompt_language"] = LANGUAGE
+@st.cache_resource
+def get_retrieval_cache() -> RetrievalCache:
+    # Process-wide (shared by reruns and sessions); frames are held as Arrow tables, not pickled
+    return RetrievalCache()
+
+
+def retrieve_chunks(company: str, registry: FieldRegistry, field_id: str, backend: Dict[str, Any]) -> pd.DataFrame:
+    indexes = registry.indexes(company)
+
+    def retrieve() -> pd.DataFrame:
+        df_fields = registry.retrieve_frame(company, field_id=field_id)
+        df_fields["language"] = LANGUAGE
+        df_fields["prompt_language"] = LANGUAGE
+        return backend["retrieve_component"].retrieve(index_names=indexes, df_fields=df_fields)
+
+    key = retrieval_key(company, field_id, indexes, RETRIEVE_TOP_K, LANGUAGE, registry.fingerprint)
+    return get_retrieval_cache().get_or_retrieve(key, retrieve)
+
+
+@st.cache_resource
+def get_answer_cache() -> AnswerCache:
+    return AnswerCache()
+
+
+def cached_answer(
+    field_id: str,
+    kind: str,
+    df_retrieved: pd.DataFrame,
+    top_k: int,
+    system_prompt: str,
+    output_schema: Any,
+    answer: Callable[[], Any],
+    company: Optional[str] = None,
+    depends_on: Tuple[Any, ...] = (),
+) -> Tuple[Any, Optional[CachedAnswer]]:
+    """
+    `answer()`, or the answer already given for this field on the same (or near-identical) chunks.
+    """
+    if not ANSWER_CACHE:
+        return answer(), None
+    try:
+        chunks = ChunkSet.from_frame(df_retrieved.head(top_k))
+    except ValueError:
+        return answer(), None
+    version = answer_version(system_prompt, output_schema.__name__, *depends_on)
+    return get_answer_cache().get_or_answer(
+        field_id, kind, chunks, version, answer, schema=output_schema, company=company,
+        provenance={"source": "test_app", "prompt": f"{field_id}/{field_id}_{kind}"},
+    )
+
+
+# Streaming method of the LLM backend (yields text chunks). Without it the full response is
+# parsed at once and every field event fires together.
+LLM_STREAM_METHOD = "llm_response_stream"
 
-    indexes = pd.Series(all_indexes[company], name="index_name").to_list()
-    return backend["retrieve_component"].retrieve(index_names=indexes, df_fields=df_fields)
+
+def llm_chunks(llm: Any, system_prompt: str, user_prompt: str) -> Iterator[Any]:
+    stream = getattr(llm, LLM_STREAM_METHOD, None)
+    if callable(stream):
+        yield from stream(system_prompt, user_prompt)
+    else:
+        yield llm.llm_response(system_prompt, user_prompt)
 
 
 def extract_with_prompt(
@@ -730,11 +882,40 @@ def extract_with_prompt(
     prompt_suffix: str,
     output_schema: Any,
     llm: Any,
-) -> Any:
+    on_event: Optional[Callable[[str, Any], None]] = None,
+    top_k: int = EXTRACT_TOP_K,
+    company: Optional[str] = None,
+) -> Tuple[Any, Optional[CachedAnswer]]:
     prompt = f"{field_id}/{field_id}_{prompt_suffix}"
-    system_prompt, user_prompt = get_extract_prompt_with_context(prompt, df_retrieved, 10)
-    raw = llm.llm_response(system_prompt, user_prompt)
-    return output_schema.model_validate_json(raw)
+    with tracing.span("prompt", prompt=prompt) as sp:
+        system_prompt, user_prompt = get_extract_prompt_with_context(prompt, df_retrieved, top_k)
+        sp.count_tokens(system=system_prompt, user=user_prompt)
+
+    def answer() -> Any:
+        # Parse while streaming so result_field / justification / each text_source surface early
+        parser = StreamingOutputParser()
+        structured = None
+        text = []
+        with tracing.span("llm") as sp, track(prompt_suffix, model_name(llm), (system_prompt, user_prompt)) as call:
+            for n, chunk in enumerate(llm_chunks(llm, system_prompt, user_prompt), 1):
+                if n == 1:
+                    sp.set(first_chunk_ms=round(sp.duration * 1000, 1))
+                if not isinstance(chunk, str):
+                    structured = call.response = chunk  # Backend returned a parsed object
+                    break
+                text.append(chunk)
+                for key, value in parser.feed(chunk):
+                    if on_event:
+                        on_event(key, value)
+            if structured is None:
+                call.completion_text = "".join(text)
+
+        with tracing.span("validate"):
+            if structured is not None:
+                return validate_output(structured, output_schema)
+            return parser.result(output_schema)
+
+    return cached_answer(field_id, prompt_suffix, df_retrieved, top_k, system_prompt, output_schema, answer, company)
 
 
 def critique_with_prompt(
@@ -742,14 +923,78 @@ def critique_with_prompt(
     field_id: str,
     field_extract_obj: Any,
     backend: Dict[str, Any],
-) -> Any:
+    top_k: int = EXTRACT_TOP_K,
+    company: Optional[str] = None,
+) -> Tuple[Any, Optional[CachedAnswer]]:
     prompt = f"{field_id}/{field_id}_critique"
-    system_prompt, user_prompt = get_critique_prompt_with_context(prompt, df_retrieved, 10, field_extract_obj)
-    raw = backend["critic_llm"].llm_response(system_prompt, user_prompt)
-    return OutputSchemaCritic.model_validate_json(raw)
+    with tracing.span("prompt", prompt=prompt) as sp:
+        system_prompt, user_prompt = get_critique_prompt_with_context(prompt, df_retrieved, top_k, field_extract_obj)
+        sp.count_tokens(system=system_prompt, user=user_prompt)
+    llm = backend["critic_llm"]
+
+    def answer() -> Any:
+        with tracing.span("llm"), track("critique", model_name(llm), (system_prompt, user_prompt)) as call:
+            call.response = raw = llm.llm_response(system_prompt, user_prompt)
+        with tracing.span("validate"):
+            return validate_output(raw, OutputSchemaCritic)
+
+    return cached_answer(
+        field_id, "critique", df_retrieved, top_k, system_prompt, OutputSchemaCritic, answer, company, (field_extract_obj,)
+    )
+
+
+def check_grounding(df_retrieved: pd.DataFrame, output: Any) -> Dict[str, Any]:
+    """
+    Local check of the initial extraction's text_source against the retrieved chunks (no LLM call).
+    """
+    try:
+        return EvidenceIndex.from_frame(df_retrieved).verify(output).to_dict()
+    except ValueError:
+        return {}
 
 
-def run_pipeline(company: str, field_id: str, field_type: str) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+def run_pipeline(
+    company: str,
+    field_id: str,
+    field_type: str,
+    on_event: Optional[Callable[[str, str, Any], None]] = None,
+    on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    trace: Optional[bool] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Pipeline run. `trace` (the session's "Trace timings" flag) enables tracing for this job only;
+    when traced, the span tree is reported as the "trace" stage.
+    LLM calls are recorded in the usage ledger under the company and field.
+    """
+    field = None
+    if BACKEND_AVAILABLE:  # Mock mode has no retrieve params to build the registry from
+        registry = get_field_registry()
+        field = registry.get(field_id)["field"] if field_id in registry else None
+    with tracing.scoped(trace):
+        with tracing.span("run_pipeline", company=company, field_id=field_id, field_type=field_type) as root, \
+                usage_context(company=company, field=field, field_id=field_id):
+            outputs = run_stages(company, field_id, field_type, on_event, on_stage)
+        if on_stage and tracing.enabled():
+            on_stage("trace", root.to_dict())
+    return outputs
+
+
+def run_stages(
+    company: str,
+    field_id: str,
+    field_type: str,
+    on_event: Optional[Callable[[str, str, Any], None]] = None,
+    on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    `on_event(stage, key, value)` receives the streamed fields, `on_stage(stage, output)` each
+    finished stage ("initial", "alternative", "critique").
+    """
+    def emit(stage: str, output: Dict[str, Any]) -> Dict[str, Any]:
+        if on_stage:
+            on_stage(stage, output)
+        return output
+
     backend = get_backend_objects()
     if not backend:
         # Minimal mock fallback (keeps UI usable if backend deps are missing)
@@ -775,18 +1020,139 @@ def run_pipeline(company: str, field_id: str, field_type: str) -> Tuple[Dict[str
 
         ft = (field_type or "").lower()
         base = example_numeric if ft == "numeric" else example_table if ft == "table" else example_text
-        return base, base, critique
+        return emit("initial", base), emit("alternative", base), emit("critique", critique)
 
-    df_aux, _ = build_registry_for_company(company, backend["retrieve_params_df"])
+    registry = get_field_registry()
     schema, llm = pick_schema_and_llm(field_type, backend)
 
-    df_retrieved = retrieve_chunks(company, df_aux, field_id, backend)
+    with tracing.span("retrieve") as sp:
+        df_retrieved = retrieve_chunks(company, registry, field_id, backend)
+        sp.set(rows=len(df_retrieved))
+
+    top_k, k_selection = EXTRACT_TOP_K, None
+    if ADAPTIVE_TOP_K:
+        with tracing.span("select_k") as sp:
+            df_retrieved, selection = select_frame(df_retrieved, field_type)
+            sp.set(**selection.span_attrs())
+        top_k, k_selection = selection.k, selection.to_dict()
+
+    hits: Dict[str, Optional[CachedAnswer]] = {}
+    with tracing.span("extract", stage="initial"):
+        initial_obj, hits["extract"] = extract_with_prompt(
+            df_retrieved, field_id, "extract", schema, llm, on_event and partial(on_event, "initial"), top_k, company
+        )
+    initial = emit("initial", as_dict(initial_obj))
+    with tracing.span("extract", stage="alternative"):
+        alternative_obj, hits["alternative"] = extract_with_prompt(
+            df_retrieved, field_id, "alternative", schema, llm, on_event and partial(on_event, "alternative"), top_k, company
+        )
+    alternative = emit("alternative", as_dict(alternative_obj))
+    with tracing.span("critique"):
+        critique_obj, hits["critique"] = critique_with_prompt(df_retrieved, field_id, initial_obj, backend, top_k, company)
+    cache_hits = {kind: hit.to_dict() for kind, hit in hits.items() if hit is not None}
+
+    with tracing.span("store"):
+        outputs = {"extract": initial_obj, "alternative": alternative_obj, "critique": critique_obj}
+        store_results(company, field_id, outputs, k_selection, cache_hits)
 
-    initial_obj = extract_with_prompt(df_retrieved, field_id, "extract", schema, llm)
-    alternative_obj = extract_with_prompt(df_retrieved, field_id, "alternative", schema, llm)
-    critique_obj = critique_with_prompt(df_retrieved, field_id, initial_obj, backend)
+    critique = as_dict(critique_obj)
+    with tracing.span("grounding"):
+        grounding = check_grounding(df_retrieved, initial_obj)
+    if grounding:
+        critique["grounding"] = grounding
+    if k_selection:
+        critique["k_selection"] = k_selection
+    if cache_hits:
+        critique["answer_cache"] = cache_hits
 
-    return as_dict(initial_obj), as_dict(alternative_obj), as_dict(critique_obj)
+    return initial, alternative, emit("critique", critique)
+
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    # Process-wide: jobs outlive reruns and sessions, each session only keeps its job ids
+    return JobManager()
+
+
+JOB_POLL_SECONDS = 0.5
+
+
+# ======================================================================================
+# Comparison grid (fields × companies)
+# ======================================================================================
+GRID_PAGE_SIZE = 50
+GridCell = Dict[str, Any]  # {"job_id": ...} while computed here, {"stored": output} when reused
+
+
+def summarize_result(output: Dict[str, Any], max_len: int = 80) -> str:
+    result_field = (output or {}).get("result_field")
+    if not isinstance(result_field, dict):
+        return ""
+    if "rows" in result_field:
+        return f"Table {len(result_field.get('rows') or [])}×{len(result_field.get('columns') or [])}"
+    if "value" in result_field:
+        value = result_field.get("value")
+        value = f"{value:,}" if isinstance(value, (int, float)) else str(value)
+        extras = [str(result_field[k]) for k in ("unit", "currency") if result_field.get(k) is not None]
+        return " ".join([value, *extras])
+    return first_sentence(result_field.get("text") or "", max_len)
+
+
+def submit_grid(
+    companies: List[str],
+    fields: List[Dict[str, Any]],
+    reuse_stored: bool,
+    trace: bool = False,
+) -> Dict[Tuple[str, str], GridCell]:
+    """
+    Queue one background job per (company, field); with `reuse_stored`, cells that already have a
+    stored extraction are filled from the result store instead.
+    """
+    jobs, store = get_job_manager(), get_result_store()
+    cells: Dict[Tuple[str, str], GridCell] = {}
+    for field in fields:
+        for company in companies:
+            stored = store.get(company, field["field_id"], "extract") if reuse_stored else None
+            if stored is not None:
+                cells[(company, field["field_id"])] = {"stored": stored.payload}
+            else:
+                job_id = jobs.submit(partial(run_pipeline, trace=trace), company, field["field_id"], field.get("type", "String"))
+                cells[(company, field["field_id"])] = {"job_id": job_id}
+    return cells
+
+
+def grid_page_frame(
+    companies: List[str],
+    fields: List[Dict[str, Any]],
+    cells: Dict[Tuple[str, str], GridCell],
+) -> pd.DataFrame:
+    """
+    Comparison table for a page of fields (only this page's job outputs are read).
+    """
+    job_ids = [c["job_id"] for f in fields for c in (cells.get((co, f["field_id"])) or {} for co in companies) if "job_id" in c]
+    snapshots = {j.job_id: j for j in get_job_manager().jobs(job_ids)}
+
+    rows = []
+    for field in fields:
+        row = {"Field": field["field"], "Field id": field["field_id"]}
+        for company in companies:
+            cell = cells.get((company, field["field_id"])) or {}
+            if "stored" in cell:
+                row[company] = summarize_result(cell["stored"])
+                continue
+            job = snapshots.get(cell.get("job_id"))
+            if job is None:
+                # Finished job pruned from the manager: its outputs were persisted by run_pipeline
+                stored = get_result_store().get(company, field["field_id"], "extract")
+                row[company] = summarize_result(stored.payload) if stored else "—"
+            elif "initial" in job.stages:
+                row[company] = summarize_result(job.stages["initial"])
+            elif job.status == "error":
+                row[company] = f"⚠ {first_sentence(job.error or '', 60)}"
+            else:
+                row[company] = f"{job.status}…"
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["Field", "Field id", *companies])
 
 
 # ======================================================================================
@@ -799,6 +1165,9 @@ for k, v in {
     "selected_company": None,
     "selected_field_id": None,
     "selected_field_type": None,
+    "job_ids": [],
+    "job_id": None,
+    "grid": None,
 }.items():
     if k not in st.session_state:
         st.session_state[k] = v
@@ -828,25 +1197,34 @@ with st.sidebar:
         unsafe_allow_html=True,
     )
 
-    company = st.selectbox("Company", list(all_indexes.keys()), key="sb_company")
+    mode = st.radio("Mode", ["Single field", "Comparison grid"], horizontal=True, key="rb_mode")
+    if mode == "Single field":
+        company = st.selectbox("Company", list(all_indexes.keys()), key="sb_company")
+    else:
+        grid_companies = st.multiselect("Companies", list(all_indexes.keys()), key="ms_companies")
     field_search = st.text_input("Field filter", placeholder="Type to filter fields…", key="sb_field_search")
 
     if BACKEND_AVAILABLE:
-        backend = get_backend_objects()
-        df_aux, fields_info = build_registry_for_company(company, backend["retrieve_params_df"])
+        fields_info = get_field_registry().fields_info()
     else:
-        fields_info = pd.DataFrame(
-            [{"field": "example_field", "field_id": "example_id_sub", "type": "String"}]
-        )
+        fields_info = [{"field": "example_field", "field_id": "example_id_sub", "type": "String"}]
 
-    filtered = fields_info.copy()
+    options = fields_info
     if field_search.strip():
         q = field_search.strip().lower()
-        filtered = filtered[filtered["field"].str.lower().str.contains(q, na=False)]
+        options = [r for r in options if q in str(r["field"]).lower()]
 
     # Build select labels
-    options = filtered.to_dict("records")
-    if not options:
+    if mode == "Comparison grid":
+        grid_labels = {r["field_id"]: f"{r['field']}  •  {r['field_id']}  •  {r.get('type','String')}" for r in options}
+        grid_field_ids = st.multiselect("Fields", list(grid_labels), format_func=grid_labels.get, key="ms_fields")
+        if st.checkbox("Select all filtered fields", key="cb_all_fields"):
+            grid_field_ids = list(grid_labels)
+        reuse_stored = st.checkbox("Reuse stored results", value=True, key="cb_reuse_stored")
+        st.markdown("---")
+        grid_clicked = st.button("Run grid", key="btn_run_grid", disabled=not (grid_companies and grid_field_ids))
+        selected = {"field": "", "field_id": "", "type": "String"}
+    elif not options:
         st.warning("No fields match the filter.")
         selected = {"field": "", "field_id": "", "type": "String"}
     else:
@@ -854,20 +1232,88 @@ with st.sidebar:
         idx = st.selectbox("Field", list(range(len(labels))), format_func=lambda i: labels[i], key="sb_field_idx")
         selected = options[idx]
 
-    st.markdown("---")
-    run_clicked = st.button("Run extraction", key="btn_run")
+    # Per session: passed to this session's jobs, the process-wide tracing setting is left alone
+    trace_timings = st.checkbox("Trace timings", value=tracing.enabled(), key="cb_trace")
+
+    if mode == "Single field":
+        st.markdown("---")
+        run_clicked = st.button("Run extraction", key="btn_run")
+    else:
+        run_clicked = False
+
+# Comparison grid: one background job per cell, the table fills in as results arrive
+if mode == "Comparison grid":
+    if grid_clicked:
+        grid_fields = [r for r in options if r["field_id"] in set(grid_field_ids)]
+        st.session_state.grid = {
+            "companies": list(grid_companies),
+            "fields": grid_fields,
+            "cells": submit_grid(grid_companies, grid_fields, reuse_stored, trace_timings),
+        }
+
+    grid = st.session_state.grid
+    if not grid:
+        st.info("Select companies and fields, then run the grid.")
+        st.stop()
+
+    grid_job_ids = [c["job_id"] for c in grid["cells"].values() if "job_id" in c]
+    grid_statuses = get_job_manager().statuses(grid_job_ids)
+    pending = sum(status in ("queued", "running") for status in grid_statuses.values())
+    failed = sum(status == "error" for status in grid_statuses.values())
+    done = len(grid["cells"]) - pending - failed
+    st.progress(done / max(1, len(grid["cells"])), text=f"{done}/{len(grid['cells'])} cells done · {pending} pending · {failed} failed")
+
+    # Paginated by field rows: only the visible page is built and rendered
+    n_pages = max(1, -(-len(grid["fields"]) // GRID_PAGE_SIZE))
+    page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1, key="ni_grid_page") if n_pages > 1 else 1
+    page_fields = grid["fields"][(page - 1) * GRID_PAGE_SIZE:page * GRID_PAGE_SIZE]
+    st.dataframe(
+        grid_page_frame(grid["companies"], page_fields, grid["cells"]),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    if pending:
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    st.stop()
 
-# Run pipeline
+# Run pipeline (background job: the script only submits it and polls its progress)
+jobs = get_job_manager()
 if run_clicked and selected.get("field_id"):
-    with busy("Running extraction…"):
-        initial, alternative, critique = run_pipeline(company, selected["field_id"], selected.get("type", "String"))
+    job_id = jobs.submit(partial(run_pipeline, trace=trace_timings), company, selected["field_id"], selected.get("type", "String"))
+    if job_id not in st.session_state.job_ids:
+        st.session_state.job_ids.append(job_id)
+    st.session_state.job_id = job_id
+
+with st.sidebar:
+    session_jobs = jobs.jobs(st.session_state.job_ids)
+    if session_jobs:
+        st.markdown("---")
+        running, queued = jobs.counts()
+        st.caption(f"Jobs — running: {running} | queued: {queued}")
+        job_labels = {j.job_id: j.label for j in reversed(session_jobs)}
+        if st.session_state.job_id not in job_labels:
+            st.session_state.job_id = next(iter(job_labels))
+        st.session_state.job_id = st.radio(
+            "Show job",
+            list(job_labels),
+            index=list(job_labels).index(st.session_state.job_id),
+            format_func=job_labels.get,
+        )
 
-    st.session_state.initial = initial
-    st.session_state.alternative = alternative
-    st.session_state.critique = critique
-    st.session_state.selected_company = company
-    st.session_state.selected_field_id = selected["field_id"]
-    st.session_state.selected_field_type = selected.get("type", "String")
+job = jobs.get(st.session_state.job_id)
+if job is not None:
+    st.session_state.initial = job.stages.get("initial", {})
+    st.session_state.alternative = job.stages.get("alternative", {})
+    st.session_state.critique = job.stages.get("critique", {})
+    st.session_state.selected_company = job.company
+    st.session_state.selected_field_id = job.field_id
+    st.session_state.selected_field_type = job.field_type
+    if job.active:
+        st.info(f"Running extraction for {job.company} / {job.field_id}… ({job.seconds:,.0f}s)")
+    elif job.status == "error":
+        st.error(f"Extraction failed: {job.error}")
 
 # Show warning if backend missing
 if not BACKEND_AVAILABLE:
@@ -882,7 +1328,9 @@ st.caption(field_meta)
 
 # --- Stage 1: Initial extraction
 with card("1) Initial extraction — Output", "Extract"):
-    if st.session_state.initial:
+    if job is not None and "initial" in job.partial:
+        render_live_preview("initial", job.partial["initial"])
+    elif st.session_state.initial:
         render_result_box(st.session_state.initial)
     else:
         st.info("Run an extraction to display the initial output.")
@@ -898,7 +1346,9 @@ with card("1) Initial extraction — Justification & synonyms", "Explain"):
 
 # --- Stage 2: Alternative extraction
 with card("2) Alternative extraction — Output", "Alternative"):
-    if st.session_state.alternative:
+    if job is not None and "alternative" in job.partial:
+        render_live_preview("alternative", job.partial["alternative"])
+    elif st.session_state.alternative:
         render_result_box(st.session_state.alternative)
     else:
         st.info("Run an extraction to display the alternative output.")
@@ -915,3 +1365,12 @@ with card("2) Alternative extraction — Justification & synonyms", "Explain"):
 # --- Critique
 with card("3) Critique", "Critique"):
     render_critique_block(st.session_state.critique or {})
+
+if trace_timings:
+    with card("Timings", "Trace"):
+        render_timing_panel(job.stages.get("trace", {}) if job is not None else {})
+
+# Poll the running job: rerun until every stage has been rendered
+if job is not None and job.active:
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
@@ -0,0 +1,288 @@
+"""
+Lightweight tracing of the extraction pipelines (index load, embeddings, retrieval, prompt
+rendering, LLM latency, validation...).
+
+    import tracing
+
+    tracing.enable("traces.jsonl")               # or RC_TRACE=1 / RC_TRACE_FILE=traces.jsonl
+    with tracing.span("retrieve", company = "repsol") as sp:
+        ...
+        sp.set(cache_hit = True, rows = 20)
+        sp.count_tokens(user = user_prompt)      # tokens_user (tiktoken, or chars / 4)
+
+- Spans nest through a `ContextVar`, so they are thread- and asyncio-safe: every thread/task has
+  its own current span. `propagate(fn)` runs `fn` in the caller's context (thread pools).
+- Finished root spans are kept in memory (`finished()`) and, with an export path, appended to a
+  JSONL file, one line per span (`export_jsonl` writes them on demand).
+- Disabled (default), `span()` returns a shared no-op object: one global check per call.
+- `scoped(on)` enables or disables tracing for the current context only (and the threads it is
+  `propagate`d to), overriding the process-wide `enable()` / `disable()`: e.g. one job per user
+  session, traced or not, without touching the other sessions.
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+MAX_FINISHED = 1000  # Root spans kept in memory
+
+_enabled = os.environ.get("RC_TRACE", "").lower() not in ("", "0", "false", "no")
+_export_path: Optional[Path] = Path(os.environ["RC_TRACE_FILE"]) if os.environ.get("RC_TRACE_FILE") else None
+if _export_path is not None:
+    _enabled = True
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("rc_trace_span", default = None)
+_scope: contextvars.ContextVar[Optional[bool]] = contextvars.ContextVar("rc_trace_scope", default = None)
+_finished: Deque["Span"] = deque(maxlen = MAX_FINISHED)
+_finished_lock = threading.Lock()
+_ids = itertools.count(1)
+
+
+def _count_tokens(text: str) -> int:
+    try:
+        from prompts.prompts_profiler import estimate_tokens
+    except ImportError:
+        return len(text) // 4  # Rough estimate
+    return estimate_tokens(text)
+
+
+class Span:
+    __slots__ = ("span_id", "name", "attrs", "parent", "children", "started_at", "_start", "_end", "thread", "_token", "_lock")
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.span_id = next(_ids)
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.children: List[Span] = []
+        self.started_at = 0.0
+        self._start = 0.0
+        self._end: Optional[float] = None
+        self.thread = ""
+        self._token = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Span":
+        if self.parent is not None:
+            with self.parent._lock:  # Children may be added from pool threads (see propagate)
+                self.parent.children.append(self)
+        self.thread = threading.current_thread().name
+        self._token = _current.set(self)
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        if self.parent is None:
+            _finish(self)
+
+    def set(self, **attrs: Any) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    def incr(self, key: str, amount: float = 1) -> "Span":
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+        return self
+
+    def count_tokens(self, **texts: str) -> "Span":
+        for key, text in texts.items():
+            self.attrs[f"tokens_{key}"] = _count_tokens(text or "")
+        return self
+
+    @property
+    def duration(self) -> float:
+        return ((self._end if self._end is not None else time.perf_counter()) - self._start) if self._start else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            children = list(self.children)
+        return {
+            "span_id": self.span_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "thread": self.thread,
+            "attrs": dict(self.attrs),
+            "children": [c.to_dict() for c in children],
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> "_NoopSpan":
+        return self
+
+    def incr(self, key: str, amount: float = 1) -> "_NoopSpan":
+        return self
+
+    def count_tokens(self, **texts: str) -> "_NoopSpan":
+        return self
+
+    duration = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {}
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attrs: Any):
+    """
+    Context manager timing a stage, child of the current span (if any).
+    """
+    if not enabled():
+        return NOOP_SPAN
+    return Span(name, _current.get(), attrs)
+
+
+def current_span():
+    """
+    The innermost open span, to annotate it from nested code (no-op object when none).
+    """
+    if not enabled():
+        return NOOP_SPAN
+    return _current.get() or NOOP_SPAN
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator: run the function inside `span(name or qualified name)`.
+    """
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not enabled():
+                return fn(*args, **kwargs)
+            with Span(label, _current.get(), {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def propagate(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Bind `fn` to the caller's context, so spans opened in a pool thread nest under the current one.
+    """
+    if not enabled():
+        return fn
+    context = contextvars.copy_context()
+    return functools.wraps(fn)(lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs))
+
+
+def enable(export_path: Optional[Path] = None) -> None:
+    global _enabled, _export_path
+    _enabled = True
+    if export_path is not None:
+        _export_path = Path(export_path)
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def enabled() -> bool:
+    scoped_on = _scope.get()
+    return _enabled if scoped_on is None else scoped_on
+
+
+@contextlib.contextmanager
+def scoped(on: Optional[bool]):
+    """
+    Enable (True) or disable (False) tracing within the block for the current context only;
+    None keeps the process-wide setting.
+    """
+    token = _scope.set(on)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def _finish(root: Span) -> None:
+    with _finished_lock:
+        _finished.append(root)
+    if _export_path is not None:
+        export_jsonl(_export_path, [root])
+
+
+def finished(last: Optional[int] = None) -> List[Span]:
+    with _finished_lock:
+        spans = list(_finished)
+    return spans[-last:] if last else spans
+
+
+def clear() -> None:
+    with _finished_lock:
+        _finished.clear()
+
+
+def flatten(root: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Rows of a span tree (`Span.to_dict()`), depth-first, with the offset from the root start.
+    """
+    rows: List[Dict[str, Any]] = []
+
+    def walk(node: Dict[str, Any], depth: int, parent_id: Optional[int]) -> None:
+        rows.append({
+            "trace_id": root["span_id"],
+            "span_id": node["span_id"],
+            "parent_id": parent_id,
+            "depth": depth,
+            "name": node["name"],
+            "offset_ms": round((node["started_at"] - root["started_at"]) * 1000, 3),
+            "duration_ms": node["duration_ms"],
+            "thread": node["thread"],
+            **node["attrs"],
+        })
+        for child in node["children"]:
+            walk(child, depth + 1, node["span_id"])
+
+    if root:
+        walk(root, 0, None)
+    return rows
+
+
+_export_lock = threading.Lock()
+
+
+def export_jsonl(path: Path, spans: Optional[Iterable[Span]] = None) -> Path:
+    """
+    Append the given root spans (default: all finished ones) to `path`, one line per span.
+    """
+    path = Path(path)
+    lines = [
+        json.dumps(row, ensure_ascii = False, default = str)
+        for root in (finished() if spans is None else spans)
+        for row in flatten(root.to_dict())
+    ]
+    with _export_lock:
+        path.parent.mkdir(parents = True, exist_ok = True)
+        with path.open("a", encoding = "utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+    return path
@@ -0,0 +1,347 @@
+"""
+Token usage and cost ledger of every LLM call, per company, field and stage.
+
+Each call records prompt / completion / cached tokens, latency and model in a local SQLite file
+(`.cache/usage.sqlite`, same layout conventions as result_store.py). Usage comes from the response
+when the client returns it (LangChain `usage_metadata`, OpenAI `token_usage`); otherwise tokens
+are estimated from the prompt and response text and the row is flagged `estimated`.
+
+    with usage_context(company = "repsol", field = "fx_debt", field_id = "017"):
+        with track("extract", model = "gpt-5.2", prompts = (system_prompt, user_prompt)) as call:
+            call.response = llm.invoke(messages)
+
+Report (which fields / stages dominate tokens and latency):
+    python usage_ledger.py --by field stage --company repsol
+    python usage_ledger.py --by company stage --prices prices.json --csv usage.csv
+"""
+from __future__ import annotations
+
+import argparse
+import contextvars
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import astuple, dataclass, field, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence
+
+import tracing
+
+USAGE_PATH = Path(".cache/usage.sqlite")
+GROUP_COLUMNS = ("company", "field", "field_id", "stage", "model", "run_id")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    company            TEXT,
+    field              TEXT,
+    field_id           TEXT,
+    stage              TEXT NOT NULL,
+    model              TEXT,
+    run_id             TEXT,
+    prompt_tokens      INTEGER NOT NULL,
+    completion_tokens  INTEGER NOT NULL,
+    cached_tokens      INTEGER NOT NULL,
+    latency_ms         REAL NOT NULL,
+    estimated          INTEGER NOT NULL,
+    created_at         REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS usage_by_company ON usage (company, field, stage);
+"""
+
+# Labels of the calls made inside `usage_context` (thread/async local, like tracing spans)
+_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("rc_usage_context", default = {})
+
+
+@dataclass
+class UsageRecord:
+    company: Optional[str]
+    field: Optional[str]
+    field_id: Optional[str]
+    stage: str
+    model: Optional[str]
+    run_id: Optional[str]
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    latency_ms: float
+    estimated: bool
+    created_at: float
+
+
+_COLUMNS = ", ".join(f.name for f in fields(UsageRecord))
+
+
+def _get(obj: Any, key: str) -> Any:
+    return obj.get(key) if isinstance(obj, Mapping) else getattr(obj, key, None)
+
+
+def response_usage(response: Any) -> Optional[Dict[str, Any]]:
+    """
+    (prompt, completion, cached tokens, model) reported by the client, or None.
+    Understands LangChain `usage_metadata` and OpenAI-style `token_usage` / `usage`.
+    """
+    metadata = _get(response, "response_metadata") or {}
+    model = _get(metadata, "model_name") or _get(metadata, "model") or _get(response, "model")
+
+    usage = _get(response, "usage_metadata")
+    if usage:
+        details = _get(usage, "input_token_details") or {}
+        return {
+            "prompt_tokens": int(_get(usage, "input_tokens") or 0),
+            "completion_tokens": int(_get(usage, "output_tokens") or 0),
+            "cached_tokens": int(_get(details, "cache_read") or 0),
+            "model": model,
+        }
+
+    usage = _get(metadata, "token_usage") or _get(response, "usage")
+    if usage:
+        details = _get(usage, "prompt_tokens_details") or {}
+        return {
+            "prompt_tokens": int(_get(usage, "prompt_tokens") or 0),
+            "completion_tokens": int(_get(usage, "completion_tokens") or 0),
+            "cached_tokens": int(_get(details, "cached_tokens") or 0),
+            "model": model,
+        }
+    return None
+
+
+def _response_text(response: Any) -> str:
+    if isinstance(response, str):
+        return response
+    content = _get(response, "content")
+    if isinstance(content, str):
+        return content
+    if hasattr(response, "model_dump_json"):
+        return response.model_dump_json()
+    return json.dumps(response, default = str) if response is not None else ""
+
+
+def _estimate(text: str) -> int:
+    try:
+        from prompts.prompts_profiler import estimate_tokens
+    except ImportError:
+        return len(text) // 4
+    return estimate_tokens(text)
+
+
+@dataclass
+class LLMCall:
+    """
+    One tracked call: set `response` (or `completion_text` for streamed answers) before the block ends.
+    """
+    stage: str
+    model: Optional[str] = None
+    prompts: Sequence[str] = ()
+    response: Any = None
+    completion_text: Optional[str] = None
+    labels: Dict[str, Any] = field(default_factory = dict)
+
+    def to_record(self, latency: float) -> UsageRecord:
+        usage = response_usage(self.response) if self.response is not None else None
+        if usage is None:
+            completion = self.completion_text if self.completion_text is not None else _response_text(self.response)
+            usage = {
+                "prompt_tokens": sum(_estimate(p or "") for p in self.prompts),
+                "completion_tokens": _estimate(completion),
+                "cached_tokens": 0,
+                "model": None,
+            }
+            estimated = True
+        else:
+            estimated = False
+
+        return UsageRecord(
+            company           = self.labels.get("company"),
+            field             = self.labels.get("field"),
+            field_id          = self.labels.get("field_id"),
+            stage             = self.stage,
+            model             = usage["model"] or self.model,
+            run_id            = self.labels.get("run_id"),
+            prompt_tokens     = usage["prompt_tokens"],
+            completion_tokens = usage["completion_tokens"],
+            cached_tokens     = usage["cached_tokens"],
+            latency_ms        = round(latency * 1000, 3),
+            estimated         = estimated,
+            created_at        = time.time(),
+        )
+
+
+class UsageLedger:
+    """
+    Args:
+        path: SQLite file (created on first use). ":memory:" for a throwaway ledger.
+    """
+
+    def __init__(self, path: Path = USAGE_PATH):
+        self.path = path
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents = True, exist_ok = True)
+
+        self._conn = sqlite3.connect(str(path), check_same_thread = False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def add(self, record: UsageRecord) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO usage ({_COLUMNS}) VALUES ({', '.join('?' * len(fields(UsageRecord)))})", astuple(record)
+            )
+
+    @contextmanager
+    def track(self, stage: str, model: Optional[str] = None, prompts: Sequence[str] = (), **labels: Any) -> Iterator[LLMCall]:
+        """
+        Time the block and record its usage (labels override the ones of `usage_context`).
+        Calls that raise are not recorded.
+        """
+        call = LLMCall(stage = stage, model = model, prompts = prompts, labels = {**_context.get(), **labels})
+        start = time.perf_counter()
+        yield call
+        record = call.to_record(time.perf_counter() - start)
+        tracing.current_span().set(
+            prompt_tokens     = record.prompt_tokens,
+            completion_tokens = record.completion_tokens,
+            cached_tokens     = record.cached_tokens,
+        )
+        self.add(record)
+
+    def to_frame(self, company: Optional[str] = None, run_id: Optional[str] = None, since: Optional[float] = None):
+        import pandas as pd
+
+        sql, params = f"SELECT {_COLUMNS} FROM usage WHERE 1 = 1", []
+        for condition, value in (("company = ?", company), ("run_id = ?", run_id), ("created_at >= ?", since)):
+            if value is not None:
+                sql += f" AND {condition}"
+                params.append(value)
+        with self._lock:
+            return pd.read_sql_query(sql + " ORDER BY created_at", self._conn, params = params)
+
+    def report(
+        self,
+        by      : Sequence[str] = ("field", "stage"),
+        company : Optional[str] = None,
+        run_id  : Optional[str] = None,
+        since   : Optional[float] = None,
+        prices  : Optional[Mapping[str, Mapping[str, float]]] = None,
+    ):
+        """
+        Calls, tokens, cache share, latency and (with `prices`, USD per 1M tokens by model:
+        {"input", "cached_input", "output"}) cost per group, largest token consumers first.
+        Groups with calls of unpriced models have cost NaN and their count in `unpriced_calls`.
+        """
+        frame = self.to_frame(company = company, run_id = run_id, since = since)
+        return aggregate(frame, by = by, prices = prices)
+
+
+def _price_column(models, prices: Mapping[str, Mapping[str, float]], kind: str, fallback: Optional[str] = None):
+    # USD per 1M tokens of each row's model (NaN for unpriced models)
+    def lookup(model: str) -> float:
+        table = prices.get(model) or {}
+        return table.get(kind, table.get(fallback, float("nan")) if fallback else float("nan"))
+
+    return models.map(lookup)
+
+
+def aggregate(frame, by: Sequence[str] = ("field", "stage"), prices: Optional[Mapping[str, Mapping[str, float]]] = None):
+    import pandas as pd
+
+    unknown = sorted(set(by) - set(GROUP_COLUMNS))
+    if unknown:
+        raise ValueError(f"Cannot group by {unknown}; choose from {GROUP_COLUMNS}")
+    if frame.empty:
+        return pd.DataFrame(columns = [*by, "calls", "prompt_tokens", "completion_tokens", "cached_tokens", "total_tokens"])
+
+    frame = frame.assign(total_tokens = frame["prompt_tokens"] + frame["completion_tokens"])
+    if prices:
+        models = frame["model"].fillna("")
+        frame = frame.assign(cost_usd = (
+            (frame["prompt_tokens"] - frame["cached_tokens"]) * _price_column(models, prices, "input")
+            + frame["cached_tokens"] * _price_column(models, prices, "cached_input", fallback = "input")
+            + frame["completion_tokens"] * _price_column(models, prices, "output")
+        ) / 1e6)
+
+    grouped = frame.fillna({c: "" for c in by}).groupby(list(by), sort = False)
+    report = grouped.agg(
+        calls             = ("stage", "size"),
+        prompt_tokens     = ("prompt_tokens", "sum"),
+        completion_tokens = ("completion_tokens", "sum"),
+        cached_tokens     = ("cached_tokens", "sum"),
+        total_tokens      = ("total_tokens", "sum"),
+        latency_ms_p50    = ("latency_ms", "median"),
+        latency_s_total   = ("latency_ms", lambda s: s.sum() / 1000),
+        estimated_share   = ("estimated", "mean"),
+        # NaN as soon as one call of the group is unpriced, rather than silently under-reporting
+        **({
+            "cost_usd": ("cost_usd", lambda s: s.sum(min_count = len(s))),
+            "unpriced_calls": ("cost_usd", lambda s: int(s.isna().sum())),
+        } if "cost_usd" in frame else {}),
+    ).reset_index()
+
+    report["cache_share"] = (report["cached_tokens"] / report["prompt_tokens"].where(report["prompt_tokens"] > 0)).fillna(0).round(3)
+    report["token_share"] = (report["total_tokens"] / report["total_tokens"].sum()).round(3)
+    return report.sort_values("total_tokens", ascending = False, ignore_index = True)
+
+
+@lru_cache(maxsize = 1)
+def get_ledger() -> UsageLedger:
+    return UsageLedger()
+
+
+@contextmanager
+def usage_context(**labels: Any) -> Iterator[None]:
+    """
+    Labels (company, field, field_id, run_id) applied to every call tracked inside the block.
+    """
+    token = _context.set({**_context.get(), **labels})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def track(stage: str, model: Optional[str] = None, prompts: Sequence[str] = (), **labels: Any):
+    """
+    `get_ledger().track(...)`: record one LLM call in the default ledger.
+    """
+    return get_ledger().track(stage, model = model, prompts = prompts, **labels)
+
+
+def model_name(llm: Any) -> Optional[str]:
+    for attr in ("model_name", "model", "model_id", "deployment_name"):
+        value = getattr(llm, attr, None)
+        if isinstance(value, str):
+            return value
+    return None
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description = "Aggregate the LLM usage ledger.")
+    parser.add_argument("--by", nargs = "+", default = ["field", "stage"], choices = GROUP_COLUMNS)
+    parser.add_argument("--company", default = None)
+    parser.add_argument("--run-id", default = None)
+    parser.add_argument("--days", type = float, default = None, help = "Only calls of the last N days.")
+    parser.add_argument("--prices", type = Path, default = None, help = "JSON: {model: {input, cached_input, output}} USD per 1M tokens.")
+    parser.add_argument("--path", type = Path, default = USAGE_PATH)
+    parser.add_argument("--csv", type = Path, default = None)
+    args = parser.parse_args()
+
+    report = UsageLedger(args.path).report(
+        by      = args.by,
+        company = args.company,
+        run_id  = args.run_id,
+        since   = time.time() - args.days * 86400 if args.days else None,
+        prices  = json.loads(args.prices.read_text(encoding = "utf-8")) if args.prices else None,
+    )
+    if args.csv:
+        report.to_csv(args.csv, index = False)
+    with pd.option_context("display.max_rows", 200, "display.width", 200):
+        print(report.to_string(index = False) if not report.empty else "No usage recorded.")
@@ -0,0 +1,297 @@
+"""
+Reduced-dimension / scalar-quantised copy of the FAISS vector index, with exact re-scoring.
+
+`text-embedding-3-small` vectors are 1536 float32 (6 KB per chunk) and a flat L2 search reads all
+of them for every query. A quantised copy stores them:
+
+- truncated to `dims` dimensions and re-normalised (the text-embedding-3 models are trained
+  Matryoshka-style, so a prefix of the vector is itself an embedding), and/or
+- scalar-quantised per dimension to `float16` (2 bytes) or `int8` (1 byte, FAISS `QT_8bit`),
+
+and re-scores the `k * rescore` best candidates with the exact full-precision distance, read from
+a memory-mapped `vectors.npy` (only the candidate rows are paged in). Bytes per chunk:
+
+    dims   float32  float16  int8
+    1536     6144     3072   1536
+    512      2048     1024    512
+    256      1024      512    256
+
+The copy lives in `<index_dir>/quantized/` next to the LangChain files, which stay the source of
+truth for incremental ingestion (`ingestion_workflow_pdf(..., quantize = ...)` refreshes it).
+`load_vector_store` returns the quantised store when the folder exists, else `FAISS.load_local`:
+
+    save_quantized("vector_index", QuantizationConfig(dims = 512, dtype = "int8", rescore = 4))
+    store = load_vector_store("vector_index", OpenAIEmbeddings(model = "text-embedding-3-small"))
+    docs_and_scores = store.similarity_search_with_score("deuda en divisa no cubierta", k = 10)
+
+Convert an existing index:
+    python vector_quantization.py vector_index --dims 512 --dtype int8 --rescore 4
+
+Memory, search latency and recall against the full-precision index: benchmarks/bench_quantization.py.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pickle
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+QUANTIZED_DIR = "quantized"
+DTYPES = ("float32", "float16", "int8")
+
+_CONFIG_FILE = "config.json"
+_INDEX_FILE = "index.faiss"
+_VECTORS_FILE = "vectors.npy"
+
+
+@dataclass(frozen = True)
+class QuantizationConfig:
+    dims: Optional[int] = None         # Leading dimensions kept (None: all)
+    dtype: str = "float32"             # float32 | float16 | int8
+    rescore: int = 4                   # Candidates re-scored at full precision: k * rescore (0: off)
+
+    def __post_init__(self):
+        if self.dtype not in DTYPES:
+            raise ValueError(f"Invalid dtype: {self.dtype!r} (choose from {DTYPES})")
+        if self.dims is not None and self.dims < 1:
+            raise ValueError(f"Invalid dims: {self.dims!r}")
+        if self.rescore < 0:
+            raise ValueError(f"Invalid rescore: {self.rescore!r}")
+
+    @property
+    def label(self) -> str:
+        rescore = f"+rescore{self.rescore}" if self.rescore else ""
+        return f"{self.dims or 'full'}d-{self.dtype}{rescore}"
+
+    def bytes_per_vector(self, dim: int) -> int:
+        return min(self.dims or dim, dim) * {"float32": 4, "float16": 2, "int8": 1}[self.dtype]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantizationConfig":
+        return cls(**{k: data[k] for k in ("dims", "dtype", "rescore") if k in data})
+
+
+def truncate(vectors: np.ndarray, dims: Optional[int]) -> np.ndarray:
+    """
+    First `dims` dimensions of each row, re-normalised to unit length (float32, C-contiguous).
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype = np.float32))
+    if dims is not None and dims < vectors.shape[1]:
+        vectors = vectors[:, :dims]
+        norms = np.linalg.norm(vectors, axis = 1, keepdims = True)
+        vectors = vectors / np.where(norms > 0, norms, 1.0)
+    return np.ascontiguousarray(vectors, dtype = np.float32)
+
+
+def build_index(vectors: np.ndarray, config: QuantizationConfig) -> Any:
+    """
+    FAISS L2 index of the truncated vectors: flat for float32, scalar quantiser otherwise.
+    """
+    import faiss
+
+    vectors = truncate(vectors, config.dims)
+    dim = vectors.shape[1]
+    if config.dtype == "float32":
+        index = faiss.IndexFlatL2(dim)
+    else:
+        qtype = faiss.ScalarQuantizer.QT_fp16 if config.dtype == "float16" else faiss.ScalarQuantizer.QT_8bit
+        index = faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_L2)
+        index.train(vectors)  # Per-dimension min / max of the int8 codes (no-op for fp16)
+    index.add(vectors)
+    return index
+
+
+def index_bytes(index: Any) -> int:
+    """
+    Serialized size of a FAISS index (its vectors / codes plus a small header).
+    """
+    import faiss
+
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def rescore(
+    query   : np.ndarray,
+    ids     : np.ndarray,
+    vectors : np.ndarray,
+    k       : int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact squared L2 distances of the candidate `ids` to the full-precision `query`; best `k`.
+    Rows are read in ascending id order, so a memory-mapped `vectors` is scanned sequentially.
+    """
+    ids = np.sort(np.asarray(ids, dtype = np.int64))
+    candidates = np.asarray(vectors[ids], dtype = np.float32)
+    distances = ((candidates - np.asarray(query, dtype = np.float32)) ** 2).sum(axis = 1)
+    order = np.argsort(distances, kind = "stable")[:k]
+    return ids[order], distances[order]
+
+
+def search(
+    index   : Any,
+    query   : np.ndarray,
+    k       : int,
+    config  : QuantizationConfig,
+    vectors : Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ids and squared L2 distances of the `k` nearest vectors to a full-precision `query`.
+    With `config.rescore` and the full `vectors`, the quantised index only proposes candidates.
+    """
+    query = np.asarray(query, dtype = np.float32).reshape(-1)
+    exact = bool(config.rescore) and vectors is not None
+    fetch = min(k * config.rescore if exact else k, index.ntotal)
+    if fetch <= 0:
+        return np.empty(0, dtype = np.int64), np.empty(0, dtype = np.float32)
+    distances, ids = index.search(truncate(query, config.dims), fetch)
+    keep = ids[0] >= 0
+    ids, distances = ids[0][keep], distances[0][keep]
+    if exact:
+        return rescore(query, ids, vectors, k)
+    return ids[:k], distances[:k]
+
+
+# ======================================================================================
+# Index folder
+# ======================================================================================
+def save_quantized(index_dir: Union[str, Path], config: QuantizationConfig, index_name: str = "index") -> Dict[str, Any]:
+    """
+    Write `<index_dir>/quantized/` from the full-precision `<index_name>.faiss` of a LangChain
+    FAISS folder. Returns the stats stored in its config.json.
+    """
+    import faiss
+
+    index_dir = Path(index_dir)
+    full = faiss.read_index(str(index_dir / f"{index_name}.faiss"))
+    vectors = full.reconstruct_n(0, full.ntotal).astype(np.float32, copy = False)
+
+    target = index_dir / QUANTIZED_DIR
+    target.mkdir(parents = True, exist_ok = True)
+    index = build_index(vectors, config)
+    faiss.write_index(index, str(target / _INDEX_FILE))
+    if config.rescore:
+        np.save(target / _VECTORS_FILE, vectors)
+    elif (target / _VECTORS_FILE).exists():
+        (target / _VECTORS_FILE).unlink()
+
+    stats = {
+        "vectors": int(full.ntotal),
+        "dim": int(full.d),
+        "index_bytes": index_bytes(index),
+        "full_index_bytes": index_bytes(full),
+    }
+    tmp = target / f"{_CONFIG_FILE}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps({**config.to_dict(), "index_name": index_name, **stats}, indent = 2), encoding = "utf-8")
+    os.replace(tmp, target / _CONFIG_FILE)  # Written last: the folder is only used once complete
+    return stats
+
+
+def read_config(index_dir: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    path = Path(index_dir) / QUANTIZED_DIR / _CONFIG_FILE
+    return json.loads(path.read_text(encoding = "utf-8")) if path.exists() else None
+
+
+class QuantizedVectorStore:
+    """
+    Search side of a LangChain FAISS store over the quantised index: same documents and
+    `similarity_search` / `similarity_search_with_score` (squared L2 distances, lower is better).
+
+    Args:
+        embeddings: Query embeddings at full dimension (truncated here when `config.dims` is set).
+        index: Quantised FAISS index.
+        docstore / index_to_docstore_id: As pickled by `FAISS.save_local`.
+        config: Quantisation of `index`.
+        vectors: Full-precision vectors for re-scoring (memory-mapped), or None.
+    """
+
+    def __init__(self, embeddings: Any, index: Any, docstore: Any, index_to_docstore_id: Dict[int, str], config: QuantizationConfig, vectors: Optional[np.ndarray] = None):
+        self.embeddings = embeddings
+        self.index = index
+        self.docstore = docstore
+        self.index_to_docstore_id = index_to_docstore_id
+        self.config = config
+        self.vectors = vectors
+
+    @classmethod
+    def load(cls, index_dir: Union[str, Path], embeddings: Any, allow_dangerous_deserialization: bool = False) -> "QuantizedVectorStore":
+        import faiss
+
+        if not allow_dangerous_deserialization:
+            raise ValueError("Loading the docstore unpickles index.pkl: pass allow_dangerous_deserialization=True for trusted folders.")
+        index_dir = Path(index_dir)
+        data = read_config(index_dir)
+        if data is None:
+            raise FileNotFoundError(f"No quantized index in {index_dir}")
+        config = QuantizationConfig.from_dict(data)
+        target = index_dir / QUANTIZED_DIR
+        index = faiss.read_index(str(target / _INDEX_FILE))
+        vectors = np.load(target / _VECTORS_FILE, mmap_mode = "r") if config.rescore and (target / _VECTORS_FILE).exists() else None
+        with open(index_dir / f"{data.get('index_name', 'index')}.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        return cls(embeddings, index, docstore, index_to_docstore_id, config, vectors)
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[Union[Dict[str, Any], Callable[[Dict[str, Any]], bool]]] = None, fetch_k: int = 20, **_: Any) -> List[Tuple[Any, float]]:
+        # Filtering happens after the search, as in LangChain's FAISS: fetch more, then filter
+        ids, distances = search(self.index, np.asarray(embedding), fetch_k if filter is not None else k, self.config, self.vectors)
+        results = []
+        for i, distance in zip(ids, distances):
+            doc = self.docstore.search(self.index_to_docstore_id[int(i)])
+            if filter is not None and not _matches(doc.metadata, filter):
+                continue
+            results.append((doc, float(distance)))
+        return results[:k]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Any, float]]:
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Any]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+
+def _matches(metadata: Dict[str, Any], filter: Union[Dict[str, Any], Callable[[Dict[str, Any]], bool]]) -> bool:
+    if callable(filter):
+        return bool(filter(metadata))
+    return all(
+        metadata.get(key) in value if isinstance(value, list) else metadata.get(key) == value
+        for key, value in filter.items()
+    )
+
+
+def load_vector_store(index_dir: Union[str, Path], embeddings: Any, quantized: bool = True) -> Any:
+    """
+    The quantised store of `index_dir` when it has one (and `quantized`), else `FAISS.load_local`.
+    """
+    if quantized and read_config(index_dir) is not None:
+        return QuantizedVectorStore.load(index_dir, embeddings, allow_dangerous_deserialization = True)
+
+    from langchain_community.vectorstores.faiss import FAISS
+
+    return FAISS.load_local(str(index_dir), embeddings, allow_dangerous_deserialization = True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Write a truncated / quantised copy of a FAISS vector index.")
+    parser.add_argument("index_dir", type = Path, help = "LangChain FAISS folder (index.faiss + index.pkl).")
+    parser.add_argument("--dims", type = int, default = None, help = "Leading dimensions kept (default: all).")
+    parser.add_argument("--dtype", choices = DTYPES, default = "int8")
+    parser.add_argument("--rescore", type = int, default = 4, help = "Re-score k * N candidates at full precision (0: off).")
+    parser.add_argument("--remove", action = "store_true", help = "Delete the quantised copy instead.")
+    args = parser.parse_args()
+
+    if args.remove:
+        import shutil
+
+        shutil.rmtree(args.index_dir / QUANTIZED_DIR, ignore_errors = True)
+    else:
+        config = QuantizationConfig(dims = args.dims, dtype = args.dtype, rescore = args.rescore)
+        stats = save_quantized(args.index_dir, config)
+        print(f"{config.label}: {stats['vectors']} vectors, {stats['index_bytes'] / 2**20:.2f} MB "
+              f"(full precision {stats['full_index_bytes'] / 2**20:.2f} MB)")